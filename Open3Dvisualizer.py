@@ -1,32 +1,2732 @@
-import open3d as o3d
 import tkinter as tk
 from tkinter import ttk, filedialog, colorchooser, messagebox
 import numpy as np
 import os
 import sys
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageDraw
 import multiprocessing
 import tempfile
 import time
 import sys
 import queue
+import collections
+import itertools
+import threading
+import hashlib
+import json
+import shutil
+import subprocess
+import re
+import socket
+import struct
+import io
+import mmap
+import glob
+import zipfile
+import asyncio
+import argparse
+import importlib.util
+import colorsys
+import atexit
 
+# Reference point for the startup timings reported once the window and first frame appear
+STARTUP_TIME = time.perf_counter()
 
-def visualization_worker(render_queue, result_queue):
+# Open3D is imported on first use. Only the render workers and their pools
+# need it, so the GUI process starts without paying for the import.
+o3d = None
+
+
+def load_open3d():
+    global o3d
+    if o3d is None:
+        import open3d
+        o3d = open3d
+    return o3d
+
+
+def worker_context():
+    """Start method for render workers.
+
+    Forking the GUI process would copy Tk and its listener threads, so workers
+    come from a fork server where available and are spawned otherwise.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def worker_pool(processes=None):
+    """Process pool for the heavy jobs of a render worker or its loaders.
+
+    Pools come from the same start method as the workers, since forking a
+    render worker would copy its OpenGL context.
+    """
+    if processes is None:
+        processes = max(1, min(4, (os.cpu_count() or 1) - 1))
+    return worker_context().Pool(processes=processes)
+
+
+# Nearest-neighbour index built once in the statistics pool process
+_distance_index = None
+# Source and target clouds loaded once in the registration pool process
+_registration_clouds = None
+
+# Binary copies of parsed source files, reused across sessions
+CLOUD_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'open3dvisualizer_cache')
+# Bumped whenever cached arrays would be read differently from the source file
+CLOUD_CACHE_VERSION = 2
+
+
+# Column layouts of ASCII point files, by number of columns
+ASCII_LAYOUTS = {
+    3: {'xyz': 0},
+    4: {'xyz': 0, 'intensity': 3},
+    6: {'xyz': 0, 'rgb': 3},
+    7: {'xyz': 0, 'intensity': 3, 'rgb': 4},
+}
+
+
+def detect_ascii_layout(file_path, max_header_lines=16, sample_lines=1000):
+    """Find where the data starts in an ASCII point file and how it is laid out.
+
+    Skips the point count line of .pts files and any non-numeric header lines.
+    Returns the data offset, the column count, whether columns are comma
+    separated and the layout, the positions of 'xyz' and any 'intensity',
+    'rgb' or 'normals' columns. Three trailing columns are taken as RGB only
+    if a sample of lines looks like colours (integer-like in 0-255, or within
+    0-1), as normals if they are unit vectors, and are ignored otherwise.
+    """
+    offset = 0
+    columns = None
+    with open(file_path, 'rb') as f:
+        for _ in range(max_header_lines):
+            line = f.readline()
+            if not line:
+                break
+            fields = line.replace(b',', b' ').split()
+            try:
+                values = [float(field) for field in fields]
+            except ValueError:
+                values = None
+            if values is None or len(values) < 3:
+                offset += len(line)
+                continue
+            
+            columns = len(values)
+            comma = b',' in line
+            sample = [values]
+            for line in itertools.islice(f, sample_lines):
+                try:
+                    values = [float(field) for field in line.replace(b',', b' ').split()]
+                except ValueError:
+                    continue
+                if len(values) == columns:
+                    sample.append(values)
+            break
+    if columns is None:
+        raise ValueError(f"No point data found in {os.path.basename(file_path)}")
+    
+    layout = dict(ASCII_LAYOUTS.get(columns, {'xyz': 0}))
+    if 'rgb' in layout:
+        rgb = np.array(sample)[:, layout['rgb']:layout['rgb'] + 3]
+        integer_like = np.array_equal(rgb, np.round(rgb))
+        if not (rgb.min() >= 0 and (rgb.max() <= 1.0 or (integer_like and rgb.max() <= 255))):
+            start = layout.pop('rgb')
+            if np.allclose(np.linalg.norm(rgb, axis=1), 1.0, atol=1e-2):
+                layout['normals'] = start
+    return offset, columns, comma, layout
+
+
+def _ascii_ranges(file_path, offset, chunk_bytes):
+    """Split the data section of a file into byte ranges that end on line breaks"""
+    size = os.path.getsize(file_path)
+    ranges = []
+    with open(file_path, 'rb') as f:
+        start = offset
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                tail = f.readline()
+                end += len(tail)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _read_ascii_range(file_path, start, end):
+    with open(file_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return mm[start:end]
+        finally:
+            mm.close()
+
+
+def _ascii_count_chunk(file_path, start, end):
+    """Count the non-blank lines in a byte range"""
+    data = _read_ascii_range(file_path, start, end)
+    lines = data.count(b'\n') + 1
+    if data[:1].isspace() or any(gap in data for gap in (b'\n\n', b'\n\r', b'\n ', b'\n\t')):
+        blank = len(re.findall(rb'(?m)^[ \t\r]*$', data))
+    else:
+        blank = 1 if data.endswith(b'\n') or not data else 0
+    return lines - blank
+
+
+def _ascii_parse_chunk(file_path, start, end, row, rows, columns, comma, layout, outputs):
+    """Parse a byte range into rows [row, row + rows) of the output maps; returns the largest RGB value"""
+    data = _read_ascii_range(file_path, start, end)
+    if comma:
+        data = data.replace(b',', b' ')
+    # loadtxt rejects rows with a different column count instead of shifting later values
+    values = np.empty((0, columns))
+    if rows:
+        try:
+            values = np.loadtxt(io.BytesIO(data), dtype=np.float64, comments=None, ndmin=2)
+        except ValueError as e:
+            raise ValueError(f"Malformed data between bytes {start} and {end}: {e}")
+    if values.shape != (rows, columns):
+        raise ValueError(f"Malformed data between bytes {start} and {end}: expected {rows} lines of {columns} columns")
+    
+    points = np.load(outputs['points'], mmap_mode='r+')
+    points[row:row + rows] = values[:, 0:3]
+    points.flush()
+    rgb_max = 0.0
+    if 'rgb' in layout:
+        colors = np.load(outputs['colors'], mmap_mode='r+')
+        rgb = values[:, layout['rgb']:layout['rgb'] + 3]
+        colors[row:row + rows] = rgb
+        colors.flush()
+        rgb_max = float(rgb.max()) if rows else 0.0
+    if 'normals' in layout:
+        normals = np.load(outputs['normals'], mmap_mode='r+')
+        normals[row:row + rows] = values[:, layout['normals']:layout['normals'] + 3]
+        normals.flush()
+    if 'intensity' in layout:
+        intensity = np.load(outputs['scalars']['intensity'], mmap_mode='r+')
+        intensity[row:row + rows] = values[:, layout['intensity']]
+        intensity.flush()
+    return rgb_max
+
+
+def parse_ascii_cloud(file_path, prefix, chunk_bytes=32 * 1024 * 1024, processes=None):
+    """Parse an ASCII .xyz/.pts file into .npy files next to prefix.
+
+    The file is split into line-aligned byte ranges that are parsed in
+    parallel straight into preallocated memory-mapped arrays, one pass to
+    count lines and one to parse. Intensity is kept as a scalar field and
+    RGB is scaled to 0-1 when any parsed value exceeds 1. Returns a cache entry as written by
+    write_cloud_cache and the parse statistics.
+    """
+    start_time = time.perf_counter()
+    offset, columns, comma, layout = detect_ascii_layout(file_path)
+    ranges = _ascii_ranges(file_path, offset, chunk_bytes)
+    
+    if processes is None:
+        processes = max(1, min(8, (os.cpu_count() or 1) - 1))
+    # Small files are not worth starting a pool for
+    if len(ranges) == 1:
+        processes = 1
+    
+    pool = None
+    if processes > 1:
+        pool = worker_pool(processes)
+    try:
+        if pool is not None:
+            counts = pool.starmap(_ascii_count_chunk, [(file_path, begin, end) for begin, end in ranges])
+        else:
+            counts = [_ascii_count_chunk(file_path, begin, end) for begin, end in ranges]
+        num_points = sum(counts)
+        
+        outputs = {'points': prefix + '_points.npy'}
+        np.lib.format.open_memmap(outputs['points'], mode='w+', dtype=np.float64, shape=(num_points, 3))
+        if 'rgb' in layout:
+            outputs['colors'] = prefix + '_colors.npy'
+            np.lib.format.open_memmap(outputs['colors'], mode='w+', dtype=np.float32, shape=(num_points, 3))
+        if 'normals' in layout:
+            outputs['normals'] = prefix + '_normals.npy'
+            np.lib.format.open_memmap(outputs['normals'], mode='w+', dtype=np.float32, shape=(num_points, 3))
+        if 'intensity' in layout:
+            outputs['scalars'] = {'intensity': prefix + '_sf_intensity.npy'}
+            np.lib.format.open_memmap(outputs['scalars']['intensity'], mode='w+', dtype=np.float32, shape=(num_points,))
+        
+        rows = np.concatenate([[0], np.cumsum(counts)]).astype(int)
+        tasks = [
+            (file_path, begin, end, rows[i], counts[i], columns, comma, layout, outputs)
+            for i, (begin, end) in enumerate(ranges)
+        ]
+        if pool is not None:
+            rgb_max = max(pool.starmap(_ascii_parse_chunk, tasks))
+        else:
+            rgb_max = max(_ascii_parse_chunk(*task) for task in tasks)
+        
+        # The scale is decided on every parsed value, so dark leading points cannot mislead it
+        if 'rgb' in layout and rgb_max > 1.0:
+            colors = np.load(outputs['colors'], mmap_mode='r+')
+            for begin in range(0, num_points, 4000000):
+                colors[begin:begin + 4000000] /= 255.0
+            colors.flush()
+            del colors
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    
+    elapsed = time.perf_counter() - start_time
+    size = os.path.getsize(file_path)
+    stats = {
+        'points': num_points,
+        'bytes': size,
+        'seconds': elapsed,
+        'mb_per_second': size / (1024 * 1024) / max(elapsed, 1e-9),
+    }
+    return outputs, stats
+
+
+def read_point_cloud_file(file_path, file_ext=None):
+    """Load a point cloud, sampling meshes into points when needed"""
+    if file_ext is None:
+        file_ext = os.path.splitext(file_path)[1]
+    file_ext = file_ext.lower()
+
+    if file_ext in ['.xyz', '.pts']:
+        # Parse into a scratch directory; the cloud keeps its own copy of the arrays
+        work_dir = tempfile.mkdtemp(prefix='open3dvisualizer_parse_')
+        try:
+            cache, _ = parse_ascii_cloud(file_path, os.path.join(work_dir, 'cloud'))
+            cloud = read_cloud_cache(cache)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    elif file_ext in ['.ply', '.pcd']:
+        # Load as point cloud
+        cloud = o3d.io.read_point_cloud(file_path)
+
+        # If point cloud is empty, try to load as mesh and sample points
+        if len(cloud.points) == 0 and file_ext in ['.ply', '.obj']:
+            mesh = o3d.io.read_triangle_mesh(file_path)
+            cloud = mesh.sample_points_uniformly(number_of_points=100000)
+    elif file_ext == '.obj':
+        # Load as mesh then convert to point cloud
+        mesh = o3d.io.read_triangle_mesh(file_path)
+        cloud = mesh.sample_points_uniformly(number_of_points=100000)
+    else:
+        raise ValueError(f"Unsupported file format: {file_ext}")
+
+    return cloud
+
+
+def write_cloud_cache(cloud, prefix, scalar_fields=None):
+    """Save a cloud's arrays and scalar fields as .npy files next to prefix; returns the cache entry"""
+    cache = {'points': prefix + '_points.npy'}
+    np.save(cache['points'], np.asarray(cloud.points))
+    if cloud.has_colors():
+        cache['colors'] = prefix + '_colors.npy'
+        np.save(cache['colors'], np.asarray(cloud.colors).astype(np.float32))
+    if cloud.has_normals():
+        cache['normals'] = prefix + '_normals.npy'
+        np.save(cache['normals'], np.asarray(cloud.normals).astype(np.float32))
+    for name, values in (scalar_fields or {}).items():
+        if len(values) == len(cloud.points):
+            cache.setdefault('scalars', {})[name] = f"{prefix}_sf_{name}.npy"
+            np.save(cache['scalars'][name], np.asarray(values, dtype=np.float32))
+    return cache
+
+
+def open_cache_array(path):
+    """Memory-map a cached array: a .npy file, or 'bundle::member.npy' inside a session bundle"""
+    if '::' in path:
+        bundle_path, member = path.split('::', 1)
+        return open_bundle_array(bundle_path, member)
+    return np.load(path, mmap_mode='r')
+
+
+def read_cloud_cache(cache):
+    """Rebuild a cloud from a cache entry written by write_cloud_cache.
+
+    An entry with a 'step' loads every step-th point only.
+    """
+    step = cache.get('step', 1)
+    cloud = o3d.geometry.PointCloud()
+    cloud.points = o3d.utility.Vector3dVector(open_cache_array(cache['points'])[::step].astype(np.float64))
+    if 'colors' in cache:
+        cloud.colors = o3d.utility.Vector3dVector(open_cache_array(cache['colors'])[::step].astype(np.float64))
+    if 'normals' in cache:
+        cloud.normals = o3d.utility.Vector3dVector(open_cache_array(cache['normals'])[::step].astype(np.float64))
+    if 'colors' not in cache and 'intensity' in cache.get('scalars', {}):
+        # Show intensity-only scans in grey levels
+        intensity = open_cache_array(cache['scalars']['intensity'])[::step]
+        low, high = np.percentile(intensity, [1, 99]) if len(intensity) else (0.0, 1.0)
+        grey = np.clip((intensity - low) / max(high - low, 1e-12), 0.0, 1.0)
+        cloud.colors = o3d.utility.Vector3dVector(np.repeat(grey[:, None], 3, axis=1))
+    return cloud
+
+
+def read_scalar_fields(cache):
+    """Memory-map the per-point scalar fields of a cache entry"""
+    if not cache:
+        return {}
+    step = cache.get('step', 1)
+    return {name: open_cache_array(path)[::step] for name, path in cache.get('scalars', {}).items()}
+
+
+def cache_paths(cache):
+    """Every file referenced by a cache entry"""
+    paths = [path for name, path in cache.items() if name not in ('scalars', 'step')]
+    return paths + list(cache.get('scalars', {}).values())
+
+
+def default_memory_limit():
+    """Half of physical memory, or 4 GB where it cannot be determined"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (AttributeError, ValueError, OSError):
+        return 4 * 1024 ** 3
+
+
+def geometry_bytes(geometry):
+    """Bytes held by the arrays of a point cloud or triangle mesh"""
+    if geometry is None:
+        return 0
+    if isinstance(geometry, o3d.geometry.PointCloud):
+        return 24 * (len(geometry.points) + len(geometry.colors) + len(geometry.normals))
+    return (24 * (len(geometry.vertices) + len(geometry.vertex_colors) + len(geometry.vertex_normals))
+            + 12 * len(geometry.triangles) + 24 * len(geometry.triangle_normals))
+
+
+class MemoryBudget:
+    """Accounting of the bytes a worker holds against a ceiling.
+
+    ``measure`` takes (category, bytes) pairs for everything currently held:
+    'geometry' for displayed points and meshes, 'derived' for buffers computed
+    from them (colours, normals, undo copies) and 'caches' for data held ahead
+    of use (prefetched frames, stream buffers).
+    """
+
+    CATEGORIES = ('geometry', 'derived', 'caches')
+
+    def __init__(self, limit=None):
+        self.limit = limit or default_memory_limit()
+        self.usage = dict.fromkeys(self.CATEGORIES, 0)
+
+    def measure(self, items):
+        self.usage = dict.fromkeys(self.CATEGORIES, 0)
+        for category, nbytes in items:
+            self.usage[category] += int(nbytes)
+        return self.total
+
+    @property
+    def total(self):
+        return sum(self.usage.values())
+
+    def available(self, replacing=0):
+        """Bytes left for new data once ``replacing`` bytes have been released"""
+        return max(self.limit - self.total + replacing, 0)
+
+    def report(self):
+        return dict(self.usage, type='memory', used=self.total, limit=self.limit)
+
+
+class MemoryBudgetError(ValueError):
+    """A cloud cannot be loaded within the memory budget, even reduced"""
+
+
+def fit_cache_to_budget(cache, max_bytes, load_info=None, min_points=10000):
+    """Reduce a cache entry until loading it fits in max_bytes.
+
+    Normals are dropped first since they can be recomputed. If the points
+    still do not fit, the entry gets a 'step' so only every step-th point is
+    loaded. Any reduction is recorded in load_info. Raises MemoryBudgetError
+    when fewer than min_points points (or all of a smaller cloud) would fit.
+    """
+    num_points = open_cache_array(cache['points']).shape[0]
+    has_colors = 'colors' in cache or 'intensity' in cache.get('scalars', {})
+    bytes_per_point = 24 * (1 + has_colors + ('normals' in cache))
+    if max_bytes is None or num_points * bytes_per_point <= max_bytes:
+        return cache
+    
+    cache = dict(cache)
+    evicted = []
+    if 'normals' in cache:
+        del cache['normals']
+        evicted.append('normals')
+        bytes_per_point -= 24
+    if max_bytes // bytes_per_point < min(num_points, min_points):
+        raise MemoryBudgetError(
+            f"Not enough of the memory budget is left to load {num_points:,} points: "
+            f"{max_bytes / 1024 ** 2:,.1f} MB available, at least {min(num_points, min_points) * bytes_per_point / 1024 ** 2:,.1f} MB needed"
+        )
+    if num_points * bytes_per_point > max_bytes:
+        cache['step'] = int(np.ceil(num_points * bytes_per_point / max(max_bytes, 1)))
+    if load_info is not None:
+        load_info.update({
+            'source_points': num_points,
+            'step': cache.get('step', 1),
+            'evicted': evicted
+        })
+    return cache
+
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1', 'short': 'i2', 'int16': 'i2',
+    'ushort': 'u2', 'uint16': 'u2', 'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+def read_cloud_header(file_path, file_ext):
+    """Point count and record layout of a .ply or .pcd file, read from its header alone.
+
+    Returns {'count', 'fields', 'dtype', 'offset'}, where dtype and offset
+    describe the per-point records when they can be memory-mapped (binary
+    data with the points first) and are None otherwise. Returns None for an
+    unrecognised header.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(65536)
+    
+    if file_ext == '.ply':
+        end = header.find(b'end_header')
+        if not header.startswith(b'ply') or end < 0:
+            return None
+        offset = header.index(b'\n', end) + 1
+        lines = header[:end].decode('ascii', 'replace').splitlines()
+        fmt = None
+        elements = []
+        for line in lines:
+            words = line.split()
+            if words[:1] == ['format']:
+                fmt = words[1]
+            elif words[:1] == ['element']:
+                elements.append((words[1], int(words[2]), []))
+            elif words[:1] == ['property'] and elements:
+                elements[-1][2].append(words[1:])
+        if not elements or elements[0][0] != 'vertex':
+            return None
+        _, count, properties = elements[0]
+        fields = [prop[-1] for prop in properties]
+        dtype = None
+        if fmt in ('binary_little_endian', 'binary_big_endian') and all(prop[0] != 'list' for prop in properties):
+            endian = '<' if fmt == 'binary_little_endian' else '>'
+            dtype = np.dtype([(prop[1], endian + PLY_TYPES[prop[0]]) for prop in properties])
+        return {'count': count, 'fields': fields, 'dtype': dtype, 'offset': offset if dtype is not None else None}
+    
+    values = {}
+    offset = 0
+    for line in header.splitlines(keepends=True):
+        offset += len(line)
+        words = line.decode('ascii', 'replace').split()
+        if not words or words[0].startswith('#'):
+            continue
+        values[words[0].upper()] = words[1:]
+        if words[0].upper() == 'DATA':
+            break
+    if 'DATA' not in values or 'POINTS' not in values:
+        return None
+    fields = values.get('FIELDS', [])
+    dtype = None
+    if values['DATA'][:1] == ['binary'] and all(int(n) == 1 for n in values.get('COUNT', ['1'] * len(fields))):
+        kinds = {'F': 'f', 'I': 'i', 'U': 'u'}
+        dtype = np.dtype([
+            (name, '<' + kinds[kind] + size)
+            for name, size, kind in zip(fields, values['SIZE'], values['TYPE'])
+        ])
+    return {'count': int(values['POINTS'][0]), 'fields': fields, 'dtype': dtype,
+            'offset': offset if dtype is not None else None}
+
+
+def cache_binary_cloud(file_path, header, prefix, chunk_size=2000000):
+    """Write a cache entry by streaming a binary .ply/.pcd file's records, chunk by chunk"""
+    records = np.memmap(file_path, dtype=header['dtype'], mode='r', offset=header['offset'], shape=(header['count'],))
+    names = records.dtype.names
+    outputs = {'points': (prefix + '_points.npy', np.float64)}
+    if 'red' in names or 'rgb' in names:
+        outputs['colors'] = (prefix + '_colors.npy', np.float32)
+    # PLY and PCD name normal components differently
+    normal_names = next((axes for axes in (('nx', 'ny', 'nz'), ('normal_x', 'normal_y', 'normal_z')) if axes[0] in names), None)
+    if normal_names is not None:
+        outputs['normals'] = (prefix + '_normals.npy', np.float32)
+    arrays = {
+        name: np.lib.format.open_memmap(path + '.partial', mode='w+', dtype=dtype, shape=(header['count'], 3))
+        for name, (path, dtype) in outputs.items()
+    }
+    
+    for start in range(0, header['count'], chunk_size):
+        chunk = np.asarray(records[start:start + chunk_size])
+        stop = start + len(chunk)
+        arrays['points'][start:stop] = np.column_stack([chunk['x'], chunk['y'], chunk['z']])
+        if 'colors' in arrays:
+            if 'rgb' in names:
+                # PCD packs colours into the bits of one 32-bit field
+                packed = np.ascontiguousarray(chunk['rgb']).view(np.uint32)
+                rgb = np.column_stack([(packed >> 16) & 255, (packed >> 8) & 255, packed & 255])
+            else:
+                rgb = np.column_stack([chunk['red'], chunk['green'], chunk['blue']])
+            integer = 'rgb' in names or np.issubdtype(chunk.dtype['red'], np.integer)
+            arrays['colors'][start:stop] = rgb / 255.0 if integer else rgb
+        if 'normals' in arrays:
+            arrays['normals'][start:stop] = np.column_stack([chunk[name] for name in normal_names])
+    
+    # Points last, so a partial entry is never used
+    cache = {}
+    for name in sorted(arrays, key=lambda name: name == 'points'):
+        arrays[name].flush()
+        path = outputs[name][0]
+        del arrays[name]
+        os.replace(path + '.partial', path)
+        cache[name] = path
+    return cache
+
+
+def load_point_cloud_cached(file_path, file_ext=None, cache_dir=CLOUD_CACHE_DIR, load_info=None, max_bytes=None):
+    """Load a file through the binary cache, parsing and caching it on a miss.
+
+    Returns the cloud and its cache entry. Entries are keyed on the absolute
+    path, size, modification time and CLOUD_CACHE_VERSION, so edited files
+    are parsed again.
+    ASCII files are parsed straight into the cache; their statistics are
+    added to load_info when it is given. A cloud that would take more than
+    max_bytes is loaded reduced, see fit_cache_to_budget.
+    """
+    if file_ext is None:
+        file_ext = os.path.splitext(file_path)[1]
+    file_ext = file_ext.lower()
+
+    stat = os.stat(file_path)
+    key = hashlib.sha1(
+        f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{CLOUD_CACHE_VERSION}".encode()
+    ).hexdigest()
+    prefix = os.path.join(cache_dir, key)
+
+    cache = {'points': prefix + '_points.npy'}
+    for name in ('colors', 'normals'):
+        if os.path.exists(f"{prefix}_{name}.npy"):
+            cache[name] = f"{prefix}_{name}.npy"
+    for path in glob.glob(glob.escape(prefix) + '_sf_*.npy'):
+        name = os.path.basename(path)[len(key) + len('_sf_'):-len('.npy')]
+        cache.setdefault('scalars', {})[name] = path
+
+    if os.path.exists(cache['points']):
+        try:
+            cache = fit_cache_to_budget(cache, max_bytes, load_info)
+            return read_cloud_cache(cache), cache
+        except MemoryBudgetError:
+            raise
+        except Exception as e:
+            # Fall through and parse the source file again
+            if load_info is not None:
+                load_info['cache_error'] = f"ignored unreadable cache ({e})"
+
+    if file_ext in ['.xyz', '.pts']:
+        os.makedirs(cache_dir, exist_ok=True)
+        parsing, stats = parse_ascii_cloud(file_path, prefix + '_parsing')
+        if load_info is not None:
+            load_info.update(stats)
+        
+        # Move the finished arrays into place, points last so a partial entry is never used
+        cache = {}
+        for name, path in parsing.items():
+            if name == 'scalars':
+                cache['scalars'] = {}
+                for field, field_path in path.items():
+                    cache['scalars'][field] = f"{prefix}_sf_{field}.npy"
+                    os.replace(field_path, cache['scalars'][field])
+            elif name != 'points':
+                cache[name] = f"{prefix}_{name}.npy"
+                os.replace(path, cache[name])
+        cache['points'] = prefix + '_points.npy'
+        os.replace(parsing['points'], cache['points'])
+        cache = fit_cache_to_budget(cache, max_bytes, load_info)
+        return read_cloud_cache(cache), cache
+
+    # Binary files too large for the budget are cached straight from disk, never loaded whole
+    header = read_cloud_header(file_path, file_ext) if file_ext in ['.ply', '.pcd'] else None
+    if header is not None and max_bytes is not None:
+        fields = header['fields']
+        bytes_per_point = 24 * (1 + ('red' in fields or 'rgb' in fields) + ('nx' in fields or 'normal_x' in fields))
+        if header['count'] * bytes_per_point > max_bytes:
+            if header['dtype'] is None:
+                raise MemoryBudgetError(
+                    f"{os.path.basename(file_path)} has {header['count']:,} points, more than the memory budget "
+                    f"allows, and only binary files can be loaded reduced"
+                )
+            os.makedirs(cache_dir, exist_ok=True)
+            cache = cache_binary_cloud(file_path, header, prefix)
+            cache = fit_cache_to_budget(cache, max_bytes, load_info)
+            return read_cloud_cache(cache), cache
+    
+    cloud = read_point_cloud_file(file_path, file_ext)
+    if len(cloud.points) == 0:
+        return cloud, None
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache = write_cloud_cache(cloud, prefix)
+    except OSError as e:
+        if load_info is not None:
+            load_info['cache_error'] = f"could not cache it ({e})"
+        return cloud, None
+    
+    if max_bytes is not None and geometry_bytes(cloud) > max_bytes:
+        # Reload the reduced cloud from the cache just written
+        del cloud
+        cache = fit_cache_to_budget(cache, max_bytes, load_info)
+        return read_cloud_cache(cache), cache
+    return cloud, cache
+
+
+SESSION_VERSION = 1
+
+
+def _write_npy_member(archive, name, source, dtype, chunk_size=1000000):
+    """Stream an array into a zip member as a .npy file, one chunk at a time"""
+    shape = (len(source),) + tuple(np.shape(source)[1:])
+    with archive.open(name, mode='w', force_zip64=True) as member:
+        np.lib.format.write_array_header_2_0(member, {
+            'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            'fortran_order': False,
+            'shape': shape,
+        })
+        for start in range(0, len(source), chunk_size):
+            member.write(np.ascontiguousarray(source[start:start + chunk_size], dtype=dtype).tobytes())
+
+
+def save_session_bundle(path, arrays, state):
+    """Write a session as one uncompressed zip of .npy arrays plus session.json.
+
+    arrays maps member names to (source, dtype). Members are stored, not
+    compressed, so opening the session can memory-map them in place. The
+    file is also readable with np.load.
+    """
+    tmp_path = path + '.partial'
+    try:
+        with zipfile.ZipFile(tmp_path, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            archive.writestr('session.json', json.dumps(dict(state, version=SESSION_VERSION, arrays=sorted(arrays))))
+            for name, (source, dtype) in arrays.items():
+                _write_npy_member(archive, name, source, dtype)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def open_bundle_array(path, member):
+    """Memory-map a stored .npy member of a session bundle"""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(member)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"{member} in {os.path.basename(path)} is compressed and cannot be mapped")
+    
+    with open(path, 'rb') as f:
+        # The member data follows its local header, whose name and extra fields vary in length
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C')
+
+
+def read_session_bundle(path):
+    """Read a session's state and a cache entry that maps its arrays from the bundle"""
+    with zipfile.ZipFile(path) as archive:
+        state = json.loads(archive.read('session.json'))
+    if state.get('version', 0) > SESSION_VERSION:
+        raise ValueError(f"{os.path.basename(path)} was saved by a newer version")
+    
+    cache = {}
+    for member in state['arrays']:
+        name = member[:-len('.npy')]
+        if name.startswith('sf_'):
+            cache.setdefault('scalars', {})[name[len('sf_'):]] = f"{path}::{member}"
+        else:
+            cache[name] = f"{path}::{member}"
+    return state, cache
+
+
+def save_worker_snapshot(path, snapshot):
+    """Atomically write the worker's scene snapshot as JSON"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def load_worker_snapshot(path):
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def camera_to_dict(view_control):
+    """Current pinhole camera parameters as plain lists"""
+    params = view_control.convert_to_pinhole_camera_parameters()
+    return {
+        'width': params.intrinsic.width,
+        'height': params.intrinsic.height,
+        'intrinsic': np.asarray(params.intrinsic.intrinsic_matrix).tolist(),
+        'extrinsic': np.asarray(params.extrinsic).tolist()
+    }
+
+
+def camera_from_dict(view_control, camera):
+    """Apply pinhole camera parameters saved by camera_to_dict"""
+    params = o3d.camera.PinholeCameraParameters()
+    params.intrinsic = o3d.camera.PinholeCameraIntrinsic(
+        camera['width'], camera['height'], np.array(camera['intrinsic'])
+    )
+    params.extrinsic = np.array(camera['extrinsic'])
+    view_control.convert_from_pinhole_camera_parameters(params, allow_arbitrary=True)
+
+
+def _quaternion_from_matrix(rotation):
+    """Unit quaternion (w, x, y, z) from a 3x3 rotation matrix"""
+    m = rotation
+    trace = m[0, 0] + m[1, 1] + m[2, 2]
+    if trace > 0:
+        s = 2.0 * np.sqrt(trace + 1.0)
+        q = [0.25 * s, (m[2, 1] - m[1, 2]) / s, (m[0, 2] - m[2, 0]) / s, (m[1, 0] - m[0, 1]) / s]
+    elif m[0, 0] > m[1, 1] and m[0, 0] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[0, 0] - m[1, 1] - m[2, 2])
+        q = [(m[2, 1] - m[1, 2]) / s, 0.25 * s, (m[0, 1] + m[1, 0]) / s, (m[0, 2] + m[2, 0]) / s]
+    elif m[1, 1] > m[2, 2]:
+        s = 2.0 * np.sqrt(1.0 + m[1, 1] - m[0, 0] - m[2, 2])
+        q = [(m[0, 2] - m[2, 0]) / s, (m[0, 1] + m[1, 0]) / s, 0.25 * s, (m[1, 2] + m[2, 1]) / s]
+    else:
+        s = 2.0 * np.sqrt(1.0 + m[2, 2] - m[0, 0] - m[1, 1])
+        q = [(m[1, 0] - m[0, 1]) / s, (m[0, 2] + m[2, 0]) / s, (m[1, 2] + m[2, 1]) / s, 0.25 * s]
+    q = np.array(q)
+    return q / np.linalg.norm(q)
+
+
+def _matrix_from_quaternion(q):
+    w, x, y, z = q
+    return np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]
+    ])
+
+
+def _slerp(q0, q1, t):
+    dot = np.dot(q0, q1)
+    if dot < 0:
+        q1 = -q1
+        dot = -dot
+    if dot > 0.9995:
+        q = q0 + t * (q1 - q0)
+        return q / np.linalg.norm(q)
+    theta = np.arccos(dot)
+    return (np.sin((1 - t) * theta) * q0 + np.sin(t * theta) * q1) / np.sin(theta)
+
+
+def _camera_with_pose(camera, rotation, center):
+    """Copy of a camera dict with a new camera-to-world rotation and centre"""
+    pose = np.identity(4)
+    pose[:3, :3] = rotation
+    pose[:3, 3] = center
+    result = dict(camera)
+    result['extrinsic'] = np.linalg.inv(pose).tolist()
+    return result
+
+
+def scale_camera(camera, width, height):
+    """Rescale a camera dict's intrinsics to a new image size, keeping the field of view"""
+    intrinsic = np.array(camera['intrinsic'], dtype=np.float64)
+    sx = width / camera['width']
+    sy = height / camera['height']
+    intrinsic[0, 0] *= sx
+    intrinsic[1, 1] *= sy
+    intrinsic[0, 2] = (intrinsic[0, 2] + 0.5) * sx - 0.5
+    intrinsic[1, 2] = (intrinsic[1, 2] + 0.5) * sy - 0.5
+    result = dict(camera)
+    result.update({'width': width, 'height': height, 'intrinsic': intrinsic.tolist()})
+    return result
+
+
+def interpolate_camera_path(keyframes, num_frames):
+    """Smooth camera path through keyframe camera dicts.
+
+    Orientations are slerped, camera centres follow a Catmull-Rom spline and
+    intrinsics are blended linearly between neighbouring keyframes.
+    """
+    poses = [np.linalg.inv(np.array(k['extrinsic'])) for k in keyframes]
+    quaternions = [_quaternion_from_matrix(pose[:3, :3]) for pose in poses]
+    centers = [pose[:3, 3] for pose in poses]
+    segments = len(keyframes) - 1
+
+    path = []
+    for frame in range(num_frames):
+        u = frame / max(num_frames - 1, 1) * segments
+        i = min(int(u), segments - 1)
+        t = u - i
+
+        # Catmull-Rom through the neighbouring centres, clamped at the ends
+        p0 = centers[max(i - 1, 0)]
+        p1 = centers[i]
+        p2 = centers[i + 1]
+        p3 = centers[min(i + 2, segments)]
+        center = 0.5 * ((2 * p1) + (-p0 + p2) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t * t
+                        + (-p0 + 3 * p1 - 3 * p2 + p3) * t * t * t)
+
+        rotation = _matrix_from_quaternion(_slerp(quaternions[i], quaternions[i + 1], t))
+        camera = _camera_with_pose(keyframes[i], rotation, center)
+        camera['intrinsic'] = ((1 - t) * np.array(keyframes[i]['intrinsic'])
+                               + t * np.array(keyframes[i + 1]['intrinsic'])).tolist()
+        path.append(camera)
+    return path
+
+
+def turntable_path(camera, center, num_frames, degrees=360.0):
+    """Orbit a camera dict around the view's up axis through center"""
+    pose = np.linalg.inv(np.array(camera['extrinsic']))
+    # Camera y points down in Open3D's pinhole convention
+    up = -pose[:3, 1]
+    up = up / np.linalg.norm(up)
+    center = np.asarray(center, dtype=np.float64)
+
+    path = []
+    for frame in range(num_frames):
+        angle = np.radians(degrees) * frame / num_frames
+        # Rodrigues rotation about the up axis
+        k = np.array([[0, -up[2], up[1]], [up[2], 0, -up[0]], [-up[1], up[0], 0]])
+        orbit = np.identity(3) + np.sin(angle) * k + (1 - np.cos(angle)) * (k @ k)
+        path.append(_camera_with_pose(camera, orbit @ pose[:3, :3], orbit @ (pose[:3, 3] - center) + center))
+    return path
+
+
+class FrameSink:
+    """Bounded pipeline that streams rendered frames to a video encoder or image sequence.
+
+    Frames are handed to a writer thread through a small queue, so rendering
+    blocks only when the writer falls behind. Paths ending in .png produce a
+    numbered sequence (name_00000.png, ...); any other extension is encoded
+    with ffmpeg from raw RGB on its stdin.
+    """
+
+    def __init__(self, output_path, width, height, fps, max_pending=8):
+        self.output_path = output_path
+        self.frames = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.encoder = None
+        self.written = 0
+
+        base, ext = os.path.splitext(output_path)
+        if ext.lower() == '.png':
+            self.pattern = base + '_{:05d}.png'
+        else:
+            ffmpeg = shutil.which('ffmpeg')
+            if ffmpeg is None:
+                raise RuntimeError("ffmpeg was not found; save as .png to write an image sequence")
+            self.pattern = None
+            self.encoder = subprocess.Popen(
+                [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                 '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', output_path],
+                stdin=subprocess.PIPE
+            )
+
+        self.thread = threading.Thread(target=self._write_frames, daemon=True)
+        self.thread.start()
+
+    def write(self, pixels):
+        if self.error is not None:
+            raise self.error
+        self.frames.put(pixels)
+
+    def _write_frames(self):
+        while True:
+            pixels = self.frames.get()
+            if pixels is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                if self.encoder is not None:
+                    self.encoder.stdin.write(np.ascontiguousarray(pixels).tobytes())
+                else:
+                    Image.fromarray(pixels).save(self.pattern.format(self.written), compress_level=1)
+                self.written += 1
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        self.frames.put(None)
+        self.thread.join()
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+            self.encoder.wait()
+        if self.error is not None:
+            raise self.error
+
+
+def list_sequence_frames(directory):
+    """Point cloud frames in a directory, in natural numeric order"""
+    def natural_key(name):
+        return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+    names = [name for name in os.listdir(directory) if os.path.splitext(name)[1].lower() in ('.pcd', '.ply')]
+    return [os.path.join(directory, name) for name in sorted(names, key=natural_key)]
+
+
+def _read_sequence_frame(path):
+    """Parse one sequence frame into plain arrays (runs in a prefetch process)"""
+    cloud = load_open3d().io.read_point_cloud(path)
+    points = np.asarray(cloud.points)
+    colors = np.asarray(cloud.colors) if cloud.has_colors() else None
+    return points, colors
+
+
+class SequencePrefetcher:
+    """Parse upcoming sequence frames ahead of playback into a bounded ring buffer.
+
+    Frames are parsed by a pool of background processes. ``request(index)``
+    keeps the next ``depth`` frames from index (wrapping at the end) queued or
+    buffered and evicts everything else, so memory is bounded by ``depth``
+    frames regardless of sequence length.
+    """
+
+    def __init__(self, paths, depth=8, processes=None):
+        self.paths = paths
+        self.depth = min(depth, len(paths))
+        self.pool = worker_pool(processes)
+        self.buffer = collections.OrderedDict()
+
+    def request(self, index):
+        wanted = [(index + offset) % len(self.paths) for offset in range(self.depth)]
+        for buffered in list(self.buffer):
+            if buffered not in wanted:
+                del self.buffer[buffered]
+        for frame in wanted:
+            if frame not in self.buffer:
+                self.buffer[frame] = self.pool.apply_async(_read_sequence_frame, (self.paths[frame],))
+
+    def get(self, index):
+        """Parsed (points, colors) for a frame, or None if it is not ready yet"""
+        result = self.buffer.get(index)
+        if result is None or not result.ready():
+            return None
+        return result.get()
+
+    def ready_count(self):
+        return sum(1 for result in self.buffer.values() if result.ready())
+
+    def nbytes(self):
+        """Bytes held by parsed frames waiting in the buffer"""
+        total = 0
+        for result in self.buffer.values():
+            if result.ready() and result.successful():
+                total += sum(array.nbytes for array in result.get() if array is not None)
+        return total
+
+    def shrink(self, depth):
+        """Keep fewer frames ahead; the next request() evicts the rest"""
+        self.depth = max(1, min(depth, self.depth))
+
+    def close(self):
+        self.pool.terminate()
+
+
+# Binary point packet: magic, sequence number, point count, flags; followed by
+# count float32 xyz triples and, when flags has POINT_PACKET_COLORS, count uint8 rgb triples
+POINT_PACKET_HEADER = struct.Struct('<4sIII')
+POINT_PACKET_MAGIC = b'PTS1'
+POINT_PACKET_COLORS = 1
+
+
+def encode_point_packet(sequence, points, colors=None):
+    """Build a point packet, e.g. for a replay process feeding the viewer"""
+    points = np.ascontiguousarray(points, dtype=np.float32)
+    flags = 0
+    payload = points.tobytes()
+    if colors is not None:
+        flags |= POINT_PACKET_COLORS
+        payload += np.ascontiguousarray(colors, dtype=np.uint8).tobytes()
+    return POINT_PACKET_HEADER.pack(POINT_PACKET_MAGIC, sequence, len(points), flags) + payload
+
+
+def point_packet_size(count, flags):
+    return count * 12 + (count * 3 if flags & POINT_PACKET_COLORS else 0)
+
+
+def decode_point_packet_payload(payload, count, flags):
+    points = np.frombuffer(payload, dtype=np.float32, count=count * 3).reshape(count, 3)
+    colors = None
+    if flags & POINT_PACKET_COLORS:
+        colors = np.frombuffer(payload, dtype=np.uint8, count=count * 3, offset=count * 12).reshape(count, 3)
+    return points, colors
+
+
+class RollingPointBuffer:
+    """Preallocated ring of the most recent streamed points.
+
+    Holds at most ``capacity`` points; with a ``window`` in seconds, points
+    older than the window are also excluded from snapshots. Appends come from
+    the receiver thread and snapshots from the render loop, so both take the lock.
+    """
+
+    def __init__(self, capacity, window=None):
+        self.capacity = capacity
+        self.window = window
+        self.points = np.zeros((capacity, 3), dtype=np.float32)
+        self.colors = np.zeros((capacity, 3), dtype=np.uint8)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.nbytes = self.points.nbytes + self.colors.nbytes + self.times.nbytes
+        self.write_index = 0
+        self.count = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def append(self, points, colors=None):
+        now = time.perf_counter()
+        with self.lock:
+            # Only the newest capacity points of an oversized packet can be kept
+            if len(points) > self.capacity:
+                points = points[-self.capacity:]
+                colors = colors[-self.capacity:] if colors is not None else None
+            n = len(points)
+            first = min(n, self.capacity - self.write_index)
+            for target, source in ((slice(self.write_index, self.write_index + first), slice(0, first)),
+                                   (slice(0, n - first), slice(first, n))):
+                self.points[target] = points[source]
+                self.colors[target] = colors[source] if colors is not None else 200
+                self.times[target] = now
+            self.write_index = (self.write_index + n) % self.capacity
+            self.count = min(self.count + n, self.capacity)
+            self.version += 1
+
+    def snapshot(self):
+        """Copies of the live points (float64) and colours (0-1 float64)"""
+        with self.lock:
+            if self.count < self.capacity:
+                valid = slice(0, self.count)
+                points, colors, times = self.points[valid], self.colors[valid], self.times[valid]
+            else:
+                points, colors, times = self.points, self.colors, self.times
+            if self.window is not None:
+                recent = times >= time.perf_counter() - self.window
+                points, colors = points[recent], colors[recent]
+            return points.astype(np.float64), colors.astype(np.float64) / 255.0
+
+
+class PointStreamReceiver:
+    """Background listener feeding point packets from a local socket into a RollingPointBuffer.
+
+    ``protocol`` is 'udp' (one packet per datagram), 'tcp' or 'unix' (framed
+    packets on a stream, one client at a time). ``address`` is 'host:port' or
+    a socket path for 'unix'.
+    """
+
+    def __init__(self, protocol, address, buffer):
+        self.protocol = protocol
+        self.address = address
+        self.buffer = buffer
+        self.running = True
+        self.packets = 0
+        self.points_received = 0
+        self.dropped_packets = 0
+        self.last_sequence = None
+        self.error = None
+
+        if protocol == 'unix':
+            if os.path.exists(address):
+                os.remove(address)
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(address)
+        else:
+            host, port = address.rsplit(':', 1)
+            kind = socket.SOCK_DGRAM if protocol == 'udp' else socket.SOCK_STREAM
+            self.sock = socket.socket(socket.AF_INET, kind)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if protocol == 'udp':
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
+            self.sock.bind((host, int(port)))
+        if protocol != 'udp':
+            self.sock.listen(1)
+        self.sock.settimeout(0.5)
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _accept_packet(self, sequence, count, flags, payload):
+        # Gaps in the sequence numbers are packets lost before they reached us
+        if self.last_sequence is not None and sequence > self.last_sequence + 1:
+            self.dropped_packets += sequence - self.last_sequence - 1
+        self.last_sequence = sequence
+        points, colors = decode_point_packet_payload(payload, count, flags)
+        self.buffer.append(points, colors)
+        self.packets += 1
+        self.points_received += count
+
+    def _run(self):
+        try:
+            if self.protocol == 'udp':
+                self._receive_datagrams()
+            else:
+                self._receive_streams()
+        except Exception as e:
+            if self.running:
+                self.error = e
+
+    def _receive_datagrams(self):
+        while self.running:
+            try:
+                data = self.sock.recv(65536)
+            except socket.timeout:
+                continue
+            if len(data) < POINT_PACKET_HEADER.size:
+                self.dropped_packets += 1
+                continue
+            magic, sequence, count, flags = POINT_PACKET_HEADER.unpack_from(data)
+            payload = memoryview(data)[POINT_PACKET_HEADER.size:]
+            if magic != POINT_PACKET_MAGIC or len(payload) < point_packet_size(count, flags):
+                self.dropped_packets += 1
+                continue
+            self._accept_packet(sequence, count, flags, payload)
+
+    def _receive_streams(self):
+        while self.running:
+            try:
+                connection, _ = self.sock.accept()
+            except socket.timeout:
+                continue
+            connection.settimeout(0.5)
+            self.last_sequence = None
+            with connection:
+                while self.running:
+                    header = self._read_exact(connection, POINT_PACKET_HEADER.size)
+                    if header is None:
+                        break
+                    magic, sequence, count, flags = POINT_PACKET_HEADER.unpack(header)
+                    if magic != POINT_PACKET_MAGIC:
+                        # Framing is lost; drop the client and wait for a new one
+                        self.dropped_packets += 1
+                        break
+                    payload = self._read_exact(connection, point_packet_size(count, flags))
+                    if payload is None:
+                        break
+                    self._accept_packet(sequence, count, flags, payload)
+
+    def _read_exact(self, connection, size):
+        data = bytearray(size)
+        view = memoryview(data)
+        received = 0
+        while received < size:
+            try:
+                n = connection.recv_into(view[received:])
+            except socket.timeout:
+                if not self.running:
+                    return None
+                continue
+            if n == 0:
+                return None
+            received += n
+        return data
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=2.0)
+        self.sock.close()
+        if self.protocol == 'unix' and os.path.exists(self.address):
+            os.remove(self.address)
+
+
+def _export_chunks(count, indices, chunk_size):
+    """Yield (start, end, selector) for each chunk of the exported points"""
+    for start in range(0, count, chunk_size):
+        end = min(start + chunk_size, count)
+        yield start, end, (slice(start, end) if indices is None else indices[start:end])
+
+
+def _colors_to_bytes(colors):
+    return np.clip(np.rint(np.asarray(colors) * 255.0), 0, 255).astype(np.uint8)
+
+
+def _write_ply_export(f, count, chunks, points, colors, normals, scalar_fields):
+    header = ["ply", "format binary_little_endian 1.0", f"element vertex {count}",
+              "property double x", "property double y", "property double z"]
+    dtype = [('xyz', '<f8', 3)]
+    if normals is not None:
+        header += ["property float nx", "property float ny", "property float nz"]
+        dtype.append(('normal', '<f4', 3))
+    if colors is not None:
+        header += ["property uchar red", "property uchar green", "property uchar blue"]
+        dtype.append(('rgb', 'u1', 3))
+    for name in scalar_fields:
+        header.append(f"property float {name}")
+        dtype.append((name, '<f4'))
+    header.append("end_header")
+    f.write(("\n".join(header) + "\n").encode('ascii'))
+    
+    for start, end, selector in chunks:
+        record = np.empty(end - start, dtype=dtype)
+        record['xyz'] = points[selector]
+        if normals is not None:
+            record['normal'] = normals[selector]
+        if colors is not None:
+            record['rgb'] = _colors_to_bytes(colors[selector])
+        for name, values in scalar_fields.items():
+            record[name] = values[selector]
+        f.write(record.tobytes())
+        yield end
+
+
+def _write_pcd_export(f, count, chunks, points, colors, normals, scalar_fields):
+    fields, sizes, types = ["x", "y", "z"], ["8", "8", "8"], ["F", "F", "F"]
+    dtype = [('x', '<f8'), ('y', '<f8'), ('z', '<f8')]
+    if colors is not None:
+        # PCL packs RGB into the bits of one 4 byte field
+        fields.append("rgb"), sizes.append("4"), types.append("U")
+        dtype.append(('rgb', '<u4'))
+    if normals is not None:
+        fields += ["normal_x", "normal_y", "normal_z"]
+        sizes += ["4"] * 3
+        types += ["F"] * 3
+        dtype += [('normal_x', '<f4'), ('normal_y', '<f4'), ('normal_z', '<f4')]
+    for name in scalar_fields:
+        fields.append(name), sizes.append("4"), types.append("F")
+        dtype.append((name, '<f4'))
+    header = ["# .PCD v0.7 - Point Cloud Data file format", "VERSION 0.7",
+              "FIELDS " + " ".join(fields), "SIZE " + " ".join(sizes), "TYPE " + " ".join(types),
+              "COUNT " + " ".join(["1"] * len(fields)), f"WIDTH {count}", "HEIGHT 1",
+              "VIEWPOINT 0 0 0 1 0 0 0", f"POINTS {count}", "DATA binary"]
+    f.write(("\n".join(header) + "\n").encode('ascii'))
+    
+    for start, end, selector in chunks:
+        record = np.empty(end - start, dtype=dtype)
+        xyz = points[selector]
+        record['x'], record['y'], record['z'] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+        if colors is not None:
+            rgb = _colors_to_bytes(colors[selector]).astype(np.uint32)
+            record['rgb'] = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        if normals is not None:
+            n = normals[selector]
+            record['normal_x'], record['normal_y'], record['normal_z'] = n[:, 0], n[:, 1], n[:, 2]
+        for name, values in scalar_fields.items():
+            record[name] = values[selector]
+        f.write(record.tobytes())
+        yield end
+
+
+def _write_npz_export(f, count, chunks, points, colors, normals, scalar_fields):
+    # Each array is streamed into its own compressed member as a regular .npy file
+    arrays = {'points': (points, np.float64, (3,), None)}
+    if colors is not None:
+        arrays['colors'] = (colors, np.uint8, (3,), _colors_to_bytes)
+    if normals is not None:
+        arrays['normals'] = (normals, np.float32, (3,), None)
+    for name, values in scalar_fields.items():
+        arrays[name] = (values, np.float32, (), None)
+    
+    chunks = list(chunks)
+    done = 0
+    with zipfile.ZipFile(f, mode='w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+        for name, (source, dtype, shape, convert) in arrays.items():
+            with archive.open(name + '.npy', mode='w', force_zip64=True) as member:
+                np.lib.format.write_array_header_2_0(member, {
+                    'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                    'fortran_order': False,
+                    'shape': (count,) + shape,
+                })
+                for start, end, selector in chunks:
+                    values = source[selector]
+                    values = convert(values) if convert is not None else values
+                    member.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+                    done += end - start
+                    yield done // len(arrays)
+
+
+EXPORT_WRITERS = {
+    '.ply': _write_ply_export,
+    '.pcd': _write_pcd_export,
+    '.npz': _write_npz_export,
+}
+
+
+def read_index_set(path):
+    """Load point indices from a .npy file or a whitespace-separated text file"""
+    if path.lower().endswith('.npy'):
+        return np.load(path).astype(np.int64).ravel()
+    return np.loadtxt(path, dtype=np.int64, ndmin=1)
+
+
+def export_point_cloud(path, points, colors=None, normals=None, scalar_fields=None, indices=None,
+                       chunk_size=1000000, progress_callback=None, cancel=None):
+    """Stream a cloud to binary PLY, PCD or a compressed .npz archive.
+
+    Points are gathered and written one chunk at a time, so exporting never
+    builds a second full copy of the cloud. When indices is given only those
+    points are written. Setting the cancel event stops the export between
+    chunks with a ValueError, leaving no partial file. Returns the number of
+    points written.
+    """
+    writer = EXPORT_WRITERS.get(os.path.splitext(path)[1].lower())
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {os.path.splitext(path)[1]}")
+    
+    if indices is not None:
+        indices = np.unique(np.asarray(indices, dtype=np.int64))
+        if len(indices) and (indices[0] < 0 or indices[-1] >= len(points)):
+            raise ValueError("Selection indices are out of range")
+    count = len(points) if indices is None else len(indices)
+    scalar_fields = {name: values for name, values in (scalar_fields or {}).items() if len(values) == len(points)}
+    
+    # Write next to the destination and move into place once complete
+    tmp_path = path + '.partial'
+    try:
+        with open(tmp_path, 'wb') as f:
+            chunks = _export_chunks(count, indices, chunk_size)
+            for done in writer(f, count, chunks, points, colors, normals, scalar_fields):
+                if cancel is not None and cancel.is_set():
+                    raise ValueError("Export cancelled")
+                if progress_callback is not None:
+                    progress_callback(done / max(count, 1))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def _distance_pool_init(reference_path):
+    """Build the reference index in a pool process"""
+    global _distance_index
+    load_open3d()
+    reference = open_cache_array(reference_path)
+    _distance_index = o3d.core.nns.NearestNeighborSearch(
+        o3d.core.Tensor(np.ascontiguousarray(reference, dtype=np.float64))
+    )
+    _distance_index.knn_index()
+
+
+def _distance_chunk(reference_path, offsets, edges, axis, target_path, order_path, output_path, bucket, start, end):
+    """Write nearest-neighbour distances for target rows [start, end) of one bucket into the output map.
+
+    Both files are bucketed along axis at edges and offsets gives where each
+    reference bucket starts. Only the reference buckets around the target
+    bucket are indexed. A reference point outside those buckets is further
+    along axis than the nearest tile edge, so a match closer than that edge
+    is exact; the rest are searched again over a tile twice as wide.
+    """
+    load_open3d()
+    reference = np.load(reference_path, mmap_mode='r')
+    target = np.load(target_path, mmap_mode='r')
+    order = np.load(order_path, mmap_mode='r')
+    output = np.load(output_path, mmap_mode='r+')
+
+    queries = np.asarray(target[start:end], dtype=np.float64)
+    distances = np.empty(len(queries), dtype=np.float64)
+    remaining = np.arange(len(queries))
+    low = high = bucket
+    last = len(edges)
+
+    while len(remaining):
+        if offsets[high + 1] > offsets[low]:
+            index = o3d.core.nns.NearestNeighborSearch(
+                o3d.core.Tensor(np.asarray(reference[offsets[low]:offsets[high + 1]], dtype=np.float64))
+            )
+            index.knn_index()
+            _, squared = index.knn_search(o3d.core.Tensor(np.ascontiguousarray(queries[remaining])), 1)
+            found = np.sqrt(squared.numpy()[:, 0])
+            x = queries[remaining, axis]
+            margin = np.full(len(remaining), np.inf)
+            if low > 0:
+                margin = np.minimum(margin, x - edges[low - 1])
+            if high < last:
+                margin = np.minimum(margin, edges[high] - x)
+            exact = found <= margin
+            distances[remaining[exact]] = found[exact]
+            remaining = remaining[~exact]
+            del index
+        width = high - low + 1
+        low, high = max(0, low - width), min(last, high + width)
+
+    output[order[start:end]] = distances.astype(np.float32)
+    output.flush()
+
+    return end - start
+
+
+def _bucket_by_axis(points, edges, axis, origin, points_path, order_path=None, chunk_size=1000000,
+                    progress=(0.0, 1.0, "")):
+    """Counting-sort points into the buckets between edges along axis, chunk by chunk.
+
+    A generator yielding ('progress', fraction, message) scaled into the
+    (start, span, message) of progress; its return value is the row offset
+    of each bucket in the written file. Points are stored as float32
+    relative to origin, and with order_path the source row of each stored
+    point is written too.
+    """
+    first, span, message = progress
+    num_points = len(points)
+    buckets = len(edges) + 1
+    counts = np.zeros(buckets, dtype=np.int64)
+    for start in range(0, num_points, chunk_size):
+        chunk = np.asarray(points[start:start + chunk_size], dtype=np.float64)
+        counts += np.bincount(np.searchsorted(edges, chunk[:, axis] - origin[axis], side='right'), minlength=buckets)
+        yield ('progress', first + span * 0.5 * min(start + chunk_size, num_points) / num_points, message)
+
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    output = np.lib.format.open_memmap(points_path, mode='w+', dtype=np.float32, shape=(num_points, 3))
+    order = None
+    if order_path is not None:
+        order = np.lib.format.open_memmap(order_path, mode='w+', dtype=np.int64, shape=(num_points,))
+    cursor = offsets[:-1].copy()
+    for start in range(0, num_points, chunk_size):
+        chunk = np.asarray(points[start:start + chunk_size], dtype=np.float64) - origin
+        ids = np.searchsorted(edges, chunk[:, axis], side='right')
+        sort = np.argsort(ids, kind='stable')
+        ids = ids[sort]
+        chunk_counts = np.bincount(ids, minlength=buckets)
+        # Rank within the bucket, added to where the bucket's next free row is
+        rank = np.arange(len(ids)) - (np.cumsum(chunk_counts) - chunk_counts)[ids]
+        rows = cursor[ids] + rank
+        output[rows] = chunk[sort]
+        if order is not None:
+            order[rows] = start + sort
+        cursor += chunk_counts
+        yield ('progress', first + span * (0.5 + 0.5 * min(start + chunk_size, num_points) / num_points), message)
+    output.flush()
+    del output
+    if order is not None:
+        order.flush()
+        del order
+    return offsets
+
+
+def compare_cloud_distances(reference_points, target_points, work_dir, pool, processes,
+                            chunk_size=1000000, sample_size=100000, seed=0):
+    """Nearest-neighbour distance from every target point to the reference cloud.
+
+    A generator like segment_planes: it yields ('progress', fraction, message)
+    while working and finally ('distances', path) with a float32 .npy file of
+    one distance per target point. Both inputs may be memory-mapped; they are
+    read in chunks and bucketed along their longest shared axis into files,
+    so neither cloud is ever held whole. Each pool task indexes only the
+    reference buckets around one run of target points.
+    """
+    reference_path = os.path.join(work_dir, 'compare_reference.npy')
+    target_path = os.path.join(work_dir, 'compare_target.npy')
+    order_path = os.path.join(work_dir, 'compare_order.npy')
+    output_path = os.path.join(work_dir, 'compare_distances.npy')
+
+    try:
+        # Shared bounds; coordinates are stored relative to their centre so float32 keeps precision
+        low = np.full(3, np.inf)
+        high = np.full(3, -np.inf)
+        for points in (reference_points, target_points):
+            for start in range(0, len(points), chunk_size):
+                chunk = np.asarray(points[start:start + chunk_size], dtype=np.float64)
+                low = np.minimum(low, chunk.min(axis=0))
+                high = np.maximum(high, chunk.max(axis=0))
+            yield ('progress', 0.0, "Measuring clouds")
+        origin = (low + high) / 2
+        axis = int(np.argmax(high - low))
+
+        # Bucket edges at quantiles of a reference sample, so buckets hold similar point counts
+        rng = np.random.default_rng(seed)
+        sample = np.sort(rng.choice(len(reference_points), min(sample_size, len(reference_points)), replace=False))
+        values = np.asarray(reference_points[sample], dtype=np.float64)[:, axis] - origin[axis]
+        buckets = max(processes * 4, 2 * -(-len(reference_points) // chunk_size))
+        edges = np.unique(np.quantile(values, np.linspace(0.0, 1.0, buckets + 1)[1:-1]))
+
+        reference_offsets = yield from _bucket_by_axis(
+            reference_points, edges, axis, origin, reference_path,
+            chunk_size=chunk_size, progress=(0.0, 0.2, "Sorting reference")
+        )
+        target_offsets = yield from _bucket_by_axis(
+            target_points, edges, axis, origin, target_path, order_path,
+            chunk_size=chunk_size, progress=(0.2, 0.2, "Sorting target")
+        )
+
+        num_points = len(target_points)
+        output = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32, shape=(num_points,))
+        del output
+
+        pending = []
+        for bucket in range(len(edges) + 1):
+            for start in range(target_offsets[bucket], target_offsets[bucket + 1], chunk_size):
+                end = min(start + chunk_size, target_offsets[bucket + 1])
+                pending.append(pool.apply_async(_distance_chunk, (
+                    reference_path, reference_offsets, edges, axis, target_path, order_path, output_path,
+                    bucket, start, end
+                )))
+        done = 0
+        for result in pending:
+            while not result.ready():
+                yield ('progress', 0.4 + 0.6 * done / max(num_points, 1),
+                       f"Computing distances: {done / max(num_points, 1) * 100:.0f}%")
+            done += result.get()
+        yield ('distances', output_path)
+    finally:
+        for path in (reference_path, target_path, order_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def apply_colormap(values, vmin, vmax):
+    """Map scalar values to RGB colours with a blue-green-yellow-red ramp"""
+    stops = np.array([0.0, 0.25, 0.5, 0.75, 1.0])
+    red = np.array([0.0, 0.0, 0.0, 1.0, 1.0])
+    green = np.array([0.0, 0.6, 0.9, 0.9, 0.0])
+    blue = np.array([0.8, 1.0, 0.2, 0.0, 0.0])
+
+    scale = max(vmax - vmin, 1e-12)
+    t = np.clip((np.asarray(values, dtype=np.float32) - vmin) / scale, 0.0, 1.0)
+
+    colors = np.empty((len(t), 3), dtype=np.float64)
+    colors[:, 0] = np.interp(t, stops, red)
+    colors[:, 1] = np.interp(t, stops, green)
+    colors[:, 2] = np.interp(t, stops, blue)
+    return colors
+
+
+def summarize_distances(distances, bins=50):
+    """Summary statistics and histogram for a distance array"""
+    distances = np.asarray(distances)
+    upper = float(np.percentile(distances, 99)) if len(distances) else 0.0
+
+    counts, edges = np.histogram(distances, bins=bins, range=(0.0, max(upper, 1e-12)))
+    stats = {
+        'count': int(len(distances)),
+        'mean': float(np.mean(distances)),
+        'std': float(np.std(distances)),
+        'rms': float(np.sqrt(np.mean(np.square(distances, dtype=np.float64)))),
+        'median': float(np.median(distances)),
+        'p95': float(np.percentile(distances, 95)),
+        'max': float(np.max(distances)),
+    }
+    return stats, counts.tolist(), edges.tolist()
+
+
+def _spacing_chunk(points_path, selector):
+    """Distance from each selected point to its nearest other point in the pool's index"""
+    queries = open_cache_array(points_path)[selector]
+    _, squared = _distance_index.knn_search(o3d.core.Tensor(np.ascontiguousarray(queries, dtype=np.float64)), 2)
+    return np.sqrt(squared.numpy()[:, 1])
+
+
+def _outlier_indices(points_path, neighbors, std_ratio):
+    """Indices of statistical outliers among the points in a file (runs in a pool process)"""
+    load_open3d()
+    cloud = o3d.geometry.PointCloud()
+    cloud.points = o3d.utility.Vector3dVector(np.asarray(open_cache_array(points_path), dtype=np.float64))
+    _, inliers = cloud.remove_statistical_outlier(nb_neighbors=neighbors, std_ratio=std_ratio)
+    outliers = np.ones(len(cloud.points), dtype=bool)
+    outliers[np.asarray(inliers, dtype=np.int64)] = False
+    return np.flatnonzero(outliers)
+
+
+class CloudStatistics:
+    """Statistics of a point array estimated on a growing uniform random sample.
+
+    ``step`` draws another batch of points and updates running sums, so the
+    estimates and their 95% confidence intervals tighten as the sample grows.
+    ``refine`` is a generator doing an exact chunked pass over every point.
+    Nearest-neighbour spacing comes from ``add_spacing``, fed by queries
+    against a full index built elsewhere.
+    """
+
+    Z = 1.96
+
+    def __init__(self, points, bins=32, max_sample=1000000, seed=0):
+        self.points = points
+        self.count = len(points)
+        self.bins = bins
+        self.max_sample = max_sample
+        self.rng = np.random.default_rng(seed)
+        self.indices = []
+        self.samples = []
+        self.n = 0
+        self.total = np.zeros(3)
+        self.total_sq = np.zeros(3)
+        self.low = np.full(3, np.inf)
+        self.high = np.full(3, -np.inf)
+        self.spacing = []
+        self.exact = False
+        self.exact_counts = None
+        self.exact_spacing = False
+
+    @property
+    def sampling(self):
+        return not self.exact and self.n < min(self.max_sample, self.count)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self.samples) + sum(a.nbytes for a in self.indices) + sum(a.nbytes for a in self.spacing)
+
+    def step(self, batch=50000):
+        """Grow the sample; returns the newly drawn points"""
+        batch = min(batch, self.max_sample - self.n)
+        indices = np.sort(self.rng.integers(0, self.count, batch))
+        points = np.asarray(self.points[indices], dtype=np.float64)
+        self.indices.append(indices)
+        self.samples.append(points)
+        self.n += len(points)
+        self.total += points.sum(axis=0)
+        self.total_sq += np.square(points).sum(axis=0)
+        self.low = np.minimum(self.low, points.min(axis=0))
+        self.high = np.maximum(self.high, points.max(axis=0))
+        return points
+
+    def add_spacing(self, distances, exact=False):
+        self.spacing.append(np.asarray(distances, dtype=np.float32))
+        self.exact_spacing = exact
+
+    def refine(self, chunk_size=1000000):
+        """Exact pass over every point, yielding the fraction done"""
+        total = np.zeros(3)
+        total_sq = np.zeros(3)
+        low = np.full(3, np.inf)
+        high = np.full(3, -np.inf)
+        for start in range(0, self.count, chunk_size):
+            chunk = np.asarray(self.points[start:start + chunk_size], dtype=np.float64)
+            total += chunk.sum(axis=0)
+            total_sq += np.square(chunk).sum(axis=0)
+            low = np.minimum(low, chunk.min(axis=0))
+            high = np.maximum(high, chunk.max(axis=0))
+            yield 0.5 * (start + len(chunk)) / self.count
+        
+        # Histograms need the final bounds, so they take a second pass
+        counts = np.zeros((3, self.bins), dtype=np.int64)
+        for start in range(0, self.count, chunk_size):
+            chunk = np.asarray(self.points[start:start + chunk_size], dtype=np.float64)
+            for axis in range(3):
+                counts[axis] += np.histogram(chunk[:, axis], self.bins, (low[axis], high[axis]))[0]
+            yield 0.5 + 0.5 * (start + len(chunk)) / self.count
+        
+        self.n = self.count
+        self.total, self.total_sq, self.low, self.high = total, total_sq, low, high
+        self.exact_counts = counts
+        self.exact = True
+
+    def subset(self, keep, points):
+        """Statistics for the points selected by a boolean mask, reusing the sample.
+
+        points holds the selected points, in order. Sampled points that
+        survive the mask are still a uniform sample of them, so the estimate
+        continues from those.
+        """
+        remaining = np.flatnonzero(keep)
+        stats = CloudStatistics(points, self.bins, self.max_sample)
+        if self.n:
+            indices = np.concatenate(self.indices)
+            kept = keep[indices]
+            # Positions of the surviving samples within the subset
+            stats.indices = [np.searchsorted(remaining, indices[kept])]
+            stats.samples = [np.concatenate(self.samples)[kept]]
+            stats.n = len(stats.indices[0])
+            if stats.n:
+                sample = stats.samples[0]
+                stats.total = sample.sum(axis=0)
+                stats.total_sq = np.square(sample).sum(axis=0)
+                stats.low = sample.min(axis=0)
+                stats.high = sample.max(axis=0)
+        return stats
+
+    def summary(self):
+        """Current estimates as plain values, with 95% confidence half-widths"""
+        if self.n == 0:
+            return {'points': self.count, 'sample': 0, 'exact': False}
+        mean = self.total / self.n
+        variance = np.maximum(self.total_sq / self.n - np.square(mean), 0.0)
+        centroid_ci = np.zeros(3) if self.exact else self.Z * np.sqrt(variance / self.n)
+        extent = self.high - self.low
+        
+        # Density over the bounding box, or its largest face for flat clouds
+        nonzero = np.sort(extent[extent > 0])[::-1]
+        measure = np.prod(nonzero[:3]) if len(nonzero) else 0.0
+        
+        if self.exact_counts is not None:
+            counts = self.exact_counts
+        else:
+            sample = np.concatenate(self.samples)
+            counts = np.array([np.histogram(sample[:, axis], self.bins, (self.low[axis], self.high[axis]))[0]
+                               for axis in range(3)]) * (self.count / self.n)
+        
+        summary = {
+            'points': self.count,
+            'sample': self.n,
+            'exact': self.exact,
+            'bounds': [self.low.tolist(), self.high.tolist()],
+            'extent': extent.tolist(),
+            'centroid': mean.tolist(),
+            'centroid_ci': centroid_ci.tolist(),
+            'std': np.sqrt(variance).tolist(),
+            'density': self.count / measure if measure > 0 else None,
+            'density_dims': len(nonzero[:3]),
+            'histograms': {'counts': np.asarray(counts).tolist(),
+                           'ranges': np.stack([self.low, self.high], axis=1).tolist()},
+            'spacing': None
+        }
+        if self.spacing:
+            spacing = np.concatenate(self.spacing)
+            summary['spacing'] = float(spacing.mean())
+            summary['spacing_ci'] = 0.0 if self.exact_spacing else float(self.Z * spacing.std() / np.sqrt(len(spacing)))
+            summary['spacing_samples'] = len(spacing)
+            summary['spacing_exact'] = self.exact_spacing
+        return summary
+
+
+def registration_voxel_sizes(source, target, levels=3):
+    """Voxel pyramid from coarse to fine, scaled to the scene extent"""
+    extent = max(source.get_axis_aligned_bounding_box().get_max_extent(),
+                 target.get_axis_aligned_bounding_box().get_max_extent())
+    coarsest = extent / 40.0
+    return [coarsest / (2 ** level) for level in range(levels)]
+
+
+def _prepare_registration_level(cloud, voxel_size, with_features=False):
+    """Downsample a cloud and estimate normals (and FPFH features) for one pyramid level"""
+    down = cloud.voxel_down_sample(voxel_size)
+    down.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=voxel_size * 2.0, max_nn=30))
+    features = None
+    if with_features:
+        features = o3d.pipelines.registration.compute_fpfh_feature(
+            down, o3d.geometry.KDTreeSearchParamHybrid(radius=voxel_size * 5.0, max_nn=100)
+        )
+    return down, features
+
+
+def _registration_pool_init(source_path, target_path):
+    """Load the clouds being registered in the registration pool process"""
+    global _registration_clouds
+    load_open3d()
+    clouds = []
+    for path in (source_path, target_path):
+        cloud = o3d.geometry.PointCloud()
+        cloud.points = o3d.utility.Vector3dVector(np.asarray(np.load(path, mmap_mode='r'), dtype=np.float64))
+        clouds.append(cloud)
+    _registration_clouds = tuple(clouds)
+
+
+def _register_level(voxel_size, coarsest, transform):
+    """Register the pool's source onto its target on one pyramid level (runs in the registration pool process).
+
+    Returns the refined transform, its fitness and inlier RMSE, and the time taken.
+    """
+    start_time = time.perf_counter()
+    registration = o3d.pipelines.registration
+    source, target = _registration_clouds
+
+    source_down, source_features = _prepare_registration_level(source, voxel_size, with_features=coarsest)
+    target_down, target_features = _prepare_registration_level(target, voxel_size, with_features=coarsest)
+
+    if coarsest:
+        distance_threshold = voxel_size * 1.5
+        global_result = registration.registration_ransac_based_on_feature_matching(
+            source_down, target_down, source_features, target_features, True,
+            distance_threshold,
+            registration.TransformationEstimationPointToPoint(False),
+            3,
+            [registration.CorrespondenceCheckerBasedOnEdgeLength(0.9),
+             registration.CorrespondenceCheckerBasedOnDistance(distance_threshold)],
+            registration.RANSACConvergenceCriteria(100000, 0.999)
+        )
+        transform = global_result.transformation
+
+    result = registration.registration_icp(
+        source_down, target_down, voxel_size * 1.5, transform,
+        registration.TransformationEstimationPointToPlane(),
+        registration.ICPConvergenceCriteria(max_iteration=50)
+    )
+    return np.asarray(result.transformation), result.fitness, result.inlier_rmse, time.perf_counter() - start_time
+
+
+def coarse_to_fine_registration(source_path, target_path, voxel_sizes, pool):
+    """Register the points saved in source_path onto those in target_path over a voxel pyramid.
+
+    A generator like segment_planes: it yields ('progress', fraction, message)
+    while a level runs in the single-process pool and ('level', result) after
+    each level. The coarsest level is initialised globally with RANSAC on
+    FPFH feature matches; every level, including the coarsest, is then
+    refined with point-to-plane ICP using the previous level's transform as
+    the initial guess.
+    """
+    # The single pool process runs tasks in order, so every level sees the loaded clouds
+    loaded = pool.apply_async(_registration_pool_init, (source_path, target_path))
+    transform = np.identity(4)
+
+    for level, voxel_size in enumerate(voxel_sizes):
+        pending = pool.apply_async(_register_level, (voxel_size, level == 0, transform))
+        while not pending.ready():
+            yield ('progress', level / len(voxel_sizes), f"Aligning: level {level + 1} of {len(voxel_sizes)}")
+        loaded.get()
+        transform, fitness, rmse, elapsed = pending.get()
+        yield ('level', {
+            'level': level,
+            'voxel_size': voxel_size,
+            'transform': transform,
+            'fitness': fitness,
+            'rmse': rmse,
+            'elapsed': elapsed
+        })
+
+
+# Distinct colours given to segmented planes, reused in order
+PLANE_COLORS = np.array([
+    [0.90, 0.30, 0.24], [0.18, 0.55, 0.85], [0.30, 0.69, 0.31], [0.95, 0.61, 0.07],
+    [0.56, 0.27, 0.68], [0.10, 0.74, 0.74], [0.91, 0.40, 0.65], [0.55, 0.43, 0.29],
+])
+
+
+def _plane_hypotheses(points, threshold, count, seed, block=64):
+    """Score random three-point plane hypotheses on points (runs in a pool process).
+
+    Returns the best (inlier count, normal, offset), with normal None when
+    every sampled triple was degenerate.
+    """
+    rng = np.random.default_rng(seed)
+    best = (0, None, None)
+    for start in range(0, count, block):
+        triples = points[rng.integers(0, len(points), (min(block, count - start), 3))]
+        normals = np.cross(triples[:, 1] - triples[:, 0], triples[:, 2] - triples[:, 0])
+        norms = np.linalg.norm(normals, axis=1)
+        valid = norms > 1e-12
+        if not valid.any():
+            continue
+        normals = normals[valid] / norms[valid, None]
+        offsets = -np.einsum('ij,ij->i', normals, triples[valid, 0])
+        counts = (np.abs(points @ normals.T + offsets) < threshold).sum(axis=0)
+        i = counts.argmax()
+        if counts[i] > best[0]:
+            best = (int(counts[i]), normals[i], offsets[i])
+    return best
+
+
+def _fit_plane(points):
+    """Least-squares plane through points as (normal, offset)"""
+    centroid = points.mean(axis=0)
+    normal = np.linalg.svd(points - centroid, full_matrices=False)[2][-1]
+    return normal, -normal @ centroid
+
+
+def _plane_inliers(points, candidates, normal, offset, threshold, chunk_size=1000000):
+    """Indices among candidates within threshold of the plane, computed in chunks"""
+    inliers = []
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        inliers.append(chunk[np.abs(np.asarray(points[chunk]) @ normal + offset) < threshold])
+    return np.concatenate(inliers) if inliers else candidates[:0]
+
+
+def segment_planes(points, pool, processes, max_planes=5, threshold=None, min_points=None, subset_size=50000,
+                   confidence=0.99, max_iterations=10000, round_size=256, seed=0):
+    """Extract up to max_planes planes one after another with RANSAC.
+
+    A generator, so the caller can interleave it with other work or stop it:
+    it yields ('progress', fraction, message) while working, including while
+    waiting on the pool, and ('plane', result) for each plane found.
+    Hypotheses are scored in parallel on a random subset of the remaining
+    points, with the iteration count adapted to the best inlier ratio so far.
+    The winner is confirmed and refitted on the full remaining data. The
+    search stops early once a plane has fewer than min_points inliers.
+    """
+    rng = np.random.default_rng(seed)
+    count = len(points)
+    if threshold is None:
+        extent = np.ptp(np.asarray(points[rng.integers(0, count, min(count, 100000))]), axis=0)
+        threshold = 0.005 * float(np.linalg.norm(extent))
+    if min_points is None:
+        min_points = max(100, count // 100)
+    workers = max(1, processes)
+    
+    remaining = np.arange(count)
+    for plane in range(max_planes):
+        if len(remaining) < max(min_points, 3):
+            return
+        subset = np.asarray(points[np.sort(rng.choice(remaining, min(subset_size, len(remaining)), replace=False))],
+                           dtype=np.float64)
+        
+        best = (0, None, None)
+        iterations = 0
+        required = max_iterations
+        while iterations < min(required, max_iterations):
+            pending = [
+                pool.apply_async(_plane_hypotheses, (subset, threshold, round_size, int(rng.integers(1 << 31))))
+                for _ in range(workers)
+            ]
+            while not all(result.ready() for result in pending):
+                yield ('progress', (plane + min(iterations / required, 1.0) * 0.8) / max_planes,
+                       f"Plane {plane + 1}: {iterations} hypotheses")
+            for result in pending:
+                candidate = result.get()
+                if candidate[0] > best[0]:
+                    best = candidate
+            iterations += workers * round_size
+            
+            # Iterations needed to draw an all-inlier triple with the requested confidence
+            ratio = best[0] / len(subset)
+            if ratio >= 1.0:
+                break
+            if ratio > 0:
+                required = int(np.ceil(np.log(1 - confidence) / np.log(1 - ratio ** 3)))
+        
+        if best[1] is None:
+            return
+        
+        # Confirm on the full remaining points and refit on the inliers
+        yield ('progress', (plane + 0.85) / max_planes, f"Plane {plane + 1}: confirming on {len(remaining):,} points")
+        inliers = _plane_inliers(points, remaining, best[1], best[2], threshold)
+        if len(inliers) < max(min_points, 3):
+            return
+        fit_sample = inliers if len(inliers) <= 200000 else rng.choice(inliers, 200000, replace=False)
+        normal, offset = _fit_plane(np.asarray(points[np.sort(fit_sample)], dtype=np.float64))
+        inliers = _plane_inliers(points, remaining, normal, offset, threshold)
+        if len(inliers) < max(min_points, 3):
+            return
+        
+        remaining = np.setdiff1d(remaining, inliers, assume_unique=True)
+        yield ('plane', {
+            'index': plane,
+            'indices': inliers,
+            'normal': normal,
+            'offset': float(offset),
+            'iterations': iterations,
+            'threshold': threshold
+        })
+
+
+# Half of the 26 cell neighbours; the other half is covered by symmetry
+CLUSTER_OFFSETS = np.array([
+    (dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1) if (dx, dy, dz) > (0, 0, 0)
+])
+
+
+def cluster_colors(count):
+    """Distinct colours for count clusters, spreading hues by the golden angle"""
+    hues = (np.arange(count) * 0.618033988749895) % 1.0
+    return np.array([colorsys.hsv_to_rgb(hue, 0.65, 0.9) for hue in hues]).reshape(-1, 3)
+
+
+def _union_find(count, edges):
+    """Component root of each of count nodes joined by edges (an E x 2 array).
+
+    Vectorised union-find: every root is hooked onto the smallest root it
+    shares an edge with, then paths are compressed by pointer jumping,
+    repeated until no edge joins two different roots.
+    """
+    parent = np.arange(count)
+    if len(edges) == 0:
+        return parent
+    a, b = edges[:, 0], edges[:, 1]
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        joined = root_a != root_b
+        if not joined.any():
+            return parent
+        root_a, root_b = root_a[joined], root_b[joined]
+        low = np.minimum(root_a, root_b)
+        np.minimum.at(parent, root_a, low)
+        np.minimum.at(parent, root_b, low)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+
+def _cell_edges(keys, queries, shifts):
+    """Pairs (query position, key position) of occupied cells offset by one of shifts.
+
+    keys are sorted linear cell keys; queries are positions into keys.
+    """
+    edges = []
+    for shift in shifts:
+        target = keys[queries] + shift
+        found = np.minimum(np.searchsorted(keys, target), len(keys) - 1)
+        hit = keys[found] == target
+        edges.append(np.column_stack((queries[hit], found[hit])))
+    return np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+
+
+def _cluster_block(keys, shifts):
+    """Label the occupied cells of one slab of the grid (runs in a pool process).
+
+    keys are the slab's sorted linear cell keys; returns each cell's
+    component root as a position within the slab.
+    """
+    return _union_find(len(keys), _cell_edges(keys, np.arange(len(keys)), shifts))
+
+
+def cluster_points(points, pool, processes, voxel_size=None, min_points=None, chunk_size=2000000, seed=0):
+    """Split points into connected objects on a voxel grid.
+
+    A generator like segment_planes: it yields ('progress', fraction, message)
+    while working and finally ('clusters', result). Points are binned into
+    cells of voxel_size, and occupied cells that touch, faces, edges or
+    corners, belong to the same object. The grid is cut into slabs along its
+    longest axis which are labelled in parallel with union-find; components
+    meeting across slab borders are then stitched with a second union-find
+    over the slab components. Clusters smaller than min_points are noise (-1).
+    """
+    count = len(points)
+    lower = np.full(3, np.inf)
+    upper = np.full(3, -np.inf)
+    for start in range(0, count, chunk_size):
+        chunk = np.asarray(points[start:start + chunk_size])
+        lower = np.minimum(lower, chunk.min(axis=0))
+        upper = np.maximum(upper, chunk.max(axis=0))
+        yield ('progress', 0.1 * min(start + chunk_size, count) / count, "Measuring extent")
+    
+    if voxel_size is None:
+        # Point spacing from the occupancy of a coarse grid on a sample, assuming surface-like scans
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(points[np.sort(rng.choice(count, min(count, 1000000), replace=False))])
+        coarse = max(float(np.linalg.norm(upper - lower)) / 256, 1e-9)
+        occupied = len(np.unique(np.floor((sample - lower) / coarse).astype(np.int64), axis=0))
+        spacing = coarse / np.sqrt(count / occupied)
+        voxel_size = 3.0 * spacing
+    if min_points is None:
+        min_points = max(10, count // 100000)
+    
+    # Longest axis first, so slabs along it are contiguous runs of the sorted keys
+    dims = np.floor((upper - lower) / voxel_size).astype(np.int64) + 3
+    order = np.argsort(-dims)
+    dims = dims[order]
+    shifts = (CLUSTER_OFFSETS[:, 0] * dims[1] + CLUSTER_OFFSETS[:, 1]) * dims[2] + CLUSTER_OFFSETS[:, 2]
+    point_keys = np.empty(count, dtype=np.int64)
+    for start in range(0, count, chunk_size):
+        # Cells are shifted by one so neighbour offsets never wrap into another row
+        cells = np.floor((np.asarray(points[start:start + chunk_size]) - lower) / voxel_size).astype(np.int64)[:, order] + 1
+        point_keys[start:start + chunk_size] = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        yield ('progress', 0.1 + 0.2 * min(start + chunk_size, count) / count, "Binning points")
+    yield ('progress', 0.3, "Sorting cells")
+    keys, point_cells = np.unique(point_keys, return_inverse=True)
+    del point_keys
+    
+    # Slabs with roughly equal numbers of occupied cells
+    slab_of = keys // (dims[1] * dims[2])
+    slab_count = max(1, min(4 * max(1, processes), len(np.unique(slab_of))))
+    bounds = np.unique(slab_of[np.linspace(0, len(keys), slab_count, endpoint=False).astype(np.int64)])
+    starts = np.searchsorted(slab_of, bounds)
+    ends = np.append(starts[1:], len(keys))
+    pending = [pool.apply_async(_cluster_block, (keys[a:b], shifts)) for a, b in zip(starts, ends)]
+    while not all(result.ready() for result in pending):
+        done = sum(result.ready() for result in pending)
+        yield ('progress', 0.3 + 0.4 * done / len(pending), f"Labelling {len(keys):,} cells in {len(pending)} blocks")
+    roots = np.concatenate([result.get() + a for result, a in zip(pending, starts)])
+    
+    # Stitch across slab borders: the last layer of each slab against the next slab
+    yield ('progress', 0.75, "Stitching blocks")
+    border = np.concatenate([np.arange(a, b)[slab_of[a:b] == slab_of[b - 1]] for a, b in zip(starts[:-1], ends[:-1])]
+                            or [np.empty(0, dtype=np.int64)])
+    forward = shifts[CLUSTER_OFFSETS[:, 0] == 1]
+    edges = _cell_edges(keys, border, forward)
+    if len(edges):
+        components, inverse = np.unique(roots[edges], return_inverse=True)
+        merged = components[_union_find(len(components), inverse.reshape(-1, 2))]
+        lookup = np.arange(len(keys))
+        lookup[components] = merged
+        roots = lookup[roots]
+    
+    # Number clusters by size, largest first, and drop the small ones as noise
+    yield ('progress', 0.85, "Measuring clusters")
+    _, cell_labels = np.unique(roots, return_inverse=True)
+    sizes = np.bincount(cell_labels, weights=np.bincount(point_cells, minlength=len(keys))).astype(np.int64)
+    ranked = np.argsort(-sizes, kind='stable')
+    kept = ranked[sizes[ranked] >= min_points]
+    relabel = np.full(len(sizes), -1, dtype=np.int32)
+    relabel[kept] = np.arange(len(kept))
+    labels = relabel[cell_labels][point_cells]
+    
+    boxes = np.empty((len(kept), 2, 3))
+    boxes[:, 0] = np.inf
+    boxes[:, 1] = -np.inf
+    for start in range(0, count, chunk_size):
+        chunk_labels = labels[start:start + chunk_size]
+        inside = chunk_labels >= 0
+        chunk = np.asarray(points[start:start + chunk_size])[inside]
+        np.minimum.at(boxes[:, 0], chunk_labels[inside], chunk)
+        np.maximum.at(boxes[:, 1], chunk_labels[inside], chunk)
+        yield ('progress', 0.85 + 0.15 * min(start + chunk_size, count) / count, "Measuring clusters")
+    
+    yield ('clusters', {
+        'labels': labels,
+        'counts': sizes[kept],
+        'boxes': boxes,
+        'voxel_size': float(voxel_size),
+        'cells': len(keys),
+        'blocks': len(pending)
+    })
+
+
+# Corner pairs of a box that differ along exactly one axis
+BOX_EDGES = np.array([(i, j) for i in range(8) for j in range(i + 1, 8) if bin(i ^ j).count('1') == 1])
+
+
+def box_line_set(boxes, colors):
+    """One LineSet outlining every (min, max) box in boxes, each in its own colour"""
+    corner_bits = np.array(list(itertools.product((0, 1), repeat=3)))
+    corners = np.where(corner_bits[np.newaxis] == 1, boxes[:, np.newaxis, 1], boxes[:, np.newaxis, 0])
+    lines = (np.arange(len(boxes))[:, np.newaxis, np.newaxis] * 8 + BOX_EDGES[np.newaxis]).reshape(-1, 2)
+    line_set = o3d.geometry.LineSet()
+    line_set.points = o3d.utility.Vector3dVector(corners.reshape(-1, 3))
+    line_set.lines = o3d.utility.Vector2iVector(lines)
+    line_set.colors = o3d.utility.Vector3dVector(np.repeat(colors, len(BOX_EDGES), axis=0))
+    return line_set
+
+
+class EditJournal:
+    """Undo/redo history of point cloud edits layered over an immutable base.
+
+    Edits are compact deltas against the base point order: a bitmap of
+    removed points, a colour applied to a bitmap of points (or to all of
+    them), or a 4x4 transform. ``visible`` replays the edits up to the cursor
+    to rebuild the displayed arrays, so recording an edit never copies the
+    cloud. Once the edits outgrow max_bytes the oldest are folded into the
+    base state and can no longer be undone. ``nbytes`` also counts the
+    per-point state the journal keeps beside the edits.
+    """
+
+    def __init__(self, points, colors=None, normals=None, scalar_fields=None, max_bytes=64 * 1024 ** 2):
+        self.points = points
+        self.colors = colors if colors is not None and len(colors) else None
+        self.normals = normals if normals is not None and len(normals) else None
+        self.scalar_fields = dict(scalar_fields or {})
+        self.count = len(points)
+        self.max_bytes = max_bytes
+        self.edits = []
+        self.cursor = 0
+        self.folded = 0
+        # Edits folded out of the journal; colours are only copied once a recolour is folded
+        self.removed = np.zeros(self.count, dtype=bool)
+        self.transform = np.identity(4)
+        self.recolored = None
+        self.kept = np.arange(self.count)
+
+    def base_mask(self, mask):
+        """Expand a mask over the visible points to the base point order"""
+        full = np.zeros(self.count, dtype=bool)
+        full[self.kept[mask]] = True
+        return full
+
+    def record(self, label, removed=None, color=None, selection=None, transform=None):
+        """Add an edit at the cursor, discarding any undone edits.
+
+        removed and selection are boolean masks over the base points; a
+        colour without a selection applies to every point.
+        """
+        del self.edits[self.cursor:]
+        self.edits.append({
+            'label': label,
+            'removed': None if removed is None else np.packbits(removed),
+            'color': None if color is None else np.asarray(color, dtype=np.float64),
+            'selection': None if selection is None else np.packbits(selection),
+            'transform': None if transform is None else np.asarray(transform, dtype=np.float64)
+        })
+        self.cursor += 1
+        while self.delta_bytes > self.max_bytes and len(self.edits) > 1:
+            self.recolored, self.transform = self._apply(self.edits.pop(0), self.removed, self.recolored, self.transform)
+            self.cursor -= 1
+            self.folded += 1
+
+    def undo(self):
+        if self.cursor == 0:
+            return False
+        self.cursor -= 1
+        return True
+
+    def redo(self):
+        if self.cursor == len(self.edits):
+            return False
+        self.cursor += 1
+        return True
+
+    @property
+    def delta_bytes(self):
+        """Bytes held by the recorded edits, the part kept under max_bytes"""
+        return sum(
+            sum(edit[key].nbytes for key in ('removed', 'color', 'selection', 'transform') if edit[key] is not None)
+            for edit in self.edits
+        )
+
+    @property
+    def nbytes(self):
+        """Everything the journal holds: the edits plus folded removals and colours and the visible index"""
+        state = self.removed.nbytes + self.kept.nbytes
+        if self.recolored is not None:
+            state += self.recolored.nbytes
+        return self.delta_bytes + state
+
+    def _apply(self, edit, removed, colors, transform):
+        """Apply one edit to removed in place; returns the updated colours and transform"""
+        if edit['removed'] is not None:
+            removed |= np.unpackbits(edit['removed'], count=self.count).astype(bool)
+        if edit['color'] is not None:
+            if colors is None:
+                if self.recolored is not None:
+                    colors = self.recolored.copy()
+                elif self.colors is not None:
+                    colors = np.array(self.colors, dtype=np.float64)
+                else:
+                    colors = np.full((self.count, 3), 0.7)
+            if edit['selection'] is None:
+                colors[:] = edit['color']
+            else:
+                colors[np.unpackbits(edit['selection'], count=self.count).astype(bool)] = edit['color']
+        if edit['transform'] is not None:
+            transform = edit['transform'] @ transform
+        return colors, transform
+
+    def visible(self):
+        """Points, colours, normals and scalar fields with the edits up to the cursor applied"""
+        removed = self.removed.copy()
+        colors = None
+        transform = self.transform.copy()
+        for edit in self.edits[:self.cursor]:
+            colors, transform = self._apply(edit, removed, colors, transform)
+        if colors is None:
+            colors = self.recolored if self.recolored is not None else self.colors
+        
+        self.kept = np.flatnonzero(~removed)
+        rotation = transform[:3, :3]
+        return {
+            'points': np.asarray(self.points)[self.kept] @ rotation.T + transform[:3, 3],
+            'colors': None if colors is None else np.asarray(colors)[self.kept],
+            'normals': None if self.normals is None else np.asarray(self.normals)[self.kept] @ rotation.T,
+            'scalar_fields': {name: np.asarray(values)[self.kept] for name, values in self.scalar_fields.items()}
+        }
+
+    def report(self):
+        return {
+            'type': 'journal',
+            'undo': self.edits[self.cursor - 1]['label'] if self.cursor > 0 else None,
+            'redo': self.edits[self.cursor]['label'] if self.cursor < len(self.edits) else None,
+            'steps': self.cursor,
+            'folded': self.folded,
+            'points': len(self.kept),
+            'bytes': self.nbytes,
+            'delta_bytes': self.delta_bytes,
+            'limit': self.max_bytes
+        }
+
+
+class FrameMailbox:
+    """Single-slot, latest-wins frame exchange between the worker and the GUI.
+
+    The worker posts RGB frames into a shared buffer, overwriting any frame
+    the GUI has not taken yet, and sets an event to wake the GUI. Each frame
+    carries a sequence number so the reader can tell how many were skipped.
+    """
+
+    def __init__(self, max_size=(1920, 1080), context=multiprocessing):
+        self.capacity = max_size[0] * max_size[1] * 3
+        self.buffer = context.Array('B', self.capacity, lock=False)
+        self.lock = context.Lock()
+        self.sequence = context.Value('Q', 0, lock=False)
+        self.width = context.Value('i', 0, lock=False)
+        self.height = context.Value('i', 0, lock=False)
+        self.ready = context.Event()
+
+    def post(self, pixels):
+        """Publish an HxWx3 uint8 frame, replacing any unread frame"""
+        height, width = pixels.shape[:2]
+        size = width * height * 3
+        if size > self.capacity:
+            raise ValueError(f"Frame {width}x{height} exceeds mailbox capacity")
+
+        with self.lock:
+            view = np.frombuffer(self.buffer, dtype=np.uint8, count=size)
+            view[:] = np.ascontiguousarray(pixels, dtype=np.uint8).reshape(-1)
+            self.width.value = width
+            self.height.value = height
+            self.sequence.value += 1
+        self.ready.set()
+
+    def take(self, last_sequence=0):
+        """Return (sequence, frame) if a frame newer than last_sequence exists, else None"""
+        with self.lock:
+            sequence = self.sequence.value
+            if sequence == last_sequence:
+                return None
+            width = self.width.value
+            height = self.height.value
+            pixels = np.frombuffer(self.buffer, dtype=np.uint8, count=width * height * 3)
+            pixels = pixels.reshape(height, width, 3).copy()
+        return sequence, pixels
+
+    def wait(self, timeout=None):
+        return self.ready.wait(timeout)
+
+
+class ControlChannel:
+    """Ordered worker-to-GUI channel for status, results, errors and acknowledgements.
+
+    Messages sent while a command is being handled are tagged with that
+    command's id, and ``finish`` acknowledges the command once it is done.
+    """
+
+    def __init__(self, result_queue):
+        self.result_queue = result_queue
+        self.command_id = None
+        self.command_name = None
+        self.failed = False
+
+    def begin(self, command):
+        self.command_id = command.get('id')
+        self.command_name = command.get('command')
+        self.failed = False
+
+    def put(self, message):
+        if self.command_id is not None:
+            message.setdefault('command_id', self.command_id)
+        if message.get('type') == 'error':
+            self.failed = True
+        self.result_queue.put(message)
+
+    def finish(self):
+        if self.command_id is not None:
+            self.result_queue.put({
+                'type': 'ack',
+                'id': self.command_id,
+                'command': self.command_name,
+                'ok': not self.failed
+            })
+        self.command_id = None
+        self.command_name = None
+
+
+EDL_NEIGHBOURS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def eye_dome_lighting(pixels, depth, strength=1.0, radius=1):
+    """
+    Shade a rendered frame with screen-space eye-dome lighting.
+    
+    Each pixel is darkened by how far it sits behind its neighbours in log-depth,
+    which brings out shape and silhouettes without normals or scene lights.
+    Background pixels (depth 0) next to the cloud get a dark outline.
+    """
+    depth = np.asarray(depth, dtype=np.float32)
+    valid = depth > 0
+    if not valid.any():
+        return pixels
+    
+    log_depth = np.zeros_like(depth)
+    log_depth[valid] = np.log2(depth[valid])
+    padded_depth = np.pad(log_depth, radius)
+    padded_valid = np.pad(valid, radius)
+    
+    height, width = depth.shape
+    response = np.zeros_like(depth)
+    for dy, dx in EDL_NEIGHBOURS:
+        rows = slice(radius + dy * radius, radius + dy * radius + height)
+        cols = slice(radius + dx * radius, radius + dx * radius + width)
+        neighbour_depth = padded_depth[rows, cols]
+        neighbour_valid = padded_valid[rows, cols]
+        obscurance = np.where(valid, np.maximum(0.0, log_depth - neighbour_depth), 100.0)
+        response += np.where(neighbour_valid, obscurance, 0.0)
+    response /= len(EDL_NEIGHBOURS)
+    
+    shade = np.exp(-300.0 * strength * response)
+    return (pixels * shade[..., np.newaxis]).astype(np.uint8)
+
+
+def capture_frame(vis, edl_strength=None):
+    """Render and read back the current view as an HxWx3 uint8 array, optionally eye-dome lit"""
+    buffer = vis.capture_screen_float_buffer(do_render=True)
+    pixels = (np.clip(np.asarray(buffer), 0.0, 1.0) * 255).astype(np.uint8)
+    if edl_strength:
+        depth = vis.capture_depth_float_buffer(do_render=False)
+        pixels = eye_dome_lighting(pixels, np.asarray(depth), edl_strength)
+    return pixels
+
+
+def visualization_worker(render_queue, result_queue, frame_mailbox, snapshot_path=None, memory_limit=None,
+                         restore=False):
     """Worker function for visualization process"""
+    # Control messages are tagged with the command they answer and acknowledged
+    result_queue = ControlChannel(result_queue)
     vis = None
     cloud = None
     running = True
     temp_dir = tempfile.mkdtemp()
+    # The GUI that owns this worker; checked so an orphaned worker exits with its pools
+    parent = multiprocessing.parent_process()
+    
+    # Binary cache entry holding the current cloud, None when it must be rewritten
+    scene_cache = None
+    derived_cache = None
+    # Per-point values that are not colours, such as scan intensity
+    scalar_fields = {}
+    snapshot_serial = 0
+    last_snapshot = time.perf_counter()
+    # Rewriting the whole cloud is costly, so it is rate-limited apart from the snapshot itself
+    last_scene_write = 0.0
+    saved_snapshot = None
+    snapshot_error = None
     
     # list to store selected points
     selected_points = []
     view_control = None
     
+    # camera keyframes for path recording
+    keyframes = []
+    
+    # playback state of an open point cloud sequence
+    sequence = None
+    
+    # live point stream ingestion state
+    stream = None
+    
+    # moving cloud of an in-progress alignment as displayed and as loaded, and
+    # whether the fixed cloud was given highlight colours it did not have
+    moving_cloud = None
+    moving_original = None
+    alignment_transform = None
+    fixed_painted = False
+    # background registration job, advanced in the idle loop
+    registration = None
+    
+    # statistics panel: estimates cached per geometry, grown while the panel is open
+    statistics_cache = collections.OrderedDict()
+    statistics = None
+    statistics_serial = 0
+    
+    # background plane segmentation job, advanced in the idle loop
+    segmentation = None
+    
+    # background cloud-to-cloud comparison, advanced in the idle loop
+    comparison = None
+    
+    # background object clustering job and its result, advanced in the idle loop
+    clustering = None
+    
+    # undo/redo journal of edits to the displayed cloud, and the cloud it produced
+    editing = None
+    
+    # point cloud exports running on background threads
+    exports = []
+    
+    # outlier removal running in a pool process, recorded in the journal when done
+    filtering = None
+    filtering_serial = 0
+    
+    # bytes held by the scene, reported to the GUI whenever the total changes
+    memory_budget = MemoryBudget(memory_limit)
+    reported_memory = None
+    last_memory_check = 0.0
+    marker_bytes = None
+    
+    # sub-commands of a batch still to run; their frames collapse into one render
+    batch_commands = collections.deque()
+    deferred_frame = [False]
+    # Eye-dome lighting strength, None while the renderer's own lighting is used
+    eye_dome = [None]
+    capture_count = 0
+    
+    def post_frame():
+        """Capture and send the current view, deferred while a batch is running"""
+        if batch_commands:
+            deferred_frame[0] = True
+        else:
+            frame_mailbox.post(capture_frame(vis, eye_dome[0]))
+    
+    def measure_memory():
+        """Account for everything the worker currently holds"""
+        items = []
+        for geometry in (cloud, moving_cloud):
+            if geometry is not None:
+                items.append(('geometry', 24 * len(geometry.points)))
+                items.append(('derived', geometry_bytes(geometry) - 24 * len(geometry.points)))
+        items.append(('geometry', len(selected_points) * (marker_bytes or 0)))
+        if moving_original is not None:
+            items.append(('derived', geometry_bytes(moving_original)))
+        for values in scalar_fields.values():
+            # Memory-mapped fields are backed by their cache file
+            if not isinstance(values, np.memmap):
+                items.append(('derived', values.nbytes))
+        if sequence is not None:
+            items.append(('caches', sequence['prefetcher'].nbytes()))
+        if stream is not None:
+            items.append(('caches', stream['buffer'].nbytes))
+        for stats in statistics_cache.values():
+            items.append(('caches', stats.nbytes))
+        if segmentation is not None and segmentation['original_colors'] is not None:
+            items.append(('derived', segmentation['original_colors'].nbytes))
+        if editing is not None:
+            if editing['base'] is not cloud:
+                items.append(('geometry', geometry_bytes(editing['base'])))
+            items.append(('derived', editing['journal'].nbytes))
+        if clustering is not None:
+            if clustering['original_colors'] is not None:
+                items.append(('derived', clustering['original_colors'].nbytes))
+            if clustering['labels'] is not None:
+                items.append(('derived', clustering['labels'].nbytes))
+        return memory_budget.measure(items)
+    
+    def replaceable_bytes():
+        """Bytes the current scene releases when a newly loaded one replaces it"""
+        return (geometry_bytes(cloud) + geometry_bytes(moving_cloud) + geometry_bytes(moving_original)
+                + len(selected_points) * marker_bytes)
+    
+    def warn_if_reduced(name, load_info, shown):
+        """Tell the GUI when a load was reduced to fit the memory budget"""
+        if 'source_points' not in load_info:
+            return
+        warning = f"{name} does not fit the memory budget of {memory_budget.limit / 1024 ** 3:.1f} GB."
+        if load_info['evicted']:
+            warning += f" Dropped {' and '.join(load_info['evicted'])}."
+        if load_info['step'] > 1:
+            warning += f" Showing every {load_info['step']}th point ({shown:,} of {load_info['source_points']:,})."
+        result_queue.put({
+            'type': 'warning',
+            'message': warning
+        })
+    
+    def geometry_key():
+        """Identifies the current point geometry; changes whenever the points do"""
+        return (id(cloud), len(cloud.points),
+                sequence['index'] if sequence is not None else None,
+                stream['shown_version'] if stream is not None else None)
+    
+    def run_export(export, points, colors, normals, fields, indices):
+        """Write an export on a background thread, reporting progress and the outcome"""
+        export_path = export['path']
+        # Bypass the control channel: its tags belong to whichever command the loop is handling
+        messages = result_queue.result_queue
+        
+        def report_export(fraction):
+            messages.put({
+                'type': 'progress',
+                'fraction': fraction,
+                'message': f"Exporting {os.path.basename(export_path)}: {fraction * 100:.0f}%"
+            })
+        
+        start_time = time.perf_counter()
+        try:
+            count = export_point_cloud(export_path, points, colors, normals, fields, indices,
+                                       progress_callback=report_export, cancel=export['cancel'])
+            messages.put({
+                'type': 'exported',
+                'path': export_path,
+                'points': count,
+                'elapsed': time.perf_counter() - start_time
+            })
+        except Exception as e:
+            messages.put({
+                'type': 'error',
+                'message': f"Error exporting point cloud: {str(e)}"
+            })
+        finally:
+            exports.remove(export)
+    
+    def show_edits(journal):
+        """Swap a cloud rebuilt from the journal into the view; returns it with its scalar fields"""
+        visible = journal.visible()
+        edited = o3d.geometry.PointCloud()
+        edited.points = o3d.utility.Vector3dVector(visible['points'])
+        if visible['colors'] is not None:
+            edited.colors = o3d.utility.Vector3dVector(visible['colors'])
+        if visible['normals'] is not None:
+            edited.normals = o3d.utility.Vector3dVector(visible['normals'])
+        
+        # Cluster outlines and isolation belong to the cloud being replaced
+        if clustering is not None and clustering['cloud'] is cloud:
+            if clustering['boxes'] is not None:
+                vis.remove_geometry(clustering['boxes'], reset_bounding_box=False)
+            if clustering['isolated'] is not None:
+                vis.remove_geometry(clustering['isolated'], reset_bounding_box=False)
+                vis.add_geometry(cloud, reset_bounding_box=False)
+        vis.remove_geometry(cloud, reset_bounding_box=False)
+        vis.add_geometry(edited, reset_bounding_box=False)
+        vis.update_renderer()
+        post_frame()
+        result_queue.put(journal.report())
+        return edited, visible['scalar_fields']
+    
+    def carry_clustering(previous_cloud, previous_kept, journal, deleted=None):
+        """Keep cluster labels, outlines and the list valid on a cloud that lost points"""
+        if clustering is None or clustering['labels'] is None or clustering['cloud'] is not previous_cloud:
+            return
+        keep = np.isin(previous_kept, journal.kept, assume_unique=True)
+        clustering['labels'] = clustering['labels'][keep]
+        clustering['cloud'] = cloud
+        clustering['isolated'] = None
+        if deleted is not None:
+            clustering['deleted'].add(deleted)
+        # show_edits took the old outlines out of the view
+        remaining = [index for index in range(len(clustering['cluster_boxes'])) if index not in clustering['deleted']]
+        clustering['boxes'] = None
+        if remaining:
+            clustering['boxes'] = box_line_set(clustering['cluster_boxes'][remaining], clustering['colors'][remaining])
+            vis.add_geometry(clustering['boxes'], reset_bounding_box=False)
+            vis.update_renderer()
+            post_frame()
+    
+    def carry_statistics(previous_key, previous_kept, journal):
+        """After points were removed, continue the statistics panel from its surviving sample"""
+        if statistics is None or statistics['stats'] is None or statistics['key'] != previous_key:
+            return
+        keep = np.isin(previous_kept, journal.kept, assume_unique=True)
+        statistics_cache[geometry_key()] = statistics['stats'].subset(keep, np.asarray(cloud.points))
+        while len(statistics_cache) > 4:
+            statistics_cache.popitem(last=False)
+    
+    def show_scene(state):
+        """Apply saved render options, camera and picks to the displayed cloud"""
+        opt = vis.get_render_option()
+        opt.point_size = state['point_size']
+        opt.background_color = np.array(state['background_color'])
+        opt.light_on = state['light_on']
+        eye_dome[0] = state.get('eye_dome')
+        
+        selected_points.clear()
+        for point in state['selected_points']:
+            point = np.array(point)
+            selected_points.append(point)
+            m = o3d.geometry.TriangleMesh.create_sphere(radius=0.02)
+            m.translate(point)
+            m.paint_uniform_color([1, 0, 0])
+            vis.add_geometry(m, reset_bounding_box=False)
+        if len(selected_points) == 2:
+            line_set = o3d.geometry.LineSet()
+            line_set.points = o3d.utility.Vector3dVector(np.vstack(selected_points))
+            line_set.lines = o3d.utility.Vector2iVector(np.array([[0, 1]]))
+            line_set.colors = o3d.utility.Vector3dVector([[0, 1, 0]])
+            vis.add_geometry(line_set, reset_bounding_box=False)
+        
+        camera_from_dict(view_control, state['camera'])
+        vis.poll_events()
+        vis.update_renderer()
+        post_frame()
+    
+    def evict_derived():
+        """Release derived data and caches to get back under the ceiling; returns what was dropped"""
+        evicted = []
+        if sequence is not None and sequence['prefetcher'].depth > 2:
+            sequence['prefetcher'].shrink(2)
+            sequence['prefetcher'].request(sequence['index'])
+            evicted.append("prefetched frames")
+        if cloud is not None and cloud.has_normals() and measure_memory() > memory_budget.limit:
+            cloud.normals = o3d.utility.Vector3dVector()
+            vis.update_geometry(cloud)
+            evicted.append("normals")
+        return evicted
+    
     try:
-        # Initialize visualizer
+        # Import Open3D and create the offscreen context straight away; the
+        # GUI shows a warming-up state until this is done
+        warmup_start = time.perf_counter()
+        load_open3d()
+        import_time = time.perf_counter() - warmup_start
         vis = o3d.visualization.Visualizer()
         vis.create_window(visible=False, width=800, height=600)
+        result_queue.put({
+            'type': 'renderer_ready',
+            'import_time': import_time,
+            'elapsed': time.perf_counter() - warmup_start
+        })
         
         # Set default rendering options
         opt = vis.get_render_option()
@@ -35,13 +2735,80 @@ def visualization_worker(render_queue, result_queue):
         
         # Get view control
         view_control = vis.get_view_control()
+        marker_bytes = geometry_bytes(o3d.geometry.TriangleMesh.create_sphere(radius=0.02))
+        
+        # Warm restart after a crash: rebuild the scene from the last snapshot
+        snapshot = None
+        if restore:
+            try:
+                snapshot = load_worker_snapshot(snapshot_path)
+            except (OSError, ValueError) as e:
+                result_queue.put({
+                    'type': 'error',
+                    'message': f"Could not restore the previous scene: {str(e)}"
+                })
+        if snapshot is not None and snapshot.get('scene_cache'):
+            start_time = time.perf_counter()
+            try:
+                scene_cache = snapshot['scene_cache']
+                if os.path.dirname(scene_cache['points']) == os.path.dirname(snapshot_path):
+                    derived_cache = scene_cache
+                cloud = read_cloud_cache(scene_cache)
+                scalar_fields = read_scalar_fields(scene_cache)
+                vis.add_geometry(cloud)
+                show_scene(snapshot)
+                
+                result_queue.put({
+                    'type': 'restored',
+                    'points': len(cloud.points),
+                    'elapsed': time.perf_counter() - start_time
+                })
+            except Exception as e:
+                cloud = None
+                scene_cache = None
+                scalar_fields = {}
+                selected_points.clear()
+                vis.clear_geometries()
+                result_queue.put({
+                    'type': 'error',
+                    'message': f"Could not restore the previous scene: {str(e)}"
+                })
         
         # Main loop
         while running:
+            # Acknowledge the previous command (also reached via 'continue')
+            result_queue.finish()
+            
             # Process commands from render queue
             try:
-                if not render_queue.empty():
-                    command = render_queue.get(block=False)
+                # Block briefly so new commands are handled as soon as they arrive,
+                # waking early when the next sequence frame is due
+                timeout = 0.0 if batch_commands else 0.1
+                if sequence is not None and (sequence['playing'] or sequence['display_due']):
+                    timeout = min(timeout, max(0.0, sequence['next_time'] - time.perf_counter()))
+                if statistics is not None and statistics['stats'] is not None and (
+                        statistics['refining'] is not None or statistics['stats'].sampling or statistics['pending']):
+                    timeout = min(timeout, 0.02)
+                if segmentation is not None and segmentation['job'] is not None:
+                    timeout = min(timeout, 0.01)
+                if comparison is not None or registration is not None:
+                    timeout = min(timeout, 0.01)
+                if clustering is not None and clustering['job'] is not None:
+                    timeout = min(timeout, 0.01)
+                if filtering is not None:
+                    timeout = min(timeout, 0.05)
+                if stream is not None:
+                    if stream['buffer'].version != stream['shown_version']:
+                        timeout = min(timeout, max(0.0, stream['next_update'] - time.perf_counter()))
+                    else:
+                        # Nothing new yet: check again soon without spinning
+                        timeout = min(timeout, 0.02)
+                if batch_commands:
+                    command = batch_commands.popleft()
+                else:
+                    command = render_queue.get(timeout=timeout)
+                if command:
+                    result_queue.begin(command)
                     
                     # Handle load_file command
                     if command['command'] == 'load_file':
@@ -55,22 +2822,19 @@ def visualization_worker(render_queue, result_queue):
                         
                         try:
                             # Load the file based on its extension
-                            if file_ext.lower() in ['.ply', '.pcd', '.xyz', '.pts']:
-                                # Load as point cloud
-                                cloud = o3d.io.read_point_cloud(file_path)
-                                
-                                # If point cloud is empty, try to load as mesh and sample points
-                                if len(cloud.points) == 0 and file_ext.lower() in ['.ply', '.obj']:
-                                    mesh = o3d.io.read_triangle_mesh(file_path)
-                                    cloud = mesh.sample_points_uniformly(number_of_points=100000)
-                            elif file_ext.lower() == '.obj':
-                                # Load as mesh then convert to point cloud
-                                mesh = o3d.io.read_triangle_mesh(file_path)
-                                cloud = mesh.sample_points_uniformly(number_of_points=100000)
-                            else:
+                            try:
+                                # The new cloud may use what the current one releases
+                                load_info = {}
+                                measure_memory()
+                                cloud, scene_cache = load_point_cloud_cached(
+                                    file_path, file_ext, load_info=load_info,
+                                    max_bytes=memory_budget.available(replaceable_bytes())
+                                )
+                                scalar_fields = read_scalar_fields(scene_cache)
+                            except ValueError as e:
                                 result_queue.put({
                                     'type': 'error',
-                                    'message': f"Unsupported file format: {file_ext}"
+                                    'message': str(e)
                                 })
                                 continue
                             
@@ -82,6 +2846,11 @@ def visualization_worker(render_queue, result_queue):
                                 })
                                 continue
                             
+                            # A pending alignment belongs to the replaced scene
+                            moving_cloud = None
+                            moving_original = None
+                            alignment_transform = None
+                            
                             # Clear existing geometries and add new point cloud
                             vis.clear_geometries()
                             vis.add_geometry(cloud)
@@ -94,19 +2863,23 @@ def visualization_worker(render_queue, result_queue):
                             vis.update_renderer()
                             
                             # Capture screenshot
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
-                            result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
-                            })
+                            post_frame()
                             
+                            message = f"Loaded {os.path.basename(file_path)} with {len(cloud.points)} points"
+                            if 'mb_per_second' in load_info:
+                                message += (f" (parsed {load_info['bytes'] / (1024 * 1024):.0f} MB"
+                                            f" at {load_info['mb_per_second']:.0f} MB/s)")
+                            if scalar_fields:
+                                message += f", fields: {', '.join(scalar_fields)}"
+                            if 'cache_error' in load_info:
+                                message += f"; {load_info['cache_error']}"
                             result_queue.put({
                                 'type': 'status',
-                                'message': f"Loaded {os.path.basename(file_path)} with {len(cloud.points)} points"
+                                'message': message
                             })
                             
+                            warn_if_reduced(os.path.basename(file_path), load_info, len(cloud.points))
+                            
                         except Exception as e:
                             result_queue.put({
                                 'type': 'error',
@@ -209,13 +2982,7 @@ def visualization_worker(render_queue, result_queue):
                             vis.update_renderer()
                             
                             # Capture and send rendered image
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
-                            result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
-                            })
+                            post_frame()
                             
                             # Send the points back to the main process
                             result_queue.put({
@@ -233,13 +3000,7 @@ def visualization_worker(render_queue, result_queue):
                             vis.update_renderer()
                             
                             # Capture and send rendered image
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
-                            result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
-                            })
+                            post_frame()
                             
                             result_queue.put({
                                 'type': 'status',
@@ -255,13 +3016,7 @@ def visualization_worker(render_queue, result_queue):
                         
                         # Capture and send rendered image
                         if cloud is not None:
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
-                            result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
-                            })
+                            post_frame()
                     
                     elif command['command'] == 'set_point_size':
                         size = command['size']
@@ -271,29 +3026,93 @@ def visualization_worker(render_queue, result_queue):
                         
                         # Capture and send rendered image
                         if cloud is not None:
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
+                            post_frame()
+                    
+                    # Edits are recorded in the journal; set_point_color is the recolour edit
+                    elif command['command'] in ('set_point_color', 'edit_cloud'):
+                        if cloud is None or len(cloud.points) == 0:
+                            continue
+                        if editing is None or editing['cloud'] is not cloud:
+                            editing = {
+                                'base': cloud,
+                                'cloud': cloud,
+                                'journal': EditJournal(
+                                    np.asarray(cloud.points),
+                                    np.asarray(cloud.colors),
+                                    np.asarray(cloud.normals),
+                                    scalar_fields,
+                                    max_bytes=max(16 * 1024 ** 2, memory_budget.limit // 32)
+                                )
+                            }
+                        journal = editing['journal']
+                        previous_key = geometry_key()
+                        previous_kept = journal.kept
+                        
+                        operation = command.get('operation', 'recolor')
+                        if operation == 'recolor':
+                            journal.record("Recolour", color=command['color'])
+                        elif operation == 'delete_cluster':
+                            if clustering is None or clustering['labels'] is None or clustering['cloud'] is not cloud:
+                                result_queue.put({
+                                    'type': 'error',
+                                    'message': "Cluster the cloud before deleting clusters"
+                                })
+                                continue
+                            members = clustering['labels'] == command['index']
+                            if not members.any():
+                                continue
+                            journal.record(f"Delete cluster {command['index'] + 1}", removed=journal.base_mask(members))
+                        elif operation == 'remove_outliers':
+                            # The neighbour search is slow on large clouds, so it runs in a pool process
+                            if filtering is not None:
+                                filtering['pool'].terminate()
+                                try:
+                                    os.remove(filtering['points_path'])
+                                except OSError:
+                                    pass
+                            filtering_serial += 1
+                            points_path = os.path.join(temp_dir, f'outlier_points_{filtering_serial}.npy')
+                            np.save(points_path, np.asarray(cloud.points))
+                            pool = worker_pool(1)
+                            filtering = {
+                                'cloud': cloud,
+                                'pool': pool,
+                                'points_path': points_path,
+                                'result': pool.apply_async(_outlier_indices, (
+                                    points_path, command.get('neighbors', 20), command.get('std_ratio', 2.0)
+                                )),
+                                'start_time': time.perf_counter()
+                            }
                             result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
+                                'type': 'status',
+                                'message': f"Removing outliers from {len(cloud.points):,} points..."
                             })
-                    
-                    elif command['command'] == 'set_point_color':
-                        if cloud is not None:
-                            color = command['color']
-                            cloud.paint_uniform_color(color)
-                            vis.update_geometry(cloud)
-                            vis.update_renderer()
-                            
-                            # Capture and send rendered image
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
+                            continue
+                        elif operation == 'transform':
+                            journal.record("Transform", transform=command['matrix'])
+                        else:
                             result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
+                                'type': 'error',
+                                'message': f"Unknown edit: {operation}"
                             })
+                            continue
+                        
+                        previous_cloud = cloud
+                        cloud, scalar_fields = show_edits(journal)
+                        editing['cloud'] = cloud
+                        scene_cache = None
+                        if operation == 'delete_cluster':
+                            carry_statistics(previous_key, previous_kept, journal)
+                            carry_clustering(previous_cloud, previous_kept, journal, command['index'])
+                    
+                    elif command['command'] in ('undo', 'redo'):
+                        if editing is None or editing['cloud'] is not cloud:
+                            continue
+                        journal = editing['journal']
+                        if journal.undo() if command['command'] == 'undo' else journal.redo():
+                            cloud, scalar_fields = show_edits(journal)
+                            editing['cloud'] = cloud
+                            scene_cache = None
                     
                     elif command['command'] == 'set_view_mode':
                         mode = command['mode']
@@ -315,18 +3134,13 @@ def visualization_worker(render_queue, result_queue):
                         
                         # Capture and send rendered image
                         if cloud is not None:
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
-                            result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
-                            })
+                            post_frame()
                     
                     elif command['command'] == 'set_lighting':
                         profile = command['profile']
                         opt = vis.get_render_option()
                         
+                        eye_dome[0] = None
                         if profile == "Bright day with sun at +Y [default]":
                             opt.light_on = True
                             # Default lighting settings
@@ -336,6 +3150,10 @@ def visualization_worker(render_queue, result_queue):
                         elif profile == "Night":
                             opt.light_on = True
                             # Night lighting settings
+                        elif profile == "Eye-dome lighting (no normals)":
+                            # Shape comes from the depth buffer instead of scene lights
+                            opt.light_on = False
+                            eye_dome[0] = command.get('strength', 1.0)
                         elif profile == "Custom":
                             # Custom lighting settings
                             pass
@@ -344,58 +3162,898 @@ def visualization_worker(render_queue, result_queue):
                         
                         # Capture and send rendered image
                         if cloud is not None:
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
+                            post_frame()
+                    
+                    # commands for rotation and zoom
+                    elif command['command'] == 'rotate':
+                        if cloud is not None and view_control is not None:
+                            dx = command['dx']
+                            dy = command['dy']
+                            
+                            
+                            # Get current view parameters
+                            params = view_control.convert_to_pinhole_camera_parameters()
+                            
+                            # Rotate view using view_control methods
+                            view_control.rotate(dx, dy)
+                            
+                            vis.update_renderer()
+                            
+                            # Capture and send rendered image
+                            post_frame()
+                    
+                    elif command['command'] == 'zoom':
+                        if cloud is not None and view_control is not None:
+                            zoom_factor = command['factor']
+                            
+                            # Apply zoom based on direction
+                            view_control.scale(zoom_factor)
+                            
+                            # Update visualization
+                            vis.poll_events()
+                            vis.update_renderer()
+                            
+                            # Capture and send rendered image
+                            post_frame()
+                
+                    # Cloud-to-cloud comparison: colour the target by distance to the reference
+                    elif command['command'] == 'compare_clouds':
+                        reference_path = command['reference_path']
+                        target_path = command['target_path']
+
+                        try:
+                            result_queue.put({
+                                'type': 'status',
+                                'message': f"Loading {os.path.basename(reference_path)} and {os.path.basename(target_path)}"
+                            })
+                            if comparison is not None:
+                                comparison['job'].close()
+                                comparison['pool'].terminate()
+                                comparison = None
+                            
+                            # The reference is only read back from its cache file in chunks, so it is
+                            # released once cached; the target leaves room for its distance colours
+                            reference_info, target_info = {}, {}
+                            measure_memory()
+                            available = memory_budget.available(replaceable_bytes())
+                            reference_cloud, reference_cache = load_point_cloud_cached(
+                                reference_path, load_info=reference_info, max_bytes=available
+                            )
+                            if reference_cache is not None:
+                                reference_points = open_cache_array(reference_cache['points'])
+                            else:
+                                reference_points = np.array(reference_cloud.points)
+                            del reference_cloud
+                            target_cloud, target_cache = load_point_cloud_cached(
+                                target_path, load_info=target_info, max_bytes=available // 2
+                            )
+
+                            if len(reference_points) == 0 or len(target_cloud.points) == 0:
+                                result_queue.put({
+                                    'type': 'error',
+                                    'message': "Failed to load reference or target cloud"
+                                })
+                                continue
+                            if target_cache is not None:
+                                target_points = open_cache_array(target_cache['points'])[::target_cache.get('step', 1)]
+                            else:
+                                target_points = np.asarray(target_cloud.points)
+
+                            # The target becomes the active cloud so picking and navigation keep working
+                            cloud = target_cloud
+                            scene_cache = target_cache
+                            scalar_fields = read_scalar_fields(target_cache)
+                            selected_points.clear()
+                            moving_cloud = None
+                            moving_original = None
+                            alignment_transform = None
+                            vis.clear_geometries()
+                            vis.add_geometry(cloud)
+                            vis.reset_view_point(True)
+                            vis.poll_events()
+                            vis.update_renderer()
+                            post_frame()
+                            warn_if_reduced(os.path.basename(target_path), target_info, len(cloud.points))
+
+                            # Distances are computed in the idle loop so the view stays responsive
+                            processes = max(1, min(4, (os.cpu_count() or 1) - 1))
+                            pool = worker_pool(processes)
+                            comparison = {
+                                'cloud': cloud,
+                                'pool': pool,
+                                'job': compare_cloud_distances(
+                                    reference_points, target_points, temp_dir, pool, processes,
+                                    chunk_size=command.get('chunk_size', 1000000)
+                                ),
+                                'last_progress': 0.0,
+                                'start_time': time.perf_counter()
+                            }
+
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error comparing clouds: {str(e)}"
+                            })
+
+                    # Coarse-to-fine registration of a moving cloud onto a fixed cloud
+                    elif command['command'] == 'align_clouds':
+                        fixed_path = command['fixed_path']
+                        moving_path = command['moving_path']
+
+                        try:
+                            result_queue.put({
+                                'type': 'status',
+                                'message': f"Aligning {os.path.basename(moving_path)} onto {os.path.basename(fixed_path)}"
+                            })
+                            if registration is not None:
+                                registration['job'].close()
+                                registration['pool'].terminate()
+                                registration = None
+                            
+                            # The fixed cloud gets half of the budget; the moving cloud is held
+                            # twice, as loaded and as the highlighted copy on display
+                            fixed_info, moving_info = {}, {}
+                            measure_memory()
+                            available = memory_budget.available(replaceable_bytes())
+                            fixed_cloud, fixed_cache = load_point_cloud_cached(fixed_path, load_info=fixed_info,
+                                                                               max_bytes=available // 2)
+                            moving_source, _ = load_point_cloud_cached(
+                                moving_path, load_info=moving_info,
+                                max_bytes=(available - geometry_bytes(fixed_cloud)) // 2
+                            )
+
+                            if len(fixed_cloud.points) == 0 or len(moving_source.points) == 0:
+                                result_queue.put({
+                                    'type': 'error',
+                                    'message': "Failed to load clouds for alignment"
+                                })
+                                continue
+
+                            # Highlight colours only go on what is displayed; accepting merges
+                            # the moving cloud as loaded, with its own colours and normals
+                            fixed_painted = not fixed_cloud.has_colors()
+                            if fixed_painted:
+                                fixed_cloud.paint_uniform_color([0.6, 0.6, 0.6])
+                            moving_original = moving_source
+                            moving_cloud = o3d.geometry.PointCloud()
+                            moving_cloud.points = o3d.utility.Vector3dVector(np.asarray(moving_original.points))
+                            moving_cloud.paint_uniform_color([1.0, 0.6, 0.0])
+                            alignment_transform = np.identity(4)
+                            warn_if_reduced(os.path.basename(fixed_path), fixed_info, len(fixed_cloud.points))
+                            warn_if_reduced(os.path.basename(moving_path), moving_info, len(moving_original.points))
+
+                            cloud = fixed_cloud
+                            scene_cache = fixed_cache
+                            scalar_fields = read_scalar_fields(fixed_cache)
+                            selected_points.clear()
+                            vis.clear_geometries()
+                            vis.add_geometry(cloud)
+                            vis.add_geometry(moving_cloud)
+                            vis.reset_view_point(True)
+                            vis.poll_events()
+                            vis.update_renderer()
+                            post_frame()
+
+                            # Registration runs in a pool process and is advanced in the idle loop
+                            source_path = os.path.join(temp_dir, 'align_moving.npy')
+                            target_path = os.path.join(temp_dir, 'align_fixed.npy')
+                            np.save(source_path, np.asarray(moving_original.points))
+                            np.save(target_path, np.asarray(fixed_cloud.points))
+                            voxel_sizes = registration_voxel_sizes(moving_original, fixed_cloud, command.get('levels', 3))
+                            pool = worker_pool(1)
+                            registration = {
+                                'pool': pool,
+                                'job': coarse_to_fine_registration(source_path, target_path, voxel_sizes, pool),
+                                'levels': len(voxel_sizes),
+                                'last_progress': 0.0,
+                                'start_time': time.perf_counter()
+                            }
+
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error aligning clouds: {str(e)}"
+                            })
+
+                    elif command['command'] == 'align_accept':
+                        if registration is not None:
+                            registration['job'].close()
+                            registration['pool'].terminate()
+                            registration = None
+                        if moving_cloud is not None and cloud is not None:
+                            # Merge the moving cloud as loaded, not its highlighted copy
+                            aligned = o3d.geometry.PointCloud(moving_original)
+                            aligned.transform(alignment_transform)
+                            if fixed_painted:
+                                cloud.colors = o3d.utility.Vector3dVector()
+                            # Open3D keeps colours only when both clouds have them
+                            if cloud.has_colors() != aligned.has_colors():
+                                (aligned if cloud.has_colors() else cloud).paint_uniform_color([0.6, 0.6, 0.6])
+                            cloud = cloud + aligned
+                            del aligned
+                            scene_cache = None
+                            scalar_fields = {}
+                            moving_cloud = None
+                            moving_original = None
+                            alignment_transform = None
+                            vis.clear_geometries()
+                            vis.add_geometry(cloud, reset_bounding_box=False)
+                            vis.update_renderer()
+
+                            post_frame()
+                            result_queue.put({
+                                'type': 'status',
+                                'message': f"Alignment accepted, merged cloud has {len(cloud.points)} points"
+                            })
+
+                    elif command['command'] == 'align_revert':
+                        if registration is not None:
+                            registration['job'].close()
+                            registration['pool'].terminate()
+                            registration = None
+                        if moving_cloud is not None:
+                            moving_cloud.points = o3d.utility.Vector3dVector(np.asarray(moving_original.points))
+                            alignment_transform = np.identity(4)
+                            vis.update_geometry(moving_cloud)
+                            vis.update_renderer()
+
+                            post_frame()
+                            result_queue.put({
+                                'type': 'status',
+                                'message': "Alignment reverted"
+                            })
+
+                    # Playback of a directory of numbered point cloud frames
+                    elif command['command'] == 'open_sequence':
+                        directory = command['directory']
+                        try:
+                            paths = list_sequence_frames(directory)
+                            if not paths:
+                                result_queue.put({
+                                    'type': 'error',
+                                    'message': f"No .pcd or .ply frames found in {directory}"
+                                })
+                                continue
+                            
+                            if sequence is not None:
+                                sequence['prefetcher'].close()
+                                sequence = None
+                            
+                            points, colors = _read_sequence_frame(paths[0])
+                            
+                            # Size the prefetch ring so the shown frame and the buffered ones fit the budget
+                            measure_memory()
+                            frame_bytes = max(points.nbytes + (colors.nbytes if colors is not None else 0), 1)
+                            depth = min(command.get('depth', 8), memory_budget.available(replaceable_bytes()) // frame_bytes - 1)
+                            if depth < 1:
+                                raise MemoryBudgetError(
+                                    f"Frames of {len(points):,} points do not fit the memory budget of "
+                                    f"{memory_budget.limit / 1024 ** 3:.1f} GB with any prefetching"
+                                )
+                            
+                            cloud = o3d.geometry.PointCloud()
+                            cloud.points = o3d.utility.Vector3dVector(points)
+                            if colors is not None:
+                                cloud.colors = o3d.utility.Vector3dVector(colors)
+                            scene_cache = None
+                            scalar_fields = {}
+                            selected_points.clear()
+                            moving_cloud = None
+                            moving_original = None
+                            alignment_transform = None
+                            vis.clear_geometries()
+                            vis.add_geometry(cloud)
+                            vis.reset_view_point(True)
+                            vis.poll_events()
+                            vis.update_renderer()
+                            post_frame()
+                            
+                            sequence = {
+                                'paths': paths,
+                                'cloud': cloud,
+                                'prefetcher': SequencePrefetcher(paths, depth=depth),
+                                'index': 0,
+                                'playing': False,
+                                'display_due': False,
+                                'fps': command.get('fps', 10.0),
+                                'speed': 1.0,
+                                'next_time': time.perf_counter(),
+                                'underruns': 0,
+                                'shown_times': collections.deque(maxlen=30),
+                                'last_report': 0.0
+                            }
+                            sequence['prefetcher'].request(1)
+                            
+                            result_queue.put({
+                                'type': 'sequence_info',
+                                'count': len(paths),
+                                'directory': directory
+                            })
+                            result_queue.put({
+                                'type': 'status',
+                                'message': f"Opened sequence of {len(paths)} frames"
+                            })
+                            if depth < command.get('depth', 8):
+                                result_queue.put({
+                                    'type': 'warning',
+                                    'message': f"Prefetching {depth} frames instead of {command.get('depth', 8)} "
+                                               f"to stay within the memory budget"
+                                })
+                        
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error opening sequence: {str(e)}"
+                            })
+                    
+                    elif command['command'] == 'sequence_control':
+                        if sequence is not None:
+                            action = command['action']
+                            if action == 'play':
+                                sequence['playing'] = True
+                                sequence['next_time'] = time.perf_counter()
+                            elif action == 'pause':
+                                sequence['playing'] = False
+                            elif action == 'seek':
+                                sequence['index'] = max(0, min(int(command['index']), len(sequence['paths']) - 1))
+                                sequence['prefetcher'].request(sequence['index'])
+                                sequence['display_due'] = True
+                                sequence['next_time'] = time.perf_counter()
+                            elif action == 'speed':
+                                sequence['speed'] = max(float(command['speed']), 0.01)
+                            elif action == 'fps':
+                                sequence['fps'] = max(float(command['fps']), 0.1)
+                            # Report the new state right away
+                            sequence['last_report'] = 0.0
+                    
+                    # Live point stream ingestion from a local socket
+                    elif command['command'] == 'start_stream':
+                        try:
+                            if stream is not None:
+                                stream['receiver'].stop()
+                                stream = None
+                            
+                            # A buffered point takes its float32 position, uint8 colour and arrival
+                            # time, and 48 more bytes as float64 point and colour once shown
+                            measure_memory()
+                            point_bytes = 12 + 3 + 8 + 48
+                            capacity = min(command['capacity'], memory_budget.available(replaceable_bytes()) // point_bytes)
+                            if capacity < 1:
+                                raise MemoryBudgetError("No memory budget is left for a point stream buffer")
+                            buffer = RollingPointBuffer(capacity, command.get('window'))
+                            receiver = PointStreamReceiver(command['protocol'], command['address'], buffer)
+                            now = time.perf_counter()
+                            stream = {
+                                'receiver': receiver,
+                                'buffer': buffer,
+                                'cloud': None,
+                                'interval': 1.0 / max(command.get('max_rate', 10.0), 0.1),
+                                'next_update': now,
+                                'shown_version': 0,
+                                'last_report': now,
+                                'reported_points': 0
+                            }
+                            result_queue.put({
+                                'type': 'status',
+                                'message': f"Listening for points on {command['protocol']} {command['address']}"
+                            })
+                            if capacity < command['capacity']:
+                                result_queue.put({
+                                    'type': 'warning',
+                                    'message': f"Keeping the newest {capacity:,} points instead of {command['capacity']:,} "
+                                               f"to stay within the memory budget"
+                                })
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error starting point stream: {str(e)}"
+                            })
+                    
+                    elif command['command'] == 'stop_stream':
+                        if stream is not None:
+                            stream['receiver'].stop()
+                            stream = None
+                            result_queue.put({
+                                'type': 'status',
+                                'message': "Point stream stopped"
+                            })
+                    
+                    # Run several commands back to back and render once at the end
+                    elif command['command'] == 'batch':
+                        batch_commands.extend(command['commands'])
+                        batch_commands.append({'command': 'end_batch'})
+                        deferred_frame[0] = False
+                    
+                    elif command['command'] == 'end_batch':
+                        if deferred_frame[0]:
+                            deferred_frame[0] = False
+                            vis.poll_events()
+                            vis.update_renderer()
+                            post_frame()
+                    
+                    elif command['command'] == 'capture_image':
+                        vis.poll_events()
+                        pixels = capture_frame(vis, eye_dome[0])
+                        image_path = command.get('path')
+                        if not image_path:
+                            capture_count += 1
+                            image_path = os.path.join(temp_dir, f'capture_{capture_count}.png')
+                        Image.fromarray(pixels).save(image_path)
+                        result_queue.put({
+                            'type': 'image_saved',
+                            'path': image_path,
+                            'width': pixels.shape[1],
+                            'height': pixels.shape[0]
+                        })
+                    
+                    elif command['command'] == 'save_session':
+                        if cloud is None:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': "No point cloud to save"
+                            })
+                            continue
+                        
+                        session_path = command['path']
+                        try:
+                            start_time = time.perf_counter()
+                            arrays = {'points.npy': (np.asarray(cloud.points), np.float64)}
+                            if cloud.has_colors():
+                                arrays['colors.npy'] = (np.asarray(cloud.colors), np.float32)
+                            if cloud.has_normals():
+                                arrays['normals.npy'] = (np.asarray(cloud.normals), np.float32)
+                            for name, values in scalar_fields.items():
+                                if len(values) == len(cloud.points):
+                                    arrays[f'sf_{name}.npy'] = (values, np.float32)
+                            
+                            measurements = []
+                            if len(selected_points) == 2:
+                                measurements.append({
+                                    'type': 'distance',
+                                    'points': [np.asarray(p).tolist() for p in selected_points],
+                                    'distance': float(np.linalg.norm(selected_points[0] - selected_points[1]))
+                                })
+                            opt = vis.get_render_option()
+                            save_session_bundle(session_path, arrays, {
+                                'camera': camera_to_dict(view_control),
+                                'point_size': opt.point_size,
+                                'background_color': np.asarray(opt.background_color).tolist(),
+                                'light_on': opt.light_on,
+                                'eye_dome': eye_dome[0],
+                                'selected_points': [np.asarray(p).tolist() for p in selected_points],
+                                'measurements': measurements
+                            })
+                            result_queue.put({
+                                'type': 'session_saved',
+                                'path': session_path,
+                                'points': len(cloud.points),
+                                'elapsed': time.perf_counter() - start_time
+                            })
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error saving session: {str(e)}"
+                            })
+                    
+                    elif command['command'] == 'open_session':
+                        session_path = command['path']
+                        try:
+                            start_time = time.perf_counter()
+                            state, session_cache = read_session_bundle(session_path)
+                            
+                            load_info = {}
+                            measure_memory()
+                            session_cache = fit_cache_to_budget(session_cache, memory_budget.available(replaceable_bytes()), load_info)
+                            new_cloud = read_cloud_cache(session_cache)
+                            
+                            cloud = new_cloud
+                            scene_cache = session_cache
+                            scalar_fields = read_scalar_fields(session_cache)
+                            moving_cloud = None
+                            moving_original = None
+                            alignment_transform = None
+                            vis.clear_geometries()
+                            vis.add_geometry(cloud)
+                            show_scene(state)
                             
                             result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
+                                'type': 'session_opened',
+                                'path': session_path,
+                                'points': len(cloud.points),
+                                'point_size': state['point_size'],
+                                'background_color': state['background_color'],
+                                'selected_points': state['selected_points'],
+                                'measurements': state['measurements'],
+                                'elapsed': time.perf_counter() - start_time
+                            })
+                            if load_info.get('step', 1) > 1:
+                                result_queue.put({
+                                    'type': 'warning',
+                                    'message': (f"The session does not fit the memory budget. Showing every "
+                                                f"{load_info['step']}th point ({len(cloud.points):,} of {load_info['source_points']:,}).")
+                                })
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error opening session: {str(e)}"
+                            })
+                    
+                    elif command['command'] == 'statistics':
+                        action = command['action']
+                        if action == 'start':
+                            # The idle loop attaches the panel to the current geometry
+                            if statistics is None:
+                                statistics = {'key': None, 'stats': None, 'pool': None, 'own_path': None, 'stale_paths': []}
+                        elif statistics is not None and action == 'stop':
+                            if statistics['pool'] is not None:
+                                statistics['pool'].terminate()
+                            if statistics['stats'] is not None and statistics['key'] in statistics_cache:
+                                statistics['stats'].points = None
+                            for stale_path in statistics['stale_paths'] + [statistics['own_path']]:
+                                if stale_path is not None:
+                                    try:
+                                        os.remove(stale_path)
+                                    except OSError:
+                                        pass
+                            statistics = None
+                        elif statistics is not None and statistics['stats'] is not None and action == 'refine':
+                            stats = statistics['stats']
+                            if not stats.exact and statistics['refining'] is None:
+                                statistics['refining'] = stats.refine()
+                                # Exact spacing queries every point; sampled results still in flight are dropped
+                                stats.spacing = []
+                                statistics['pending'].clear()
+                                chunk = 200000
+                                for start in range(0, stats.count, chunk):
+                                    statistics['pending'].append((statistics['pool'].apply_async(
+                                        _spacing_chunk, (statistics['points_path'], slice(start, start + chunk))
+                                    ), True))
+                                statistics['exact_chunks'] = len(statistics['pending'])
+                    
+                    elif command['command'] == 'segment_planes':
+                        if cloud is None or len(cloud.points) < 3:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': "No point cloud to segment"
+                            })
+                            continue
+                        
+                        if segmentation is not None and segmentation['job'] is not None:
+                            segmentation['pool'].terminate()
+                        
+                        # Planes are painted over the cloud's own colours, kept to restore them
+                        if segmentation is None or segmentation['cloud'] is not cloud:
+                            original_colors = np.asarray(cloud.colors).copy() if cloud.has_colors() else None
+                        else:
+                            original_colors = segmentation['original_colors']
+                        processes = max(1, min(4, (os.cpu_count() or 1) - 1))
+                        pool = worker_pool(processes)
+                        segmentation = {
+                            'cloud': cloud,
+                            'original_colors': original_colors,
+                            'pool': pool,
+                            'job': segment_planes(
+                                np.asarray(cloud.points), pool, processes,
+                                max_planes=command.get('max_planes', 5),
+                                threshold=command.get('threshold'),
+                                min_points=command.get('min_points')
+                            ),
+                            'labels': np.full(len(cloud.points), -1, dtype=np.float32),
+                            'planes': 0,
+                            'last_progress': 0.0,
+                            'start_time': time.perf_counter()
+                        }
+                        if original_colors is not None:
+                            cloud.colors = o3d.utility.Vector3dVector(original_colors)
+                        else:
+                            cloud.paint_uniform_color([0.7, 0.7, 0.7])
+                        scalar_fields.pop('plane', None)
+                        vis.update_geometry(cloud)
+                        vis.update_renderer()
+                        post_frame()
+                    
+                    elif command['command'] == 'cancel_segmentation':
+                        if segmentation is not None and segmentation['job'] is not None:
+                            segmentation['job'].close()
+                            segmentation['job'] = None
+                            segmentation['pool'].terminate()
+                            result_queue.put({
+                                'type': 'segmentation_done',
+                                'planes': segmentation['planes'],
+                                'elapsed': time.perf_counter() - segmentation['start_time'],
+                                'cancelled': True
+                            })
+                    
+                    elif command['command'] == 'clear_segmentation':
+                        if segmentation is not None:
+                            if segmentation['job'] is not None:
+                                segmentation['job'].close()
+                                segmentation['pool'].terminate()
+                            if segmentation['cloud'] is cloud:
+                                if segmentation['original_colors'] is not None:
+                                    cloud.colors = o3d.utility.Vector3dVector(segmentation['original_colors'])
+                                else:
+                                    cloud.colors = o3d.utility.Vector3dVector()
+                                scalar_fields.pop('plane', None)
+                                scene_cache = None
+                                vis.update_geometry(cloud)
+                                vis.update_renderer()
+                                post_frame()
+                            segmentation = None
+                    
+                    elif command['command'] == 'cluster_objects':
+                        if cloud is None or len(cloud.points) == 0:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': "No point cloud to cluster"
+                            })
+                            continue
+                        
+                        if clustering is not None and clustering['job'] is not None:
+                            clustering['pool'].terminate()
+                        
+                        # Clusters are painted over the cloud's own colours, kept to restore them
+                        if clustering is None or clustering['cloud'] is not cloud:
+                            original_colors = np.asarray(cloud.colors).copy() if cloud.has_colors() else None
+                        else:
+                            original_colors = clustering['original_colors']
+                            if clustering['isolated'] is not None:
+                                vis.remove_geometry(clustering['isolated'], reset_bounding_box=False)
+                                vis.add_geometry(cloud, reset_bounding_box=False)
+                            if clustering['boxes'] is not None:
+                                vis.remove_geometry(clustering['boxes'], reset_bounding_box=False)
+                        processes = max(1, min(4, (os.cpu_count() or 1) - 1))
+                        pool = worker_pool(processes)
+                        clustering = {
+                            'cloud': cloud,
+                            'original_colors': original_colors,
+                            'pool': pool,
+                            'job': cluster_points(
+                                np.asarray(cloud.points), pool, processes,
+                                voxel_size=command.get('voxel_size'),
+                                min_points=command.get('min_points')
+                            ),
+                            'labels': None,
+                            'boxes': None,
+                            'isolated': None,
+                            'cluster_boxes': None,
+                            'colors': None,
+                            'deleted': set(),
+                            'last_progress': 0.0,
+                            'start_time': time.perf_counter()
+                        }
+                        scalar_fields.pop('cluster', None)
+                    
+                    elif command['command'] == 'cancel_clustering':
+                        if clustering is not None and clustering['job'] is not None:
+                            clustering['job'].close()
+                            clustering['job'] = None
+                            clustering['pool'].terminate()
+                            result_queue.put({
+                                'type': 'clustering_cancelled',
+                                'elapsed': time.perf_counter() - clustering['start_time']
+                            })
+                    
+                    elif command['command'] == 'isolate_cluster':
+                        # index None shows the whole cloud again
+                        if clustering is None or clustering['labels'] is None or clustering['cloud'] is not cloud:
+                            continue
+                        index = command.get('index')
+                        if clustering['isolated'] is not None:
+                            vis.remove_geometry(clustering['isolated'], reset_bounding_box=False)
+                            clustering['isolated'] = None
+                            if index is None:
+                                vis.add_geometry(cloud, reset_bounding_box=False)
+                        elif index is not None:
+                            vis.remove_geometry(cloud, reset_bounding_box=False)
+                        if index is not None:
+                            clustering['isolated'] = cloud.select_by_index(np.flatnonzero(clustering['labels'] == index))
+                            vis.add_geometry(clustering['isolated'], reset_bounding_box=False)
+                            view_control.set_lookat(clustering['isolated'].get_center())
+                        vis.poll_events()
+                        vis.update_renderer()
+                        post_frame()
+                    
+                    elif command['command'] == 'clear_clustering':
+                        if clustering is not None:
+                            if clustering['job'] is not None:
+                                clustering['job'].close()
+                                clustering['pool'].terminate()
+                            if clustering['cloud'] is cloud:
+                                if clustering['isolated'] is not None:
+                                    vis.remove_geometry(clustering['isolated'], reset_bounding_box=False)
+                                    vis.add_geometry(cloud, reset_bounding_box=False)
+                                if clustering['boxes'] is not None:
+                                    vis.remove_geometry(clustering['boxes'], reset_bounding_box=False)
+                                if clustering['original_colors'] is not None:
+                                    cloud.colors = o3d.utility.Vector3dVector(clustering['original_colors'])
+                                else:
+                                    cloud.colors = o3d.utility.Vector3dVector()
+                                scalar_fields.pop('cluster', None)
+                                scene_cache = None
+                                vis.update_geometry(cloud)
+                                vis.update_renderer()
+                                post_frame()
+                            clustering = None
+                    
+                    elif command['command'] == 'set_memory_budget':
+                        memory_budget.limit = int(command['limit'])
+                        reported_memory = None
+                        last_memory_check = 0.0
+                    
+                    elif command['command'] == 'export_cloud':
+                        if cloud is None:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': "No point cloud to export"
+                            })
+                            continue
+                        
+                        export_path = command['path']
+                        try:
+                            indices = command.get('indices')
+                            if command.get('indices_path'):
+                                indices = read_index_set(command['indices_path'])
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error exporting point cloud: {str(e)}"
+                            })
+                            continue
+                        
+                        # Colours and in-memory fields are painted in place by segmentation and
+                        # clustering, so the export gets its own copy; points and normals are
+                        # only ever replaced, and the references keep the current arrays alive
+                        export = {'path': export_path, 'cancel': threading.Event()}
+                        export['thread'] = threading.Thread(target=run_export, args=(
+                            export,
+                            np.asarray(cloud.points),
+                            np.array(cloud.colors) if cloud.has_colors() else None,
+                            np.asarray(cloud.normals) if cloud.has_normals() else None,
+                            {name: values if isinstance(values, np.memmap) else np.array(values)
+                             for name, values in scalar_fields.items()},
+                            indices
+                        ), daemon=True)
+                        exports.append(export)
+                        export['thread'].start()
+                    
+                    elif command['command'] == 'cancel_export':
+                        for export in exports:
+                            export['cancel'].set()
+                    
+                    elif command['command'] == 'get_camera':
+                        if view_control is not None:
+                            result_queue.put({
+                                'type': 'camera',
+                                'camera': camera_to_dict(view_control),
+                                'purpose': command.get('purpose')
                             })
                     
-                    # commands for rotation and zoom
-                    elif command['command'] == 'rotate':
-                        if cloud is not None and view_control is not None:
-                            dx = command['dx']
-                            dy = command['dy']
-                            
-                            
-                            # Get current view parameters
-                            params = view_control.convert_to_pinhole_camera_parameters()
-                            
-                            # Rotate view using view_control methods
-                            view_control.rotate(dx, dy)
-                            
+                    elif command['command'] == 'set_camera':
+                        if view_control is not None:
+                            camera_from_dict(view_control, command['camera'])
                             vis.update_renderer()
                             
                             # Capture and send rendered image
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
-                            
+                            if cloud is not None:
+                                post_frame()
+                    
+                    elif command['command'] == 'add_keyframe':
+                        if view_control is not None:
+                            keyframes.append(camera_to_dict(view_control))
                             result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
+                                'type': 'keyframes',
+                                'count': len(keyframes)
                             })
                     
-                    elif command['command'] == 'zoom':
-                        if cloud is not None and view_control is not None:
-                            zoom_factor = command['factor']
-                            
-                            # Apply zoom based on direction
-                            view_control.scale(zoom_factor)
+                    elif command['command'] == 'clear_keyframes':
+                        keyframes.clear()
+                        result_queue.put({
+                            'type': 'keyframes',
+                            'count': 0
+                        })
+                    
+                    # Offscreen recording of a turntable or keyframe camera path
+                    elif command['command'] == 'record_camera_path':
+                        if cloud is None:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': "Load a point cloud before recording"
+                            })
+                            continue
+                        if command['mode'] == 'keyframes' and len(keyframes) < 2:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': "Add at least two keyframes to record a camera path"
+                            })
+                            continue
+                        
+                        width = command['width']
+                        height = command['height']
+                        fps = command['fps']
+                        num_frames = max(int(round(command['duration'] * fps)), 2)
+                        recorder = None
+                        sink = None
+                        
+                        try:
+                            if command['mode'] == 'turntable':
+                                path = turntable_path(camera_to_dict(view_control), cloud.get_center(), num_frames)
+                            else:
+                                path = interpolate_camera_path(keyframes, num_frames)
+                            path = [scale_camera(camera, width, height) for camera in path]
                             
-                            # Update visualization
-                            vis.poll_events()
-                            vis.update_renderer()
+                            # A dedicated hidden window renders at the requested resolution
+                            recorder = o3d.visualization.Visualizer()
+                            recorder.create_window(visible=False, width=width, height=height)
+                            recorder.add_geometry(cloud)
+                            recorder_opt = recorder.get_render_option()
+                            opt = vis.get_render_option()
+                            recorder_opt.point_size = opt.point_size
+                            recorder_opt.background_color = np.asarray(opt.background_color)
+                            recorder_opt.light_on = opt.light_on
+                            recorder_view = recorder.get_view_control()
                             
-                            # Capture and send rendered image
-                            img_path = os.path.join(temp_dir, 'render.png')
-                            vis.capture_screen_image(img_path, do_render=True)
+                            sink = FrameSink(command['output_path'], width, height, fps)
+                            start_time = time.perf_counter()
+                            for index, camera in enumerate(path):
+                                camera_from_dict(recorder_view, camera)
+                                sink.write(capture_frame(recorder, eye_dome[0]))
+                                
+                                if index % 10 == 0:
+                                    rate = (index + 1) / max(time.perf_counter() - start_time, 1e-6)
+                                    result_queue.put({
+                                        'type': 'progress',
+                                        'fraction': (index + 1) / len(path),
+                                        'message': f"Recording frame {index + 1}/{len(path)} ({rate:.1f} frames/s)"
+                                    })
+                            render_time = time.perf_counter() - start_time
+                            sink.close()
+                            sink = None
+                            total_time = time.perf_counter() - start_time
                             
                             result_queue.put({
-                                'type': 'image',
-                                'image_path': img_path
+                                'type': 'progress',
+                                'fraction': 1.0
                             })
-                
+                            result_queue.put({
+                                'type': 'status',
+                                'message': f"Recorded {len(path)} frames to {os.path.basename(command['output_path'])}: "
+                                           f"{len(path) / max(render_time, 1e-6):.1f} frames/s rendered, "
+                                           f"{len(path) / max(total_time, 1e-6):.1f} frames/s written"
+                            })
+                        
+                        except Exception as e:
+                            result_queue.put({
+                                'type': 'error',
+                                'message': f"Error recording camera path: {str(e)}"
+                            })
+                        
+                        finally:
+                            if sink is not None:
+                                try:
+                                    sink.close()
+                                except Exception:
+                                    pass
+                            if recorder is not None:
+                                recorder.destroy_window()
+                    
+                    elif command['command'] == 'init':
+                        opt = vis.get_render_option()
+                        opt.background_color = np.array(command['bg_color'])
+                        opt.point_size = command['point_size']
+                        opt.show_coordinate_frame = command['show_axes']
+                        vis.update_renderer()
+                    
+                    elif command['command'] in ('set_material_type', 'set_material'):
+                        # The legacy renderer has no material model; the choice only affects the GUI
+                        pass
+                    
+                    elif command['command'] == 'quit':
+                        running = False
+                    
+                    else:
+                        result_queue.put({'type': 'error', 'message': f"Unknown command: {command['command']}"})
+
             except queue.Empty:
                 pass
             except Exception as e:
@@ -404,23 +4062,569 @@ def visualization_worker(render_queue, result_queue):
                     'message': f"Visualization process error: {str(e)}"
                 })
             
-            # Render and update at least once per second
-            time.sleep(0.1)
+            # Sub-commands of a batch run without rendering in between
+            if batch_commands:
+                continue
+            
+            # Keep within the memory budget and report usage when it changes
+            if time.perf_counter() - last_memory_check > 1.0:
+                last_memory_check = time.perf_counter()
+                if parent is not None and not parent.is_alive():
+                    running = False
+                if measure_memory() > memory_budget.limit:
+                    evicted = evict_derived()
+                    if evicted:
+                        measure_memory()
+                        result_queue.put({
+                            'type': 'warning',
+                            'message': f"Memory budget exceeded, released {' and '.join(evicted)}"
+                        })
+                if memory_budget.usage != reported_memory:
+                    reported_memory = dict(memory_budget.usage)
+                    result_queue.put(memory_budget.report())
+            
+            # A sequence stops once another cloud has replaced its geometry
+            if sequence is not None and cloud is not sequence['cloud']:
+                sequence['prefetcher'].close()
+                sequence = None
+            
+            # Stream ingestion stops once another cloud has replaced its geometry
+            if stream is not None and stream['cloud'] is not None and cloud is not stream['cloud']:
+                stream['receiver'].stop()
+                stream = None
+            
+            # Show newly streamed points, at most max_rate times per second
+            if stream is not None:
+                now = time.perf_counter()
+                buffer = stream['buffer']
+                if now >= stream['next_update'] and buffer.version != stream['shown_version']:
+                    stream['shown_version'] = buffer.version
+                    stream['next_update'] = now + stream['interval']
+                    points, colors = buffer.snapshot()
+                    
+                    if stream['cloud'] is None:
+                        # First packet: create the geometry and frame it
+                        cloud = o3d.geometry.PointCloud()
+                        cloud.points = o3d.utility.Vector3dVector(points)
+                        cloud.colors = o3d.utility.Vector3dVector(colors)
+                        stream['cloud'] = cloud
+                        scene_cache = None
+                        scalar_fields = {}
+                        selected_points.clear()
+                        moving_cloud = None
+                        moving_original = None
+                        alignment_transform = None
+                        vis.clear_geometries()
+                        vis.add_geometry(cloud)
+                        vis.reset_view_point(True)
+                    else:
+                        cloud.points = o3d.utility.Vector3dVector(points)
+                        cloud.colors = o3d.utility.Vector3dVector(colors)
+                        scene_cache = None
+                        vis.update_geometry(cloud)
+                    vis.poll_events()
+                    vis.update_renderer()
+                    post_frame()
+                
+                if now - stream['last_report'] > 1.0:
+                    receiver = stream['receiver']
+                    rate = (receiver.points_received - stream['reported_points']) / (now - stream['last_report'])
+                    stream['last_report'] = now
+                    stream['reported_points'] = receiver.points_received
+                    result_queue.put({
+                        'type': 'stream_state',
+                        'points_per_second': rate,
+                        'buffered': buffer.count,
+                        'capacity': buffer.capacity,
+                        'packets': receiver.packets,
+                        'dropped': receiver.dropped_packets,
+                        'error': str(receiver.error) if receiver.error else None
+                    })
+            
+            # Advance sequence playback when the next frame is due
+            if sequence is not None:
+                now = time.perf_counter()
+                if (sequence['playing'] or sequence['display_due']) and now >= sequence['next_time']:
+                    index = sequence['index']
+                    if sequence['playing']:
+                        index = (index + 1) % len(sequence['paths'])
+                    try:
+                        frame = sequence['prefetcher'].get(index)
+                    except Exception as e:
+                        # Skip frames that fail to parse
+                        result_queue.put({
+                            'type': 'status',
+                            'message': f"Skipped unreadable frame {os.path.basename(sequence['paths'][index])}: {str(e)}"
+                        })
+                        frame = (np.asarray(cloud.points), np.asarray(cloud.colors) if cloud.has_colors() else None)
+                    
+                    interval = 1.0 / (sequence['fps'] * sequence['speed'])
+                    if frame is None:
+                        # Prefetch fell behind: hold the current frame and try again shortly
+                        sequence['prefetcher'].request(index)
+                        if sequence['playing']:
+                            sequence['underruns'] += 1
+                        sequence['next_time'] = now + min(interval, 0.01)
+                    else:
+                        points, colors = frame
+                        # Swap the arrays into the existing geometry instead of re-adding it
+                        cloud.points = o3d.utility.Vector3dVector(points)
+                        if colors is not None:
+                            cloud.colors = o3d.utility.Vector3dVector(colors)
+                        elif cloud.has_colors():
+                            cloud.colors = o3d.utility.Vector3dVector()
+                        vis.update_geometry(cloud)
+                        vis.poll_events()
+                        vis.update_renderer()
+                        post_frame()
+                        scene_cache = None
+                        
+                        sequence['index'] = index
+                        sequence['display_due'] = False
+                        sequence['shown_times'].append(now)
+                        sequence['prefetcher'].request((index + 1) % len(sequence['paths']))
+                        # Hold the target rate without bursting to catch up after a stall
+                        sequence['next_time'] = max(sequence['next_time'] + interval, now)
+                
+                if now - sequence['last_report'] > 0.5:
+                    sequence['last_report'] = now
+                    shown = sequence['shown_times']
+                    achieved = 0.0
+                    if sequence['playing'] and len(shown) > 1 and shown[-1] > shown[0]:
+                        achieved = (len(shown) - 1) / (shown[-1] - shown[0])
+                    result_queue.put({
+                        'type': 'sequence_state',
+                        'index': sequence['index'],
+                        'count': len(sequence['paths']),
+                        'playing': sequence['playing'],
+                        'fps': achieved,
+                        'target_fps': sequence['fps'] * sequence['speed'],
+                        'buffered': sequence['prefetcher'].ready_count(),
+                        'depth': sequence['prefetcher'].depth,
+                        'underruns': sequence['underruns']
+                    })
+            
+            # Advance plane segmentation; it is dropped if the cloud is replaced meanwhile
+            if segmentation is not None and segmentation['cloud'] is not cloud:
+                if segmentation['job'] is not None:
+                    segmentation['job'].close()
+                segmentation['pool'].terminate()
+                segmentation = None
+            elif segmentation is not None and segmentation['job'] is not None:
+                try:
+                    item = next(segmentation['job'])
+                    if item[0] == 'plane':
+                        plane = item[1]
+                        color = PLANE_COLORS[plane['index'] % len(PLANE_COLORS)]
+                        colors = np.asarray(cloud.colors)
+                        colors[plane['indices']] = color
+                        segmentation['labels'][plane['indices']] = plane['index']
+                        segmentation['planes'] += 1
+                        scalar_fields['plane'] = segmentation['labels']
+                        scene_cache = None
+                        vis.update_geometry(cloud)
+                        vis.update_renderer()
+                        post_frame()
+                        result_queue.put({
+                            'type': 'plane',
+                            'index': plane['index'],
+                            'points': len(plane['indices']),
+                            'normal': plane['normal'].tolist(),
+                            'offset': plane['offset'],
+                            'iterations': plane['iterations'],
+                            'color': color.tolist()
+                        })
+                    elif time.perf_counter() - segmentation['last_progress'] > 0.25:
+                        segmentation['last_progress'] = time.perf_counter()
+                        result_queue.put({
+                            'type': 'progress',
+                            'fraction': item[1],
+                            'message': item[2]
+                        })
+                except StopIteration:
+                    segmentation['job'] = None
+                    segmentation['pool'].terminate()
+                    result_queue.put({
+                        'type': 'segmentation_done',
+                        'planes': segmentation['planes'],
+                        'elapsed': time.perf_counter() - segmentation['start_time'],
+                        'cancelled': False
+                    })
+                except Exception as e:
+                    segmentation['job'] = None
+                    segmentation['pool'].terminate()
+                    result_queue.put({
+                        'type': 'error',
+                        'message': f"Error segmenting planes: {str(e)}"
+                    })
+            
+            # Advance the registration; it is dropped once its alignment is accepted, reverted or replaced
+            if registration is not None and moving_cloud is None:
+                registration['job'].close()
+                registration['pool'].terminate()
+                registration = None
+            elif registration is not None:
+                try:
+                    item = next(registration['job'])
+                    if item[0] == 'level':
+                        level = item[1]
+                        # Show the live transform after each pyramid level
+                        alignment_transform = level['transform']
+                        moving_cloud.points = o3d.utility.Vector3dVector(np.asarray(moving_original.points))
+                        moving_cloud.transform(alignment_transform)
+                        vis.update_geometry(moving_cloud)
+                        vis.update_renderer()
+                        post_frame()
+                        result_queue.put({
+                            'type': 'align_level',
+                            'level': level['level'],
+                            'levels': registration['levels'],
+                            'voxel_size': level['voxel_size'],
+                            'fitness': level['fitness'],
+                            'rmse': level['rmse'],
+                            'elapsed': level['elapsed'],
+                            'transform': np.asarray(alignment_transform).tolist()
+                        })
+                    elif time.perf_counter() - registration['last_progress'] > 0.25:
+                        registration['last_progress'] = time.perf_counter()
+                        result_queue.put({
+                            'type': 'progress',
+                            'fraction': item[1],
+                            'message': item[2]
+                        })
+                except StopIteration:
+                    registration['pool'].terminate()
+                    result_queue.put({
+                        'type': 'align_result',
+                        'transform': np.asarray(alignment_transform).tolist(),
+                        'elapsed': time.perf_counter() - registration['start_time']
+                    })
+                    registration = None
+                except Exception as e:
+                    registration['pool'].terminate()
+                    registration = None
+                    result_queue.put({
+                        'type': 'error',
+                        'message': f"Error aligning clouds: {str(e)}"
+                    })
+            
+            # Advance the cloud comparison; it is dropped if the cloud is replaced meanwhile
+            if comparison is not None and comparison['cloud'] is not cloud:
+                comparison['job'].close()
+                comparison['pool'].terminate()
+                comparison = None
+            elif comparison is not None:
+                try:
+                    item = next(comparison['job'])
+                    if item[0] == 'distances':
+                        comparison['job'].close()
+                        comparison['pool'].terminate()
+                        distances = np.load(item[1])
+                        os.remove(item[1])
+                        elapsed = time.perf_counter() - comparison['start_time']
+                        comparison = None
+                        
+                        stats, counts, edges = summarize_distances(distances)
+                        cloud.colors = o3d.utility.Vector3dVector(apply_colormap(distances, 0.0, edges[-1]))
+                        scalar_fields['distance'] = distances
+                        scene_cache = None
+                        vis.update_geometry(cloud)
+                        vis.update_renderer()
+                        post_frame()
+                        
+                        result_queue.put({
+                            'type': 'compare_stats',
+                            'stats': stats,
+                            'counts': counts,
+                            'edges': edges,
+                            'elapsed': elapsed
+                        })
+                        result_queue.put({
+                            'type': 'status',
+                            'message': f"Compared {stats['count']} points in {elapsed:.1f}s "
+                                       f"(mean {stats['mean']:.4f}, max {stats['max']:.4f})"
+                        })
+                    elif time.perf_counter() - comparison['last_progress'] > 0.25:
+                        comparison['last_progress'] = time.perf_counter()
+                        result_queue.put({
+                            'type': 'progress',
+                            'fraction': item[1],
+                            'message': item[2]
+                        })
+                except Exception as e:
+                    comparison['job'].close()
+                    comparison['pool'].terminate()
+                    comparison = None
+                    result_queue.put({
+                        'type': 'error',
+                        'message': f"Error comparing clouds: {str(e)}"
+                    })
+        
+            # Edits no longer apply once another cloud is shown
+            if editing is not None and editing['cloud'] is not cloud:
+                editing = None
+            
+            # Record finished outlier removal; it is dropped if the cloud is replaced meanwhile
+            if filtering is not None and (filtering['cloud'] is not cloud or filtering['result'].ready()):
+                try:
+                    if filtering['cloud'] is cloud and editing is not None:
+                        outliers = filtering['result'].get()
+                        journal = editing['journal']
+                        previous_key = geometry_key()
+                        previous_kept = journal.kept
+                        previous_cloud = cloud
+                        removed = np.zeros(len(cloud.points), dtype=bool)
+                        removed[outliers] = True
+                        journal.record("Remove outliers", removed=journal.base_mask(removed))
+                        cloud, scalar_fields = show_edits(journal)
+                        editing['cloud'] = cloud
+                        scene_cache = None
+                        carry_statistics(previous_key, previous_kept, journal)
+                        carry_clustering(previous_cloud, previous_kept, journal)
+                        result_queue.put({
+                            'type': 'status',
+                            'message': f"Removed {len(outliers):,} outliers in "
+                                       f"{time.perf_counter() - filtering['start_time']:.1f}s"
+                        })
+                except Exception as e:
+                    result_queue.put({
+                        'type': 'error',
+                        'message': f"Error removing outliers: {str(e)}"
+                    })
+                finally:
+                    filtering['pool'].terminate()
+                    try:
+                        os.remove(filtering['points_path'])
+                    except OSError:
+                        pass
+                    filtering = None
+            
+            # Advance object clustering; it is dropped if the cloud is replaced meanwhile
+            if clustering is not None and clustering['cloud'] is not cloud:
+                if clustering['job'] is not None:
+                    clustering['job'].close()
+                clustering['pool'].terminate()
+                clustering = None
+            elif clustering is not None and clustering['job'] is not None:
+                try:
+                    item = next(clustering['job'])
+                    if item[0] == 'clusters':
+                        found = item[1]
+                        clustering['job'] = None
+                        clustering['pool'].terminate()
+                        clustering['labels'] = found['labels']
+                        
+                        colors = cluster_colors(len(found['counts']))
+                        point_colors = np.full((len(found['labels']), 3), 0.6)
+                        clustered = found['labels'] >= 0
+                        point_colors[clustered] = colors[found['labels'][clustered]]
+                        cloud.colors = o3d.utility.Vector3dVector(point_colors)
+                        scalar_fields['cluster'] = found['labels'].astype(np.float32)
+                        scene_cache = None
+                        vis.update_geometry(cloud)
+                        
+                        # Outline the largest clusters; thousands of boxes would only clutter the view
+                        shown = min(len(found['counts']), 1000)
+                        clustering['cluster_boxes'] = found['boxes'][:shown]
+                        clustering['colors'] = colors[:shown]
+                        if shown:
+                            clustering['boxes'] = box_line_set(found['boxes'][:shown], colors[:shown])
+                            vis.add_geometry(clustering['boxes'], reset_bounding_box=False)
+                        vis.update_renderer()
+                        post_frame()
+                        result_queue.put({
+                            'type': 'clusters',
+                            'clusters': [
+                                {
+                                    'index': index,
+                                    'points': int(found['counts'][index]),
+                                    'min': found['boxes'][index, 0].tolist(),
+                                    'max': found['boxes'][index, 1].tolist(),
+                                    'color': colors[index].tolist()
+                                }
+                                for index in range(shown)
+                            ],
+                            'total': len(found['counts']),
+                            'noise': int(np.count_nonzero(~clustered)),
+                            'voxel_size': found['voxel_size'],
+                            'cells': found['cells'],
+                            'blocks': found['blocks'],
+                            'elapsed': time.perf_counter() - clustering['start_time']
+                        })
+                    elif time.perf_counter() - clustering['last_progress'] > 0.25:
+                        clustering['last_progress'] = time.perf_counter()
+                        result_queue.put({
+                            'type': 'progress',
+                            'fraction': item[1],
+                            'message': item[2]
+                        })
+                except StopIteration:
+                    clustering['job'] = None
+                    clustering['pool'].terminate()
+                except Exception as e:
+                    clustering['job'] = None
+                    clustering['pool'].terminate()
+                    result_queue.put({
+                        'type': 'error',
+                        'message': f"Error clustering points: {str(e)}"
+                    })
+        
+            # Grow the statistics sample, or refine it, a slice at a time
+            if statistics is not None and cloud is not None and len(cloud.points) > 1:
+                key = geometry_key()
+                # Live streams change many times a second; follow them at most every few seconds
+                if statistics['key'] != key and (stream is None or statistics['key'] is None
+                                                 or time.perf_counter() - statistics['attached'] > 5.0):
+                    # Cached estimates keep only their sample, not a view of the old cloud's points
+                    if statistics['stats'] is not None:
+                        statistics['stats'].points = None
+                    if key in statistics_cache:
+                        statistics_cache.move_to_end(key)
+                        stats = statistics_cache[key]
+                        stats.points = np.asarray(cloud.points)
+                    else:
+                        stats = CloudStatistics(np.asarray(cloud.points))
+                        # Stream versions are never revisited, so they are not cached
+                        if stream is None:
+                            statistics_cache[key] = stats
+                            while len(statistics_cache) > 4:
+                                statistics_cache.popitem(last=False)
+                    
+                    # Spacing queries need an index over every point, rebuilt in the pool process
+                    if statistics['own_path'] is not None:
+                        statistics['stale_paths'].append(statistics['own_path'])
+                        statistics['own_path'] = None
+                    if scene_cache is not None and scene_cache.get('step', 1) == 1:
+                        points_path = scene_cache['points']
+                    else:
+                        statistics_serial += 1
+                        points_path = os.path.join(temp_dir, f'statistics_points_{statistics_serial}.npy')
+                        np.save(points_path, np.asarray(cloud.points))
+                        statistics['own_path'] = points_path
+                    if statistics['pool'] is None:
+                        statistics['pool'] = worker_pool(1)
+                    # The single pool process runs tasks in order, so later queries use the new index
+                    statistics.update({
+                        'key': key,
+                        'attached': time.perf_counter(),
+                        'stats': stats,
+                        'points_path': points_path,
+                        'index_ready': statistics['pool'].apply_async(_distance_pool_init, (points_path,)),
+                        'pending': collections.deque(),
+                        'refining': None,
+                        'progress': 0.0,
+                        'exact_chunks': 0,
+                        'last_report': 0.0,
+                        'changed': True
+                    })
+                
+                # Superseded point files go once nothing queued can still read them
+                if statistics['stale_paths'] and not statistics['pending'] and statistics['index_ready'].ready():
+                    for stale_path in statistics['stale_paths']:
+                        try:
+                            os.remove(stale_path)
+                        except OSError:
+                            pass
+                    statistics['stale_paths'] = []
+                
+                stats = statistics['stats']
+                if statistics['refining'] is not None:
+                    deadline = time.perf_counter() + 0.05
+                    try:
+                        while time.perf_counter() < deadline:
+                            statistics['progress'] = next(statistics['refining'])
+                    except StopIteration:
+                        statistics['refining'] = None
+                    statistics['changed'] = True
+                elif stats.sampling:
+                    stats.step()
+                    queries = stats.rng.integers(0, stats.count, 2000)
+                    statistics['pending'].append((statistics['pool'].apply_async(
+                        _spacing_chunk, (statistics['points_path'], queries)
+                    ), False))
+                    statistics['changed'] = True
+                
+                while statistics['pending'] and statistics['pending'][0][0].ready():
+                    result, exact = statistics['pending'].popleft()
+                    try:
+                        distances = result.get()
+                    except Exception as e:
+                        result_queue.put({
+                            'type': 'status',
+                            'message': f"Point spacing query failed: {str(e)}"
+                        })
+                        continue
+                    stats.add_spacing(distances, exact and not statistics['pending'])
+                    statistics['changed'] = True
+                
+                if statistics['changed'] and time.perf_counter() - statistics['last_report'] > 0.5:
+                    statistics['changed'] = False
+                    statistics['last_report'] = time.perf_counter()
+                    summary = stats.summary()
+                    summary['type'] = 'statistics'
+                    summary['refining'] = statistics['refining'] is not None
+                    if statistics['exact_chunks']:
+                        done = statistics['exact_chunks'] - len(statistics['pending'])
+                        summary['progress'] = 0.5 * statistics['progress'] + 0.5 * done / statistics['exact_chunks']
+                    result_queue.put(summary)
             
             # Update visualization if cloud is loaded
             if cloud is not None:
                 vis.poll_events()
                 vis.update_renderer()
                 
-                # Capture and send rendered image occasionally
-                if np.random.random() < 0.05:  # ~5% chance each iteration
-                    img_path = os.path.join(temp_dir, 'render.png')
-                    vis.capture_screen_image(img_path, do_render=True)
-                    
-                    result_queue.put({
-                        'type': 'image',
-                        'image_path': img_path
-                    })
+                # Periodically snapshot the scene so a restarted worker can restore it
+                if snapshot_path is not None and time.perf_counter() - last_snapshot > 2.0:
+                    last_snapshot = time.perf_counter()
+                    # A live stream, playing sequence or running job changes the cloud
+                    # continuously; keep the last snapshot until the scene settles
+                    live = (stream is not None
+                            or (sequence is not None and sequence['playing'])
+                            or (segmentation is not None and segmentation['job'] is not None)
+                            or (clustering is not None and clustering['job'] is not None))
+                    if scene_cache is not None or not (live or last_snapshot - last_scene_write < 30.0):
+                        try:
+                            stale_cache = None
+                            if scene_cache is None:
+                                # Clouds not backed by a file cache are written next to the snapshot
+                                snapshot_serial += 1
+                                scene_cache = write_cloud_cache(
+                                    cloud, os.path.join(os.path.dirname(snapshot_path), f'scene_{os.getpid()}_{snapshot_serial}'),
+                                    scalar_fields
+                                )
+                                last_scene_write = time.perf_counter()
+                                stale_cache = derived_cache
+                                derived_cache = scene_cache
+                            opt = vis.get_render_option()
+                            state = {
+                                'scene_cache': scene_cache,
+                                'camera': camera_to_dict(view_control),
+                                'point_size': opt.point_size,
+                                'background_color': np.asarray(opt.background_color).tolist(),
+                                'light_on': opt.light_on,
+                                'eye_dome': eye_dome[0],
+                                'selected_points': [np.asarray(p).tolist() for p in selected_points]
+                            }
+                            if state != saved_snapshot:
+                                save_worker_snapshot(snapshot_path, state)
+                                saved_snapshot = state
+                            snapshot_error = None
+                            
+                            # The previous derived arrays are unreferenced once the new snapshot is on disk
+                            if stale_cache is not None:
+                                for stale_path in cache_paths(stale_cache):
+                                    try:
+                                        os.remove(stale_path)
+                                    except OSError:
+                                        pass
+                        except Exception as e:
+                            # Report once, not on every retry
+                            if str(e) != snapshot_error:
+                                snapshot_error = str(e)
+                                result_queue.put({
+                                    'type': 'status',
+                                    'message': f"Failed to save the crash-recovery snapshot: {snapshot_error}"
+                                })
     
     except Exception as e:
         result_queue.put({
@@ -430,6 +4634,25 @@ def visualization_worker(render_queue, result_queue):
     
     finally:
         # Clean up
+        if sequence is not None:
+            sequence['prefetcher'].close()
+        if stream is not None:
+            stream['receiver'].stop()
+        if statistics is not None and statistics['pool'] is not None:
+            statistics['pool'].terminate()
+        if segmentation is not None:
+            segmentation['pool'].terminate()
+        if comparison is not None:
+            comparison['pool'].terminate()
+        if registration is not None:
+            registration['pool'].terminate()
+        if clustering is not None:
+            clustering['pool'].terminate()
+        if filtering is not None:
+            filtering['pool'].terminate()
+        for export in list(exports):
+            export['cancel'].set()
+            export['thread'].join(5.0)
         if vis is not None:
             vis.destroy_window()
         # Clean up temp directory
@@ -443,6 +4666,420 @@ def visualization_worker(render_queue, result_queue):
         except:
             pass
 
+class FramePresenter:
+    """Present rendered frames on a Tk canvas.
+
+    Keeps a single canvas image item and a pair of preallocated PhotoImages
+    for the current canvas size. Each frame is pasted into the back buffer,
+    which is then swapped onto the item, so no canvas items or Tk images are
+    created per frame. Only the newest submitted frame is presented; frames
+    replaced before presentation, or skipped in the mailbox sequence, are
+    counted as dropped.
+    """
+
+    def __init__(self, canvas, default_size=(800, 600)):
+        self.canvas = canvas
+        self.default_size = default_size
+        self.image_item = None
+        self.buffers = []
+        self.buffer_size = None
+        self.back_index = 0
+        self.pending = None
+
+        # Frame statistics
+        self.presented_frames = 0
+        self.dropped_frames = 0
+        self.present_times = collections.deque(maxlen=60)
+
+    def submit(self, pixels, skipped=0):
+        """Queue a frame for presentation, replacing any frame not yet shown.
+
+        ``skipped`` counts frames the worker overwrote in its mailbox before
+        they were taken.
+        """
+        if self.pending is not None:
+            self.dropped_frames += 1
+        self.dropped_frames += skipped
+        self.pending = pixels
+
+    def present(self):
+        """Draw the newest pending frame; returns False if it could not be shown"""
+        if self.pending is None:
+            return True
+        pixels = self.pending
+        self.pending = None
+
+        try:
+            img = pixels if isinstance(pixels, Image.Image) else Image.fromarray(pixels, 'RGB')
+        except Exception as e:
+            print(f"Error displaying image: {e}")
+            return False
+
+        self.present_image(img)
+        return True
+
+    def present_image(self, img):
+        """Draw a PIL image onto the canvas, reusing the preallocated buffers"""
+        size = self.target_size()
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+
+        if size != self.buffer_size:
+            # Preallocate the front and back buffers for this size
+            self.buffers = [ImageTk.PhotoImage('RGB', size), ImageTk.PhotoImage('RGB', size)]
+            self.buffer_size = size
+            self.back_index = 0
+
+        back = self.buffers[self.back_index]
+        back.paste(img)
+
+        # Placeholder items from a failed render are no longer needed
+        self.canvas.delete("placeholder")
+        if self.image_item is None or not self.canvas.type(self.image_item):
+            self.image_item = self.canvas.create_image(0, 0, image=back, anchor=tk.NW)
+        else:
+            self.canvas.itemconfig(self.image_item, image=back)
+        self.back_index = 1 - self.back_index
+
+        self.presented_frames += 1
+        self.present_times.append(time.perf_counter())
+
+    def target_size(self):
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width > 1 and height > 1:
+            return (width, height)
+        return self.default_size
+
+    @property
+    def fps(self):
+        """Presented frames per second over the recent window"""
+        if len(self.present_times) < 2:
+            return 0.0
+        span = self.present_times[-1] - self.present_times[0]
+        if span <= 0:
+            return 0.0
+        # Frames older than a couple of seconds mean the view is idle
+        if time.perf_counter() - self.present_times[-1] > 2.0:
+            return 0.0
+        return (len(self.present_times) - 1) / span
+
+
+class RenderWorker:
+    """A visualization process with its command queue, control channel and frame mailbox.
+
+    Control messages are tagged with the viewport index and handed to the
+    shared GUI inbox; ``notify`` is called whenever a message or frame arrives.
+    """
+
+    def __init__(self, index, session_dir, inbox, notify):
+        self.index = index
+        self.snapshot_path = os.path.join(session_dir, f'snapshot_{index}.json')
+        self.inbox = inbox
+        self.notify = notify
+        self.process = None
+        self.stopping = False
+        self.memory_limit = None
+
+        # Newest frame taken from the mailbox, kept for compositing
+        self.frame = None
+        self.last_sequence = 0
+
+        # Supervision state
+        self.restart_times = collections.deque(maxlen=3)
+        self.restart_started = None
+
+    def start(self, restore=False):
+        """Spawn the process with fresh channels and start its listener threads.
+
+        restore is set when replacing a crashed process, which then rebuilds
+        its scene from the last snapshot.
+        """
+        # A killed worker may have held a queue or mailbox lock, so never reuse them
+        context = worker_context()
+        self.render_queue = context.Queue()
+        self.result_queue = context.Queue()
+        self.frame_mailbox = FrameMailbox(context=context)
+        self.last_sequence = 0
+
+        self.process = context.Process(
+            target=visualization_worker,
+            args=(self.render_queue, self.result_queue, self.frame_mailbox, self.snapshot_path, self.memory_limit,
+                  restore)
+        )
+        # Not daemonic, since daemonic processes cannot run the worker's process
+        # pools. The GUI stops workers at exit and a worker exits once the GUI is gone
+        self.process.daemon = False
+        self.process.start()
+
+        threading.Thread(target=self.listen_for_control, args=(self.result_queue,), daemon=True).start()
+        threading.Thread(target=self.listen_for_frames, args=(self.frame_mailbox,), daemon=True).start()
+
+    def listen_for_control(self, result_queue):
+        # Wakes periodically so the thread ends once its process is replaced or removed
+        while result_queue is self.result_queue and not self.stopping:
+            try:
+                result = result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError, ValueError):
+                return
+            # Messages from a replaced or removed process are stale
+            if result_queue is not self.result_queue or self.stopping:
+                return
+            result['viewport'] = self.index
+            self.inbox.put(result)
+            self.notify()
+
+    def listen_for_frames(self, frame_mailbox):
+        while frame_mailbox is self.frame_mailbox and not self.stopping:
+            if frame_mailbox.wait(0.5):
+                frame_mailbox.ready.clear()
+                self.notify()
+
+    def take_frame(self):
+        """Fetch the newest frame; returns how many frames were skipped, or None if nothing is new"""
+        frame = self.frame_mailbox.take(self.last_sequence)
+        if frame is None:
+            return None
+        sequence, self.frame = frame
+        skipped = sequence - self.last_sequence - 1 if self.last_sequence else 0
+        self.last_sequence = sequence
+        return skipped
+
+    def send(self, command):
+        self.render_queue.put(command)
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout=0.5):
+        self.stopping = True
+        if self.is_alive():
+            self.send({'command': 'quit'})
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        
+        # A viewport added later with this index must start empty, not restore this scene
+        try:
+            snapshot = load_worker_snapshot(self.snapshot_path)
+        except (OSError, ValueError):
+            snapshot = None
+        stale = [self.snapshot_path]
+        if snapshot is not None and snapshot.get('scene_cache'):
+            scene_paths = cache_paths(snapshot['scene_cache'])
+            stale += [path for path in scene_paths if os.path.dirname(path) == os.path.dirname(self.snapshot_path)]
+        for path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _json_default(value):
+    """Serialise NumPy values in worker messages"""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class AutomationServer:
+    """Local JSON-RPC 2.0 server for scripted control of the viewer.
+
+    Requests are newline-delimited JSON over TCP on localhost. A request's
+    method is a worker command name ('load_file', 'set_camera', 'pick_point',
+    'capture_image', ...) and its params are the command fields, plus an
+    optional 'viewport'. The result lists every message the worker sent while
+    handling the command and is returned once the worker acknowledges it. A
+    JSON-RPC batch is forwarded as a single 'batch' command, which the worker
+    runs back to back with one render at the end.
+
+    Any local process can connect, so commands that write files only write
+    inside output_dir: relative paths are taken from there and paths that
+    resolve outside it are rejected.
+    """
+
+    # Parameters naming a file the command writes
+    OUTPUT_PATHS = {
+        'capture_image': 'path',
+        'save_session': 'path',
+        'export_cloud': 'path',
+        'record_camera_path': 'output_path',
+    }
+
+    def __init__(self, viewer, host='127.0.0.1', port=8765, output_dir=None):
+        self.viewer = viewer
+        self.host = host
+        self.port = port
+        self.output_dir = os.path.realpath(output_dir or os.path.join(os.getcwd(), 'automation_output'))
+        self.loop = None
+        self.server = None
+        self.error = None
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self.thread.start()
+        ready.wait(5.0)
+        if self.error is not None:
+            raise self.error
+
+    def _run(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port)
+            )
+        except Exception as e:
+            self.error = e
+            ready.set()
+            return
+        ready.set()
+        self.loop.run_forever()
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self._handle_line(line)
+                if response is not None:
+                    writer.write((json.dumps(response, default=_json_default) + '\n').encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return self._error(None, -32700, "Parse error")
+
+        if isinstance(request, list):
+            if not request:
+                return self._error(None, -32600, "Invalid Request")
+            responses = await self._execute(request, batch=True)
+            responses = [response for response in responses if response is not None]
+            return responses or None
+        return (await self._execute([request], batch=False))[0]
+
+    async def _execute(self, requests, batch):
+        """Send valid requests to the worker and wait for their acknowledgements"""
+        responses = [None] * len(requests)
+        calls = []
+        for position, request in enumerate(requests):
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                responses[position] = self._error(None, -32600, "Invalid Request")
+                continue
+            if request['method'] in ('quit', 'batch', 'end_batch'):
+                responses[position] = self._error(request.get('id'), -32601, "Method not found")
+                continue
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                responses[position] = self._error(request.get('id'), -32602, "Params must be an object")
+                continue
+            command = dict(params)
+            command['command'] = request['method']
+            key = self.OUTPUT_PATHS.get(command['command'])
+            if key is not None and command.get(key):
+                try:
+                    command[key] = self.output_path(command[key])
+                except ValueError as e:
+                    responses[position] = self._error(request.get('id'), -32602, str(e))
+                    continue
+            waiter = {'loop': self.loop, 'future': self.loop.create_future(), 'messages': []}
+            calls.append((position, request, command, waiter))
+
+        if calls:
+            try:
+                self.viewer.submit_automation_commands(
+                    [(command, waiter) for _, _, command, waiter in calls], batch=batch
+                )
+            except Exception as e:
+                for position, request, _, _ in calls:
+                    responses[position] = self._error(request.get('id'), -32603, f"Could not send command: {e}")
+                return responses
+
+        for position, request, _, waiter in calls:
+            ok, messages = await waiter['future']
+            # Requests without an id are notifications and get no response
+            if 'id' not in request:
+                continue
+            if ok:
+                responses[position] = {'jsonrpc': '2.0', 'id': request['id'], 'result': {'messages': messages}}
+            else:
+                errors = [m.get('message', '') for m in messages if m.get('type') == 'error']
+                responses[position] = self._error(request['id'], -32000, errors[0] if errors else "Command failed",
+                                                  {'messages': messages})
+        return responses
+
+    def output_path(self, path):
+        """Absolute form of a requested output path, which must lie inside output_dir"""
+        if not isinstance(path, str):
+            raise ValueError("Output path must be a string")
+        resolved = os.path.realpath(os.path.join(self.output_dir, path))
+        if os.path.commonpath([self.output_dir, resolved]) != self.output_dir:
+            raise ValueError(f"Output path must be inside {self.output_dir}")
+        return resolved
+
+    @staticmethod
+    def resolve(waiter, ok):
+        """Complete a waiting request from another thread"""
+        def set_result():
+            if not waiter['future'].done():
+                waiter['future'].set_result((ok, waiter['messages']))
+        waiter['loop'].call_soon_threadsafe(set_result)
+
+    @staticmethod
+    def _error(request_id, code, message, data=None):
+        error = {'code': code, 'message': message}
+        if data is not None:
+            error['data'] = data
+        return {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+
+
+def viewport_cells(count, width, height):
+    """Canvas rectangles (x0, y0, x1, y1) for a split layout of 1-4 viewports"""
+    if count == 1:
+        return [(0, 0, width, height)]
+    if count == 2:
+        half = width // 2
+        return [(0, 0, half, height), (half, 0, width, height)]
+    half_w = width // 2
+    half_h = height // 2
+    cells = [(0, 0, half_w, half_h), (half_w, 0, width, half_h),
+             (0, half_h, half_w, height), (half_w, half_h, width, height)]
+    return cells[:count]
+
+
+def letterbox(width, height, cell):
+    """Largest rectangle with a width x height aspect ratio centred in cell, as (x0, y0, x1, y1)"""
+    x0, y0, x1, y1 = cell
+    scale = min((x1 - x0) / max(width, 1), (y1 - y0) / max(height, 1))
+    fit_w = max(int(round(width * scale)), 1)
+    fit_h = max(int(round(height * scale)), 1)
+    left = x0 + (x1 - x0 - fit_w) // 2
+    top = y0 + (y1 - y0 - fit_h) // 2
+    return (left, top, left + fit_w, top + fit_h)
+
+
 class PointCloudViewer:
     def __init__(self, root):
         self.root = root
@@ -452,9 +5089,43 @@ class PointCloudViewer:
         # Replace threading lock with multiprocessing
         self.gl_lock = multiprocessing.RLock()
         
-        # Communication queues for multiprocessing
-        self.render_queue = multiprocessing.Queue()
-        self.result_queue = multiprocessing.Queue()
+        # The window is usable while the first worker imports Open3D and creates its context
+        self.renderer_ready = False
+        self.first_frame_shown = False
+        # Startup timings, shown in the status bar as each milestone is reached
+        self.startup_status = ""
+        self.root.bind("<Map>", self.on_window_mapped, add="+")
+        
+        # One render worker per viewport. Each has its own command queue,
+        # ordered control channel and latest-wins frame mailbox; control
+        # messages from all workers are handed to the Tk thread through one inbox
+        self.workers = []
+        self.active_viewport = 0
+        # Workers are not daemonic, so stop them even if the GUI exits without quitting
+        atexit.register(self.stop_workers)
+        self.link_cameras = tk.BooleanVar(value=False)
+        self.control_inbox = queue.Queue()
+        self.command_ids = itertools.count(1)
+        self.pending_commands = {}
+        # Set by listener threads; only the Tk thread touches Tk
+        self.worker_wakeup = threading.Event()
+        
+        # Automation requests waiting for their command's acknowledgement, by command id.
+        # The server thread hands new requests over through automation_inbox, so
+        # only the Tk thread touches rpc_waiters, pending_commands and workers
+        self.automation_server = None
+        self.automation_enabled = tk.BooleanVar(value=False)
+        # Files written through the automation server go here; None for automation_output in the working directory
+        self.automation_output_dir = None
+        self.rpc_waiters = {}
+        self.automation_inbox = queue.Queue()
+        
+        # Memory ceiling for each worker, None for the worker's default
+        self.memory_limit = None
+        
+        # Workers snapshot their scene here so a respawned worker can restore it after a crash
+        self.session_dir = tempfile.mkdtemp(prefix='open3dvisualizer_')
+        self.quitting = False
         
         #point cloud variables
         self.current_point_cloud = None
@@ -473,6 +5144,17 @@ class PointCloudViewer:
         self.last_y = 0
         self.zoom_scale = 1.0
         
+        # Alignment state
+        self.alignment_dialog = None
+        self.alignment_transform = None
+        
+        # Sequence player state
+        self.sequence_dialog = None
+        self.statistics_dialog = None
+        self.segmentation_dialog = None
+        self.clustering_dialog = None
+        self.sequence_scrubbing = False
+        
         self.create_menu_bar()
         
         # main frame
@@ -487,17 +5169,32 @@ class PointCloudViewer:
         self.canvas = tk.Canvas(self.viz_frame, bg="white")
         self.canvas.pack(fill=tk.BOTH, expand=True)
         
+        # Presents worker frames onto the canvas without piling up image items
+        self.presenter = FramePresenter(self.canvas)
+        
         # Create control panel
         self.control_panel = ttk.Frame(self.main_frame, width=300)
         self.control_panel.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5)
         
-        # Status bar
-        self.status_bar = ttk.Label(self.root, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
-        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        # Status bar, with the worker's memory usage on the right
+        self.status_frame = ttk.Frame(self.root)
+        self.status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        self.memory_label = ttk.Label(self.status_frame, text="Memory: -", relief=tk.SUNKEN, anchor=tk.E)
+        self.memory_label.pack(side=tk.RIGHT)
+        self.status_bar = ttk.Label(self.status_frame, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
+        self.status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Progress bar for long-running worker jobs (shown only while a job runs)
+        self.progress_bar = ttk.Progressbar(self.root, mode='determinate', maximum=100)
         
         # Add control sections
         self.create_view_controls()
         self.create_material_settings()
+        self.create_recording_controls()
+        
+        # Frame statistics
+        self.frame_stats_label = ttk.Label(self.control_panel, text="Frames: 0.0 fps, 0 dropped", font=("Arial", 8))
+        self.frame_stats_label.pack(side=tk.BOTTOM, anchor=tk.W, padx=5, pady=5)
         
         # Initialize Open3D visualizer in a separate process
         self.init_open3d()
@@ -519,12 +5216,14 @@ class PointCloudViewer:
         # Bind mouse wheel for zoom
         self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)  # Windows
         
-        # Set up periodic UI update from result queue
-        self.root.after(100, self.check_result_queue)
+        # Listener threads raise a flag that the Tk thread polls for; the periodic check is a fallback
+        self.root.after(10, self.poll_worker_wakeup)
+        self.root.after(250, self.check_result_queue)
         
     def on_rotate_start(self, event):
         """Start rotation when middle mouse button is pressed"""
         if not self.point_picking_mode:
+            self.set_active_viewport(self.viewport_at(event.x, event.y))
             self.is_rotating = True
             self.last_x = event.x
             self.last_y = event.y
@@ -547,7 +5246,7 @@ class PointCloudViewer:
             self.last_y = event.y
             
             # Send rotation command to visualization process
-            self.render_queue.put({
+            self.send_camera_command({
                 'command': 'rotate',
                 'dx': dx,
                 'dy': dy
@@ -567,7 +5266,8 @@ class PointCloudViewer:
                 direction = 'out'
                 
             # Send zoom command to visualization process
-            self.render_queue.put({
+            self.set_active_viewport(self.viewport_at(event.x, event.y))
+            self.send_camera_command({
                 'command': 'zoom',
                 'factor': zoom_factor,
                 'direction': direction
@@ -580,18 +5280,61 @@ class PointCloudViewer:
         # File menu
         file_menu = tk.Menu(menu_bar, tearoff=0)
         file_menu.add_command(label="Open...", command=self.open_file)
+        file_menu.add_command(label="Open Sequence...", command=self.open_sequence)
+        file_menu.add_command(label="Connect Point Stream...", command=self.show_stream_dialog)
+        file_menu.add_command(label="Compare Clouds...", command=self.compare_clouds)
+        file_menu.add_command(label="Align Clouds...", command=self.align_clouds)
+        file_menu.add_command(label="Segment Planes...", command=self.show_segmentation_dialog)
+        file_menu.add_command(label="Cluster Objects...", command=self.show_clustering_dialog)
         # file_menu.add_command(label="Open Samples...", command=self.open_samples)
-        # file_menu.add_command(label="Export Current Image...", command=self.export_image)
+        file_menu.add_command(label="Open Session...", command=self.open_session)
+        file_menu.add_command(label="Save Session...", command=self.save_session)
+        file_menu.add_command(label="Export Point Cloud...", command=self.export_cloud)
+        file_menu.add_command(label="Cancel Export", command=lambda: self.send_command({
+            'command': 'cancel_export'
+        }))
+        file_menu.add_command(label="Export Current Image...", command=self.export_image)
         file_menu.add_separator()
         file_menu.add_command(label="Quit", command=self.quit_application)
         menu_bar.add_cascade(label="File", menu=file_menu)
         
+        # Edit menu; undo and redo labels follow the worker's edit journal
+        self.edit_menu = tk.Menu(menu_bar, tearoff=0)
+        self.edit_menu.add_command(label="Undo", accelerator="Ctrl+Z", state=tk.DISABLED, command=lambda: self.send_command({
+            'command': 'undo'
+        }))
+        self.edit_menu.add_command(label="Redo", accelerator="Ctrl+Y", state=tk.DISABLED, command=lambda: self.send_command({
+            'command': 'redo'
+        }))
+        self.edit_menu.add_separator()
+        self.edit_menu.add_command(label="Remove Outliers", command=lambda: self.send_command({
+            'command': 'edit_cloud',
+            'operation': 'remove_outliers'
+        }))
+        menu_bar.add_cascade(label="Edit", menu=self.edit_menu)
+        self.root.bind("<Control-z>", lambda event: self.send_command({'command': 'undo'}))
+        self.root.bind("<Control-y>", lambda event: self.send_command({'command': 'redo'}))
+        
         # Settings menu
         settings_menu = tk.Menu(menu_bar, tearoff=0)
         settings_menu.add_command(label="General Settings", command=self.open_general_settings)
+        settings_menu.add_checkbutton(label="Automation Server (127.0.0.1:8765)", variable=self.automation_enabled,
+                                      command=self.toggle_automation_server)
         # settings_menu.add_command(label="AI Settings", command=self.open_ai_settings)
         menu_bar.add_cascade(label="Settings", menu=settings_menu)
         
+        # View menu
+        view_menu = tk.Menu(menu_bar, tearoff=0)
+        view_menu.add_command(label="Single View", command=lambda: self.set_viewport_count(1))
+        view_menu.add_command(label="2 Viewports", command=lambda: self.set_viewport_count(2))
+        view_menu.add_command(label="3 Viewports", command=lambda: self.set_viewport_count(3))
+        view_menu.add_command(label="4 Viewports", command=lambda: self.set_viewport_count(4))
+        view_menu.add_separator()
+        view_menu.add_checkbutton(label="Link Cameras", variable=self.link_cameras, command=self.toggle_camera_link)
+        view_menu.add_separator()
+        view_menu.add_command(label="Statistics...", command=self.show_statistics_dialog)
+        menu_bar.add_cascade(label="View", menu=view_menu)
+        
         # Help menu
         help_menu = tk.Menu(menu_bar, tearoff=0)
         help_menu.add_command(label="Documentation", command=self.show_documentation)
@@ -649,7 +5392,7 @@ class PointCloudViewer:
         lighting_frame.pack(fill=tk.X, padx=5, pady=5)
         
         ttk.Label(lighting_frame, text="Lighting profiles").pack(anchor=tk.W)
-        self.lighting_combo = ttk.Combobox(lighting_frame, values=["Bright day with sun at +Y [default]", "Cloudy day", "Night", "Custom"])
+        self.lighting_combo = ttk.Combobox(lighting_frame, values=["Bright day with sun at +Y [default]", "Cloudy day", "Night", "Eye-dome lighting (no normals)", "Custom"])
         self.lighting_combo.current(0)
         self.lighting_combo.pack(fill=tk.X, pady=2)
         self.lighting_combo.bind("<<ComboboxSelected>>", self.change_lighting)
@@ -727,25 +5470,59 @@ class PointCloudViewer:
         self.point_value = ttk.Label(point_frame, text="3")
         self.point_value.pack(side=tk.LEFT, padx=5)
         
-        # Then create and set the scale
-        self.point_scale = ttk.Scale(point_frame, from_=1, to=10, orient=tk.HORIZONTAL, command=self.update_point_size)
-        self.point_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
-        self.point_scale.set(3)
+        # Then create and set the scale
+        self.point_scale = ttk.Scale(point_frame, from_=1, to=10, orient=tk.HORIZONTAL, command=self.update_point_size)
+        self.point_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.point_scale.set(3)
+        
+        print("Created point_value label")
+
+    def create_recording_controls(self):
+        # Recording section
+        recording_frame = ttk.LabelFrame(self.control_panel, text="Recording")
+        recording_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        keyframe_frame = ttk.Frame(recording_frame)
+        keyframe_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        ttk.Button(keyframe_frame, text="Add Keyframe", command=self.add_keyframe).pack(side=tk.LEFT, padx=2)
+        ttk.Button(keyframe_frame, text="Clear", command=self.clear_keyframes).pack(side=tk.LEFT, padx=2)
+        self.keyframe_label = ttk.Label(keyframe_frame, text="0 keyframes")
+        self.keyframe_label.pack(side=tk.LEFT, padx=5)
+        
+        settings_frame = ttk.Frame(recording_frame)
+        settings_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        self.record_size_combo = ttk.Combobox(settings_frame, width=10, values=["1280x720", "1920x1080", "800x600"])
+        self.record_size_combo.current(0)
+        self.record_size_combo.pack(side=tk.LEFT, padx=2)
+        
+        self.record_fps_combo = ttk.Combobox(settings_frame, width=4, values=["24", "30", "60"])
+        self.record_fps_combo.current(1)
+        self.record_fps_combo.pack(side=tk.LEFT, padx=2)
+        ttk.Label(settings_frame, text="fps").pack(side=tk.LEFT)
+        
+        self.record_duration_entry = ttk.Entry(settings_frame, width=4, justify=tk.CENTER)
+        self.record_duration_entry.insert(0, "10")
+        self.record_duration_entry.pack(side=tk.LEFT, padx=2)
+        ttk.Label(settings_frame, text="s").pack(side=tk.LEFT)
         
-        print("Created point_value label")
+        record_frame = ttk.Frame(recording_frame)
+        record_frame.pack(fill=tk.X, padx=5, pady=2)
+        
+        ttk.Button(record_frame, text="Record Turntable...", command=lambda: self.record_camera_path('turntable')).pack(side=tk.LEFT, padx=2)
+        ttk.Button(record_frame, text="Record Path...", command=lambda: self.record_camera_path('keyframes')).pack(side=tk.LEFT, padx=2)
 
     def init_open3d(self):
         try:
             # Start a new process for handling Open3D rendering
-            self.visualization_process = multiprocessing.Process(
-                target=visualization_worker,
-                args=(self.render_queue, self.result_queue)
-            )
-            self.visualization_process.daemon = True
-            self.visualization_process.start()
+            self.add_viewport()
+            # Lay the window out first so the placeholder is centred on the real canvas
+            self.root.update_idletasks()
+            self.create_default_preview()
             
             # Send initialization command
-            self.render_queue.put({
+            self.send_command({
                 'command': 'init',
                 'bg_color': self.bg_color,
                 'point_size': self.point_size,
@@ -753,43 +5530,248 @@ class PointCloudViewer:
             })
             
             self.running = True
-            self.status_bar.config(text="Open3D initialized in separate process")
+            self.status_bar.config(text="Renderer warming up...")
+            self.root.after(1000, self.supervise_workers)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to initialize Open3D: {str(e)}")
             print(f"Open3D initialization error: {e}")
+    
+    def on_window_mapped(self, event):
+        if event.widget is self.root:
+            self.root.unbind("<Map>")
+            self.report_startup(f"window in {time.perf_counter() - STARTUP_TIME:.2f}s")
+            if not self.renderer_ready:
+                self.status_bar.config(text=f"{self.startup_status}, renderer warming up...")
+
+    def report_startup(self, milestone):
+        """Add a startup timing to the status bar"""
+        if self.startup_status:
+            self.startup_status = f"{self.startup_status}, {milestone}"
+        else:
+            self.startup_status = milestone[:1].upper() + milestone[1:]
+        self.status_bar.config(text=self.startup_status)
+
+    def add_viewport(self):
+        """Start a render worker for a new viewport"""
+        worker = RenderWorker(len(self.workers), self.session_dir, self.control_inbox, self.notify_gui)
+        worker.memory_limit = self.memory_limit
+        worker.start()
+        self.workers.append(worker)
+        return worker
+    
+    def set_viewport_count(self, count):
+        """Switch between a single view and a split layout of up to 4 viewports"""
+        while len(self.workers) < count:
+            worker = self.add_viewport()
+            self.send_command({
+                'command': 'set_bg_color',
+                'color': self.bg_color
+            }, viewport=worker.index)
+        while len(self.workers) > count:
+            worker = self.workers.pop()
+            worker.stop()
+            # Messages from the removed viewport are dropped, so nothing would answer these
+            self.fail_automation_requests(worker.index, "Viewport was closed")
+        self.active_viewport = min(self.active_viewport, count - 1)
+        self.compose_viewports()
+        self.status_bar.config(text=f"{count} viewport{'s' if count > 1 else ''}")
+    
+    def viewport_cells(self):
+        width, height = self.presenter.target_size()
+        return viewport_cells(len(self.workers), width, height)
+    
+    def viewport_at(self, x, y):
+        """Index of the viewport under a canvas position"""
+        for index, (x0, y0, x1, y1) in enumerate(self.viewport_cells()):
+            if x0 <= x < x1 and y0 <= y < y1:
+                return index
+        return self.active_viewport
+    
+    def set_active_viewport(self, index):
+        if index != self.active_viewport:
+            self.active_viewport = index
+            self.compose_viewports()
+    
+    def toggle_camera_link(self):
+        if self.link_cameras.get():
+            # Line all cameras up with the active viewport before linking them
+            self.send_command({'command': 'get_camera', 'purpose': 'link'})
+            self.status_bar.config(text="Cameras linked")
+        else:
+            self.status_bar.config(text="Cameras unlinked")
+    
+    def supervise_workers(self):
+        """Respawn any visualization process that died unexpectedly"""
+        if self.quitting or not self.running:
+            return
+        
+        for worker in self.workers:
+            if worker.stopping or worker.is_alive():
+                continue
+            
+            exit_code = worker.process.exitcode
+            now = time.perf_counter()
+            
+            # Give up if the worker keeps crashing
+            if len(worker.restart_times) == worker.restart_times.maxlen and now - worker.restart_times[0] < 60:
+                worker.stopping = True
+                messagebox.showerror("Error", f"Visualization process {worker.index + 1} keeps crashing "
+                                              f"(exit code {exit_code}); not restarting it again")
+                continue
             
+            worker.restart_times.append(now)
+            worker.restart_started = now
+            self.status_bar.config(text=f"Visualization process {worker.index + 1} exited (code {exit_code}), restarting...")
+            
+            self.update_progress(1.0)
+            self.fail_automation_requests(worker.index, "Visualization process restarted")
+            worker.start(restore=True)
+        
+        self.root.after(1000, self.supervise_workers)
+            
+    def send_command(self, command, viewport=None):
+        """Send a command to a visualization process (the active one by default), tagged with a new id"""
+        if viewport is None:
+            viewport = self.active_viewport
+        command_id = next(self.command_ids)
+        command['id'] = command_id
+        self.pending_commands[command_id] = (command['command'], time.perf_counter(), viewport)
+        self.workers[viewport].send(command)
+        return command_id
+
+    def submit_automation_commands(self, calls, batch=False):
+        """Queue automation commands for the Tk thread; called from the automation server thread"""
+        self.automation_inbox.put((calls, batch))
+        self.notify_gui()
+
+    def dispatch_automation_commands(self):
+        """Send queued automation commands, registering their waiters before the worker can answer.
+
+        Commands for the same viewport in a batch are sent as one 'batch'
+        command. Requests naming a viewport that does not exist fail as a whole.
+        """
+        while True:
+            try:
+                calls, batch = self.automation_inbox.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self.send_automation_commands(calls, batch)
+            except Exception as e:
+                for command, waiter in calls:
+                    self.rpc_waiters.pop(command.get('id'), None)
+                    self.pending_commands.pop(command.get('id'), None)
+                    waiter['messages'].append({'type': 'error', 'message': f"Could not send command: {e}"})
+                    AutomationServer.resolve(waiter, False)
+
+    def send_automation_commands(self, calls, batch):
+        viewports = []
+        for command, waiter in calls:
+            viewport = command.pop('viewport', None)
+            if viewport is None:
+                viewport = self.active_viewport
+            if not isinstance(viewport, int) or not 0 <= viewport < len(self.workers):
+                raise ValueError(f"No viewport {viewport}")
+            viewports.append(viewport)
+        
+        grouped = collections.OrderedDict()
+        for (command, waiter), viewport in zip(calls, viewports):
+            command_id = next(self.command_ids)
+            command['id'] = command_id
+            waiter['viewport'] = viewport
+            self.rpc_waiters[command_id] = waiter
+            self.pending_commands[command_id] = (command['command'], time.perf_counter(), viewport)
+            grouped.setdefault(viewport, []).append(command)
+        
+        for viewport, commands in grouped.items():
+            if batch:
+                self.workers[viewport].send({'command': 'batch', 'commands': commands})
+            else:
+                for command in commands:
+                    self.workers[viewport].send(command)
+
+    def toggle_automation_server(self):
+        if self.automation_enabled.get():
+            self.start_automation_server()
+        elif self.automation_server is not None:
+            self.automation_server.stop()
+            self.automation_server = None
+            self.status_bar.config(text="Automation server stopped")
+
+    def start_automation_server(self, port=8765):
+        try:
+            self.automation_server = AutomationServer(self, port=port, output_dir=self.automation_output_dir)
+            self.automation_server.start()
+            self.automation_enabled.set(True)
+            self.status_bar.config(text=f"Automation server listening on 127.0.0.1:{port}, "
+                                        f"writing to {self.automation_server.output_dir}")
+        except Exception as e:
+            self.automation_server = None
+            self.automation_enabled.set(False)
+            messagebox.showerror("Error", f"Failed to start automation server: {str(e)}")
+
+    def fail_automation_requests(self, viewport, message):
+        """Forget commands a stopped worker will never acknowledge and fail their requests"""
+        for command_id, (_, _, command_viewport) in list(self.pending_commands.items()):
+            if command_viewport == viewport:
+                del self.pending_commands[command_id]
+        for command_id, waiter in list(self.rpc_waiters.items()):
+            if waiter['viewport'] == viewport:
+                del self.rpc_waiters[command_id]
+                waiter['messages'].append({'type': 'error', 'message': message})
+                AutomationServer.resolve(waiter, False)
+
+    def send_camera_command(self, command):
+        """Send a camera command to the active viewport, or to every viewport when cameras are linked"""
+        if not self.link_cameras.get():
+            return self.send_command(command)
+        for worker in self.workers:
+            self.send_command(dict(command), viewport=worker.index)
+
+    def notify_gui(self):
+        """Flag new worker output; called from listener threads, so it must not touch Tk"""
+        self.worker_wakeup.set()
+
+    def poll_worker_wakeup(self):
+        """Handle flagged worker output on the Tk thread, coalescing bursts into one pass"""
+        self.root.after(10, self.poll_worker_wakeup)
+        if self.worker_wakeup.is_set():
+            self.worker_wakeup.clear()
+            self.dispatch_automation_commands()
+            self.process_worker_messages()
+
     def check_result_queue(self):
-        """Process any results from the visualization process"""
+        """Fallback check in case a wakeup notification was missed"""
+        self.dispatch_automation_commands()
+        self.process_worker_messages()
+        self.root.after(250, self.check_result_queue)
+
+    def process_worker_messages(self):
+        """Process control messages and the newest frame from the visualization process"""
         try:
-            while not self.result_queue.empty():
-                result = self.result_queue.get(block=False)
+            while True:
+                try:
+                    result = self.control_inbox.get_nowait()
+                except queue.Empty:
+                    break
                 
-                if result['type'] == 'image':
-                    # Update the canvas with the new render
-                    img_path = result['image_path']
-                    if os.path.exists(img_path):
-                        try:
-                            # robust image loading method
-                            from PIL import ImageFile
-                            ImageFile.LOAD_TRUNCATED_IMAGES = True  # Allow truncated images
-                            
-                            # Add a short delay to ensure file is fully written
-                            time.sleep(0.05)
-                            
-                            img = Image.open(img_path)
-                            if self.canvas.winfo_width() > 1 and self.canvas.winfo_height() > 1:
-                                img = img.resize((self.canvas.winfo_width(), self.canvas.winfo_height()), Image.LANCZOS)
-                            else:
-                                img = img.resize((800, 600), Image.LANCZOS)
-                            self.photo = ImageTk.PhotoImage(img)
-                            self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
-                        except Exception as e:
-                            print(f"Error displaying image: {e}")
-                            # Create a default image instead
-                            self.create_default_preview()
-                    else:
-                        print(f"Image file not found: {img_path}")
-                        self.create_default_preview()
+                # Ignore late messages from a viewport that has been closed
+                if result.get('viewport', 0) >= len(self.workers):
+                    continue
+                
+                # Collect replies for automation requests; their dialogs are not shown
+                waiter = self.rpc_waiters.get(result.get('command_id'))
+                automated = waiter is not None
+                if automated:
+                    waiter['messages'].append({key: value for key, value in result.items()
+                                               if key not in ('command_id', 'viewport')})
+                
+                if result['type'] == 'ack':
+                    # Command finished in the worker
+                    self.pending_commands.pop(result['id'], None)
+                    waiter = self.rpc_waiters.pop(result['id'], None)
+                    if waiter is not None:
+                        AutomationServer.resolve(waiter, result['ok'])
                 
                 elif result['type'] == 'selected_point':
                     # Handle selected point
@@ -805,36 +5787,227 @@ class PointCloudViewer:
                     self.status_bar.config(text=f"Distance: {distance:.4f} units")
                     
                     # Show distance in a dialog
-                    self.show_distance_dialog(distance, points)
+                    if not automated:
+                        self.show_distance_dialog(distance, points)
                 
                 elif result['type'] == 'status':
                     # Update status message
+                    message = result['message']
+                    if len(self.workers) > 1:
+                        message = f"[View {result['viewport'] + 1}] {message}"
+                    self.status_bar.config(text=message)
+                
+                elif result['type'] == 'sequence_info':
+                    if self.sequence_dialog is not None and self.sequence_dialog.winfo_exists():
+                        self.sequence_scale.config(to=max(result['count'] - 1, 0))
+                        self.sequence_dialog.title(f"Sequence Player - {os.path.basename(result['directory'])}")
+                
+                elif result['type'] == 'sequence_state':
+                    self.update_sequence_state(result)
+                
+                elif result['type'] == 'stream_state':
+                    message = (f"Stream: {result['points_per_second']:,.0f} points/s, "
+                               f"{result['buffered']:,}/{result['capacity']:,} buffered, "
+                               f"{result['packets']} packets, {result['dropped']} dropped")
+                    if result['error']:
+                        message += f" (receiver error: {result['error']})"
+                    self.status_bar.config(text=message)
+                
+                elif result['type'] == 'renderer_ready':
+                    if not self.renderer_ready:
+                        self.renderer_ready = True
+                        message = (f"renderer ready in {time.perf_counter() - STARTUP_TIME:.2f}s "
+                                   f"(Open3D import {result['import_time']:.2f}s, context {result['elapsed'] - result['import_time']:.2f}s)")
+                        self.report_startup(message)
+                        self.create_default_preview()
+                
+                elif result['type'] == 'warning':
                     self.status_bar.config(text=result['message'])
+                    if not automated:
+                        messagebox.showwarning("Warning", result['message'])
+                
+                elif result['type'] == 'memory':
+                    if result['viewport'] == self.active_viewport:
+                        self.memory_label.config(
+                            text=f"Memory: {result['used'] / 1024 ** 2:,.0f} / {result['limit'] / 1024 ** 2:,.0f} MB "
+                                 f"(geometry {result['geometry'] / 1024 ** 2:,.0f}, derived {result['derived'] / 1024 ** 2:,.0f}, "
+                                 f"caches {result['caches'] / 1024 ** 2:,.0f})"
+                        )
+                
+                elif result['type'] == 'plane':
+                    if self.segmentation_dialog is not None and self.segmentation_dialog.winfo_exists():
+                        normal = ", ".join(f"{value:.3f}" for value in result['normal'])
+                        self.plane_list.insert(tk.END, f"Plane {result['index'] + 1}: {result['points']:,} points, "
+                                                       f"normal ({normal})")
+                        color = "#%02x%02x%02x" % tuple(int(c * 255) for c in result['color'])
+                        self.plane_list.itemconfig(tk.END, foreground=color)
+                    self.status_bar.config(text=f"Found plane {result['index'] + 1} with {result['points']:,} points "
+                                                f"after {result['iterations']} hypotheses")
+                
+                elif result['type'] == 'segmentation_done':
+                    state = "cancelled" if result['cancelled'] else "finished"
+                    self.update_progress(1.0, f"Segmentation {state}: {result['planes']} planes in {result['elapsed']:.1f}s")
+                
+                elif result['type'] == 'clusters':
+                    if self.clustering_dialog is not None and self.clustering_dialog.winfo_exists():
+                        self.cluster_list.delete(0, tk.END)
+                        for cluster in result['clusters']:
+                            size = ", ".join(f"{high - low:.2f}" for low, high in zip(cluster['min'], cluster['max']))
+                            self.cluster_list.insert(tk.END, f"Cluster {cluster['index'] + 1}: {cluster['points']:,} points, "
+                                                             f"size ({size})")
+                            color = "#%02x%02x%02x" % tuple(int(c * 255) for c in cluster['color'])
+                            self.cluster_list.itemconfig(tk.END, foreground=color)
+                    listed = "" if len(result['clusters']) == result['total'] else f", largest {len(result['clusters'])} listed"
+                    self.update_progress(1.0, f"Found {result['total']} clusters ({result['noise']:,} noise points{listed}) "
+                                              f"in {result['elapsed']:.1f}s with {result['voxel_size']:.4g} voxels "
+                                              f"over {result['blocks']} blocks")
+                
+                elif result['type'] == 'journal':
+                    if result['viewport'] == self.active_viewport:
+                        for index, (action, label) in enumerate((("Undo", result['undo']), ("Redo", result['redo']))):
+                            self.edit_menu.entryconfig(index, label=f"{action} {label}" if label else action,
+                                                       state=tk.NORMAL if label else tk.DISABLED)
+                    folded = f", {result['folded']} oldest no longer undoable" if result['folded'] else ""
+                    self.status_bar.config(text=f"{result['points']:,} points shown; undo history {result['steps']} steps, "
+                                                f"edits {result['delta_bytes'] / 1024 ** 2:.1f} of {result['limit'] / 1024 ** 2:.0f} MB, "
+                                                f"{result['bytes'] / 1024 ** 2:.1f} MB in total{folded}")
+                
+                elif result['type'] == 'clustering_cancelled':
+                    self.update_progress(1.0, f"Clustering cancelled after {result['elapsed']:.1f}s")
+                
+                elif result['type'] == 'statistics':
+                    if (self.statistics_dialog is not None and self.statistics_dialog.winfo_exists()
+                            and result['viewport'] == self.statistics_viewport):
+                        self.update_statistics_panel(result)
+                
+                elif result['type'] == 'session_saved':
+                    self.status_bar.config(text=f"Saved session with {result['points']:,} points to "
+                                                f"{os.path.basename(result['path'])} in {result['elapsed']:.1f}s")
+                
+                elif result['type'] == 'session_opened':
+                    self.point_scale.set(result['point_size'])
+                    self.bg_color = list(result['background_color'])
+                    self.selected_points = [np.array(point) for point in result['selected_points']]
+                    message = (f"Opened session {os.path.basename(result['path'])} with {result['points']:,} points "
+                               f"in {result['elapsed']:.2f}s")
+                    for measurement in result['measurements']:
+                        message += f", distance {measurement['distance']:.4f}"
+                    self.status_bar.config(text=message)
+                
+                elif result['type'] == 'exported':
+                    self.update_progress(1.0, f"Exported {result['points']:,} points to "
+                                              f"{os.path.basename(result['path'])} in {result['elapsed']:.1f}s")
+                
+                elif result['type'] == 'image_saved':
+                    self.status_bar.config(text=f"Saved {result['width']}x{result['height']} image to "
+                                                f"{os.path.basename(result['path'])}")
+                
+                elif result['type'] == 'keyframes':
+                    self.keyframe_label.config(text=f"{result['count']} keyframes")
+                
+                elif result['type'] == 'restored':
+                    # A restarted worker rebuilt the scene from its snapshot
+                    worker = self.workers[result['viewport']]
+                    message = f"Restored {result['points']} points in {result['elapsed']:.2f}s"
+                    if worker.restart_started is not None:
+                        recovery = time.perf_counter() - worker.restart_started
+                        message = f"Visualization process recovered in {recovery:.2f}s ({message.lower()})"
+                        worker.restart_started = None
+                    self.status_bar.config(text=message)
+                
+                elif result['type'] == 'camera':
+                    if result.get('purpose') == 'link':
+                        # Apply the active viewport's camera to the others
+                        for worker in self.workers:
+                            if worker.index != result['viewport']:
+                                self.send_command({
+                                    'command': 'set_camera',
+                                    'camera': result['camera']
+                                }, viewport=worker.index)
+                
+                elif result['type'] == 'progress':
+                    # Update progress of a long-running job
+                    self.update_progress(result['fraction'], result.get('message'))
+                
+                elif result['type'] == 'align_level':
+                    self.on_align_level(result)
+                
+                elif result['type'] == 'align_result':
+                    self.alignment_transform = result['transform']
+                    self.show_alignment_matrix(result['transform'])
+                    self.status_bar.config(text=f"Alignment finished in {result['elapsed']:.2f}s")
+                
+                elif result['type'] == 'compare_stats':
+                    self.update_progress(1.0)
+                    if not automated:
+                        self.show_compare_dialog(result['stats'], result['counts'], result['edges'], result['elapsed'])
                     
                 elif result['type'] == 'error':
                     # Show error message
-                    messagebox.showerror("Error", result['message'])
+                    self.update_progress(1.0)
+                    if automated:
+                        self.status_bar.config(text=result['message'])
+                    else:
+                        messagebox.showerror("Error", result['message'])
         except Exception as e:
             print(f"Error checking result queue: {e}")
         
-        # Schedule the next check
-        self.root.after(100, self.check_result_queue)
+        # Take each viewport's newest frame; anything older was overwritten in its mailbox
+        skipped = [worker.take_frame() for worker in self.workers if not worker.stopping]
+        if any(count is not None for count in skipped):
+            self.compose_viewports(sum(count for count in skipped if count))
+            if not self.first_frame_shown:
+                self.first_frame_shown = True
+                self.report_startup(f"first frame in {time.perf_counter() - STARTUP_TIME:.2f}s")
+        if not self.presenter.present():
+            self.create_default_preview()
+        self.frame_stats_label.config(
+            text=f"Frames: {self.presenter.fps:.1f} fps, {self.presenter.dropped_frames} dropped"
+        )
+
+    def compose_viewports(self, skipped=0):
+        """Hand the presenter one frame combining every viewport's newest render"""
+        if len(self.workers) == 1:
+            if self.workers[0].frame is not None:
+                self.presenter.submit(self.workers[0].frame, skipped)
+            return
+        
+        width, height = self.presenter.target_size()
+        composite = Image.new('RGB', (width, height), (255, 255, 255))
+        draw = ImageDraw.Draw(composite)
+        for worker, (x0, y0, x1, y1) in zip(self.workers, viewport_cells(len(self.workers), width, height)):
+            if worker.frame is not None:
+                # Workers render at a fixed size; letterbox rather than stretch it into the cell
+                left, top, right, bottom = letterbox(worker.frame.shape[1], worker.frame.shape[0], (x0, y0, x1, y1))
+                cell = Image.fromarray(worker.frame, 'RGB').resize((right - left, bottom - top), Image.BILINEAR)
+                composite.paste(cell, (left, top))
+            outline = (0, 120, 215) if worker.index == self.active_viewport else (160, 160, 160)
+            draw.rectangle([x0, y0, x1 - 1, y1 - 1], outline=outline, width=2)
+        self.presenter.submit(composite, skipped)
 
     def create_default_preview(self):
         """Create a default preview image when rendering fails"""
-        width = self.canvas.winfo_width() or 800
-        height = self.canvas.winfo_height() or 600
+        # An unmapped canvas reports 1x1, so fall back to the default size
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            width, height = 800, 600
         
         # Clear canvas
         self.canvas.delete("all")
         
         # Draw a simple placeholder
-        self.canvas.create_rectangle(0, 0, width, height, fill="white")
+        self.canvas.create_rectangle(0, 0, width, height, fill="white", tags="placeholder")
+        if self.renderer_ready:
+            text = "Point cloud visualization\n(Preview not available)"
+        else:
+            text = "Renderer warming up..."
         self.canvas.create_text(width/2, height/2, 
-                            text="Point cloud visualization\n(Preview not available)",
+                            text=text,
                             font=("Arial", 14),
                             fill="gray",
-                            justify=tk.CENTER)
+                            justify=tk.CENTER,
+                            tags="placeholder")
     
     def open_file(self):
         file_path = filedialog.askopenfilename(
@@ -846,13 +6019,583 @@ class PointCloudViewer:
         if file_path:
             file_ext = os.path.splitext(file_path)[1].lower()
             # Send command to visualization process to load file
-            self.render_queue.put({
+            self.send_command({
                 'command': 'load_file',
                 'file_path': file_path,
                 'file_ext': file_ext
             })
             self.status_bar.config(text=f"Loading {os.path.basename(file_path)}...")
 
+    def open_sequence(self):
+        directory = filedialog.askdirectory(title="Select a directory of numbered .pcd/.ply frames")
+        if not directory:
+            return
+        
+        self.send_command({
+            'command': 'open_sequence',
+            'directory': directory,
+            'fps': 10.0
+        })
+        self.show_sequence_dialog()
+        self.status_bar.config(text=f"Opening sequence {os.path.basename(directory)}...")
+
+    def show_sequence_dialog(self):
+        if self.sequence_dialog is not None and self.sequence_dialog.winfo_exists():
+            self.sequence_dialog.lift()
+            return
+        
+        self.sequence_dialog = tk.Toplevel(self.root)
+        self.sequence_dialog.title("Sequence Player")
+        self.sequence_dialog.geometry("420x170")
+        self.sequence_dialog.transient(self.root)
+        
+        # Scrub bar; seeks are sent on release so dragging does not flood the worker
+        self.sequence_scale = ttk.Scale(self.sequence_dialog, from_=0, to=0, orient=tk.HORIZONTAL)
+        self.sequence_scale.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.sequence_scale.bind("<ButtonPress-1>", lambda event: setattr(self, 'sequence_scrubbing', True))
+        self.sequence_scale.bind("<ButtonRelease-1>", self.on_sequence_scrub)
+        
+        control_frame = ttk.Frame(self.sequence_dialog)
+        control_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.sequence_play_button = ttk.Button(control_frame, text="Play", command=self.toggle_sequence_playback)
+        self.sequence_play_button.pack(side=tk.LEFT, padx=2)
+        
+        ttk.Label(control_frame, text="Speed").pack(side=tk.LEFT, padx=(10, 2))
+        self.sequence_speed_combo = ttk.Combobox(control_frame, width=5, values=["0.25x", "0.5x", "1x", "2x", "4x"])
+        self.sequence_speed_combo.current(2)
+        self.sequence_speed_combo.pack(side=tk.LEFT, padx=2)
+        self.sequence_speed_combo.bind("<<ComboboxSelected>>", self.change_sequence_speed)
+        
+        ttk.Label(control_frame, text="FPS").pack(side=tk.LEFT, padx=(10, 2))
+        self.sequence_fps_entry = ttk.Entry(control_frame, width=5, justify=tk.CENTER)
+        self.sequence_fps_entry.insert(0, "10")
+        self.sequence_fps_entry.pack(side=tk.LEFT, padx=2)
+        self.sequence_fps_entry.bind("<Return>", self.change_sequence_fps)
+        
+        self.sequence_stats_label = ttk.Label(self.sequence_dialog, text="", font=("Arial", 8), justify=tk.LEFT)
+        self.sequence_stats_label.pack(anchor=tk.W, padx=10, pady=5)
+
+    def show_segmentation_dialog(self):
+        if self.segmentation_dialog is not None and self.segmentation_dialog.winfo_exists():
+            self.segmentation_dialog.lift()
+            return
+        
+        self.segmentation_dialog = tk.Toplevel(self.root)
+        self.segmentation_dialog.title("Plane Segmentation")
+        self.segmentation_dialog.geometry("420x320")
+        self.segmentation_dialog.transient(self.root)
+        
+        settings_frame = ttk.Frame(self.segmentation_dialog)
+        settings_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(settings_frame, text="Max planes:").grid(row=0, column=0, padx=5, pady=2, sticky=tk.W)
+        self.plane_count_spin = ttk.Spinbox(settings_frame, from_=1, to=20, width=6)
+        self.plane_count_spin.set(5)
+        self.plane_count_spin.grid(row=0, column=1, padx=5, pady=2, sticky=tk.W)
+        
+        ttk.Label(settings_frame, text="Distance threshold:").grid(row=1, column=0, padx=5, pady=2, sticky=tk.W)
+        self.plane_threshold_entry = ttk.Entry(settings_frame, width=10)
+        self.plane_threshold_entry.grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
+        ttk.Label(settings_frame, text="(blank for automatic)").grid(row=1, column=2, padx=5, pady=2, sticky=tk.W)
+        
+        self.plane_list = tk.Listbox(self.segmentation_dialog, height=8, font=("Courier", 9))
+        self.plane_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        button_frame = ttk.Frame(self.segmentation_dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(button_frame, text="Segment", command=self.segment_planes).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=lambda: self.send_command({
+            'command': 'cancel_segmentation'
+        })).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Clear", command=self.clear_segmentation).pack(side=tk.LEFT, padx=5)
+
+    def segment_planes(self):
+        try:
+            max_planes = int(self.plane_count_spin.get())
+            threshold = self.plane_threshold_entry.get().strip()
+            threshold = float(threshold) if threshold else None
+        except ValueError:
+            messagebox.showerror("Error", "Max planes and threshold must be numbers", parent=self.segmentation_dialog)
+            return
+        
+        self.plane_list.delete(0, tk.END)
+        self.send_command({
+            'command': 'segment_planes',
+            'max_planes': max_planes,
+            'threshold': threshold
+        })
+        self.update_progress(0.0, "Segmenting planes...")
+
+    def clear_segmentation(self):
+        self.plane_list.delete(0, tk.END)
+        self.send_command({
+            'command': 'clear_segmentation'
+        })
+
+    def show_clustering_dialog(self):
+        if self.clustering_dialog is not None and self.clustering_dialog.winfo_exists():
+            self.clustering_dialog.lift()
+            return
+        
+        self.clustering_dialog = tk.Toplevel(self.root)
+        self.clustering_dialog.title("Object Clustering")
+        self.clustering_dialog.geometry("460x360")
+        self.clustering_dialog.transient(self.root)
+        
+        settings_frame = ttk.Frame(self.clustering_dialog)
+        settings_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(settings_frame, text="Voxel size:").grid(row=0, column=0, padx=5, pady=2, sticky=tk.W)
+        self.cluster_voxel_entry = ttk.Entry(settings_frame, width=10)
+        self.cluster_voxel_entry.grid(row=0, column=1, padx=5, pady=2, sticky=tk.W)
+        ttk.Label(settings_frame, text="(blank for automatic)").grid(row=0, column=2, padx=5, pady=2, sticky=tk.W)
+        
+        ttk.Label(settings_frame, text="Min points:").grid(row=1, column=0, padx=5, pady=2, sticky=tk.W)
+        self.cluster_min_entry = ttk.Entry(settings_frame, width=10)
+        self.cluster_min_entry.grid(row=1, column=1, padx=5, pady=2, sticky=tk.W)
+        ttk.Label(settings_frame, text="(blank for automatic)").grid(row=1, column=2, padx=5, pady=2, sticky=tk.W)
+        
+        self.cluster_list = tk.Listbox(self.clustering_dialog, height=10, font=("Courier", 9))
+        self.cluster_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.cluster_list.bind("<<ListboxSelect>>", self.isolate_cluster)
+        
+        button_frame = ttk.Frame(self.clustering_dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(button_frame, text="Cluster", command=self.cluster_objects).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=lambda: self.send_command({
+            'command': 'cancel_clustering'
+        })).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Show All", command=self.show_all_clusters).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Delete", command=self.delete_cluster).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Clear", command=self.clear_clustering).pack(side=tk.LEFT, padx=5)
+
+    def cluster_objects(self):
+        try:
+            voxel_size = self.cluster_voxel_entry.get().strip()
+            voxel_size = float(voxel_size) if voxel_size else None
+            min_points = self.cluster_min_entry.get().strip()
+            min_points = int(min_points) if min_points else None
+        except ValueError:
+            messagebox.showerror("Error", "Voxel size and min points must be numbers", parent=self.clustering_dialog)
+            return
+        
+        self.cluster_list.delete(0, tk.END)
+        self.send_command({
+            'command': 'cluster_objects',
+            'voxel_size': voxel_size,
+            'min_points': min_points
+        })
+        self.update_progress(0.0, "Clustering objects...")
+
+    def isolate_cluster(self, event):
+        selection = self.cluster_list.curselection()
+        if selection:
+            self.send_command({
+                'command': 'isolate_cluster',
+                'index': selection[0]
+            })
+
+    def show_all_clusters(self):
+        self.cluster_list.selection_clear(0, tk.END)
+        self.send_command({
+            'command': 'isolate_cluster',
+            'index': None
+        })
+
+    def delete_cluster(self):
+        selection = self.cluster_list.curselection()
+        if selection:
+            # Entries keep their position, which is the cluster index the worker knows
+            index = selection[0]
+            text = self.cluster_list.get(index)
+            if text.endswith("(deleted)"):
+                return
+            self.cluster_list.delete(index)
+            self.cluster_list.insert(index, f"{text} (deleted)")
+            self.cluster_list.itemconfig(index, foreground="gray")
+            self.send_command({
+                'command': 'edit_cloud',
+                'operation': 'delete_cluster',
+                'index': index
+            })
+
+    def clear_clustering(self):
+        self.cluster_list.delete(0, tk.END)
+        self.send_command({
+            'command': 'clear_clustering'
+        })
+
+    def show_statistics_dialog(self):
+        if self.statistics_dialog is not None and self.statistics_dialog.winfo_exists():
+            self.statistics_dialog.lift()
+            return
+        
+        self.statistics_viewport = self.active_viewport
+        self.statistics_dialog = tk.Toplevel(self.root)
+        self.statistics_dialog.title("Statistics")
+        self.statistics_dialog.geometry("420x520")
+        self.statistics_dialog.transient(self.root)
+        self.statistics_dialog.protocol("WM_DELETE_WINDOW", self.close_statistics_dialog)
+        
+        self.statistics_label = ttk.Label(self.statistics_dialog, text="Sampling...", font=("Courier", 9), justify=tk.LEFT)
+        self.statistics_label.pack(anchor=tk.W, padx=10, pady=10)
+        
+        # One histogram per axis
+        self.statistics_histograms = []
+        for axis in "XYZ":
+            ttk.Label(self.statistics_dialog, text=f"{axis} distribution").pack(anchor=tk.W, padx=10)
+            canvas = tk.Canvas(self.statistics_dialog, height=60, bg="white", highlightthickness=0)
+            canvas.pack(fill=tk.X, padx=10, pady=(0, 5))
+            self.statistics_histograms.append(canvas)
+        
+        button_frame = ttk.Frame(self.statistics_dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.statistics_refine_button = ttk.Button(button_frame, text="Refine to Exact", command=self.refine_statistics)
+        self.statistics_refine_button.pack(side=tk.LEFT, padx=2)
+        ttk.Button(button_frame, text="Close", command=self.close_statistics_dialog).pack(side=tk.RIGHT, padx=2)
+        
+        self.send_command({
+            'command': 'statistics',
+            'action': 'start'
+        }, viewport=self.statistics_viewport)
+
+    def refine_statistics(self):
+        self.send_command({
+            'command': 'statistics',
+            'action': 'refine'
+        }, viewport=self.statistics_viewport)
+        self.statistics_refine_button.config(state=tk.DISABLED)
+
+    def close_statistics_dialog(self):
+        if self.statistics_viewport < len(self.workers):
+            self.send_command({
+                'command': 'statistics',
+                'action': 'stop'
+            }, viewport=self.statistics_viewport)
+        self.statistics_dialog.destroy()
+        self.statistics_dialog = None
+
+    def update_statistics_panel(self, stats):
+        if not stats['sample']:
+            self.statistics_label.config(text=f"Points:   {stats['points']:,}\nSampling...")
+            return
+        
+        def triple(values, digits=4):
+            return ", ".join(f"{value:.{digits}f}" for value in values)
+        
+        if stats['exact']:
+            lines = [f"Points:   {stats['points']:,} (exact)"]
+        else:
+            lines = [f"Points:   {stats['points']:,} (sample of {stats['sample']:,}, 95% intervals)"]
+        low, high = stats['bounds']
+        lines.append(f"Min:      {triple(low)}")
+        lines.append(f"Max:      {triple(high)}")
+        lines.append(f"Extent:   {triple(stats['extent'])}")
+        lines.append(f"Centroid: {triple(stats['centroid'])}")
+        if not stats['exact']:
+            lines.append(f"      +/- {triple(stats['centroid_ci'])}")
+        lines.append(f"Std dev:  {triple(stats['std'])}")
+        if stats['density'] is not None:
+            unit = {1: "per unit", 2: "per unit^2", 3: "per unit^3"}[stats['density_dims']]
+            lines.append(f"Density:  {stats['density']:.4g} points {unit}")
+        if stats['spacing'] is None:
+            lines.append("Spacing:  building index...")
+        elif stats['spacing_exact']:
+            lines.append(f"Spacing:  {stats['spacing']:.5g} (exact)")
+        else:
+            lines.append(f"Spacing:  {stats['spacing']:.5g} +/- {stats['spacing_ci']:.2g} "
+                         f"({stats['spacing_samples']:,} queries)")
+        if stats['refining'] or ('progress' in stats and stats['progress'] < 1.0):
+            lines.append(f"Refining: {stats.get('progress', 0.0) * 100:.0f}%")
+        self.statistics_label.config(text="\n".join(lines))
+        
+        if stats['exact'] and stats['spacing_exact']:
+            self.statistics_refine_button.config(state=tk.DISABLED)
+        
+        for canvas, counts, (low, high) in zip(self.statistics_histograms, stats['histograms']['counts'],
+                                                stats['histograms']['ranges']):
+            canvas.delete("all")
+            width = canvas.winfo_width() or 400
+            height = int(canvas.cget('height'))
+            peak = max(max(counts), 1)
+            bar = width / len(counts)
+            for i, count in enumerate(counts):
+                top = height - 12 - (height - 14) * count / peak
+                canvas.create_rectangle(i * bar, top, (i + 1) * bar - 1, height - 12, fill="#4a90d9", outline="")
+            canvas.create_text(2, height - 1, text=f"{low:.3g}", anchor=tk.SW, font=("Arial", 7))
+            canvas.create_text(width - 2, height - 1, text=f"{high:.3g}", anchor=tk.SE, font=("Arial", 7))
+
+    def toggle_sequence_playback(self):
+        playing = self.sequence_play_button.cget('text') == "Pause"
+        self.send_command({
+            'command': 'sequence_control',
+            'action': 'pause' if playing else 'play'
+        })
+        self.sequence_play_button.config(text="Play" if playing else "Pause")
+
+    def on_sequence_scrub(self, event):
+        self.sequence_scrubbing = False
+        self.send_command({
+            'command': 'sequence_control',
+            'action': 'seek',
+            'index': int(round(float(self.sequence_scale.get())))
+        })
+
+    def change_sequence_speed(self, event):
+        self.send_command({
+            'command': 'sequence_control',
+            'action': 'speed',
+            'speed': float(self.sequence_speed_combo.get().rstrip('x'))
+        })
+
+    def change_sequence_fps(self, event):
+        try:
+            fps = float(self.sequence_fps_entry.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid frame rate")
+            return
+        self.send_command({
+            'command': 'sequence_control',
+            'action': 'fps',
+            'fps': fps
+        })
+
+    def update_sequence_state(self, state):
+        """Show the worker's playback position and prefetch statistics"""
+        if self.sequence_dialog is None or not self.sequence_dialog.winfo_exists():
+            return
+        if not self.sequence_scrubbing:
+            self.sequence_scale.set(state['index'])
+        self.sequence_play_button.config(text="Pause" if state['playing'] else "Play")
+        self.sequence_stats_label.config(
+            text=f"Frame {state['index'] + 1}/{state['count']}   "
+                 f"{state['fps']:.1f}/{state['target_fps']:.1f} fps\n"
+                 f"Prefetched {state['buffered']}/{state['depth']}   Underruns {state['underruns']}"
+        )
+
+    def show_stream_dialog(self):
+        # Create a dialog to configure the point stream listener
+        stream_dialog = tk.Toplevel(self.root)
+        stream_dialog.title("Point Stream")
+        stream_dialog.geometry("320x230")
+        stream_dialog.transient(self.root)
+        
+        ttk.Label(stream_dialog, text="Protocol:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        protocol_combo = ttk.Combobox(stream_dialog, values=["udp", "tcp", "unix"], width=18)
+        protocol_combo.current(0)
+        protocol_combo.grid(row=0, column=1, padx=5, pady=5, sticky=tk.EW)
+        
+        ttk.Label(stream_dialog, text="Address:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        address_entry = ttk.Entry(stream_dialog, width=20)
+        address_entry.insert(0, "127.0.0.1:5555")
+        address_entry.grid(row=1, column=1, padx=5, pady=5, sticky=tk.EW)
+        
+        ttk.Label(stream_dialog, text="Capacity (points):").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+        capacity_entry = ttk.Entry(stream_dialog, width=20)
+        capacity_entry.insert(0, "2000000")
+        capacity_entry.grid(row=2, column=1, padx=5, pady=5, sticky=tk.EW)
+        
+        ttk.Label(stream_dialog, text="Time window (s, blank = none):").grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
+        window_entry = ttk.Entry(stream_dialog, width=20)
+        window_entry.grid(row=3, column=1, padx=5, pady=5, sticky=tk.EW)
+        
+        ttk.Label(stream_dialog, text="Max updates/s:").grid(row=4, column=0, padx=5, pady=5, sticky=tk.W)
+        rate_entry = ttk.Entry(stream_dialog, width=20)
+        rate_entry.insert(0, "10")
+        rate_entry.grid(row=4, column=1, padx=5, pady=5, sticky=tk.EW)
+        
+        def start_stream():
+            try:
+                window = window_entry.get().strip()
+                command = {
+                    'command': 'start_stream',
+                    'protocol': protocol_combo.get(),
+                    'address': address_entry.get().strip(),
+                    'capacity': int(capacity_entry.get()),
+                    'window': float(window) if window else None,
+                    'max_rate': float(rate_entry.get())
+                }
+            except ValueError as e:
+                messagebox.showerror("Error", f"Invalid stream settings: {str(e)}")
+                return
+            self.send_command(command)
+            stream_dialog.destroy()
+        
+        def stop_stream():
+            self.send_command({'command': 'stop_stream'})
+            stream_dialog.destroy()
+        
+        button_frame = ttk.Frame(stream_dialog)
+        button_frame.grid(row=5, column=0, columnspan=2, pady=10)
+        ttk.Button(button_frame, text="Start", command=start_stream).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Stop", command=stop_stream).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=stream_dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+    def compare_clouds(self):
+        filetypes = [("3D Model Files", "*.obj *.ply *.pcd *.xyz *.pts"),
+                     ("All Files", "*.*")]
+        reference_path = filedialog.askopenfilename(title="Select reference cloud", filetypes=filetypes)
+        if not reference_path:
+            return
+        target_path = filedialog.askopenfilename(title="Select target cloud", filetypes=filetypes)
+        if not target_path:
+            return
+        
+        # Send command to visualization process to compare the clouds
+        self.send_command({
+            'command': 'compare_clouds',
+            'reference_path': reference_path,
+            'target_path': target_path
+        })
+        self.update_progress(0.0, f"Comparing {os.path.basename(target_path)} against {os.path.basename(reference_path)}...")
+
+    def set_memory_limit(self, limit):
+        """Apply a memory ceiling to every worker, including ones started later"""
+        self.memory_limit = limit
+        for worker in self.workers:
+            worker.memory_limit = limit
+            self.send_command({
+                'command': 'set_memory_budget',
+                'limit': limit
+            }, viewport=worker.index)
+
+    def open_session(self):
+        session_path = filedialog.askopenfilename(
+            title="Open session",
+            filetypes=[("Point Cloud Sessions", "*.pcsession"), ("All Files", "*.*")]
+        )
+        if not session_path:
+            return
+        
+        self.send_command({
+            'command': 'open_session',
+            'path': session_path
+        })
+        self.status_bar.config(text=f"Opening session {os.path.basename(session_path)}...")
+
+    def save_session(self):
+        session_path = filedialog.asksaveasfilename(
+            title="Save session",
+            defaultextension=".pcsession",
+            filetypes=[("Point Cloud Sessions", "*.pcsession")]
+        )
+        if not session_path:
+            return
+        
+        self.send_command({
+            'command': 'save_session',
+            'path': session_path
+        })
+        self.status_bar.config(text=f"Saving session to {os.path.basename(session_path)}...")
+
+    def export_cloud(self):
+        export_path = filedialog.asksaveasfilename(
+            title="Export point cloud",
+            defaultextension=".ply",
+            filetypes=[("Binary PLY", "*.ply"), ("Binary PCD", "*.pcd"), ("NumPy Archive", "*.npz")]
+        )
+        if not export_path:
+            return
+        
+        # Optionally restrict the export to an index set
+        indices_path = None
+        if messagebox.askyesno("Export Point Cloud", "Export only the points listed in an index file?"):
+            indices_path = filedialog.askopenfilename(
+                title="Select index file",
+                filetypes=[("Index Files", "*.npy *.txt"), ("All Files", "*.*")]
+            )
+            if not indices_path:
+                return
+        
+        self.send_command({
+            'command': 'export_cloud',
+            'path': export_path,
+            'indices_path': indices_path
+        })
+        self.update_progress(0.0, f"Exporting {os.path.basename(export_path)}...")
+
+    def export_image(self):
+        image_path = filedialog.asksaveasfilename(
+            title="Export current image",
+            defaultextension=".png",
+            filetypes=[("PNG Image", "*.png"), ("JPEG Image", "*.jpg")]
+        )
+        if not image_path:
+            return
+        
+        self.send_command({
+            'command': 'capture_image',
+            'path': image_path
+        })
+
+    def align_clouds(self):
+        filetypes = [("3D Model Files", "*.obj *.ply *.pcd *.xyz *.pts"),
+                     ("All Files", "*.*")]
+        fixed_path = filedialog.askopenfilename(title="Select fixed cloud", filetypes=filetypes)
+        if not fixed_path:
+            return
+        moving_path = filedialog.askopenfilename(title="Select cloud to align", filetypes=filetypes)
+        if not moving_path:
+            return
+        
+        self.send_command({
+            'command': 'align_clouds',
+            'fixed_path': fixed_path,
+            'moving_path': moving_path
+        })
+        self.alignment_transform = None
+        self.show_alignment_dialog()
+        self.status_bar.config(text=f"Aligning {os.path.basename(moving_path)} onto {os.path.basename(fixed_path)}...")
+
+    def add_keyframe(self):
+        self.send_command({
+            'command': 'add_keyframe'
+        })
+
+    def clear_keyframes(self):
+        self.send_command({
+            'command': 'clear_keyframes'
+        })
+
+    def record_camera_path(self, mode):
+        try:
+            width, height = [int(v) for v in self.record_size_combo.get().lower().split('x')]
+            fps = int(self.record_fps_combo.get())
+            duration = float(self.record_duration_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid recording settings: {str(e)}")
+            return
+        
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            filetypes=[("MP4 Video", "*.mp4"), ("PNG Image Sequence", "*.png"), ("All Files", "*.*")]
+        )
+        if not output_path:
+            return
+        
+        self.send_command({
+            'command': 'record_camera_path',
+            'mode': mode,
+            'width': width,
+            'height': height,
+            'fps': fps,
+            'duration': duration,
+            'output_path': output_path
+        })
+        self.update_progress(0.0, f"Recording {os.path.basename(output_path)}...")
+
+    def update_progress(self, fraction, message=None):
+        """Show job progress, hiding the bar once the job is complete"""
+        if fraction >= 1.0:
+            self.progress_bar.pack_forget()
+        else:
+            if not self.progress_bar.winfo_ismapped():
+                self.progress_bar.pack(side=tk.BOTTOM, fill=tk.X, before=self.status_frame)
+            self.progress_bar['value'] = fraction * 100
+        if message:
+            self.status_bar.config(text=message)
+
     def toggle_point_picking_mode(self):
         self.point_picking_mode = not self.point_picking_mode
         if self.point_picking_mode:
@@ -863,7 +6606,7 @@ class PointCloudViewer:
             self.status_bar.config(text="Point picking mode: OFF")
 
     def clear_point_markers(self):
-        self.render_queue.put({
+        self.send_command({
             'command': 'clear_markers'
         })
         self.point_markers = []
@@ -878,12 +6621,21 @@ class PointCloudViewer:
             self.selected_points = []
             self.clear_point_markers()
             
-        # Convert canvas coordinates to viewport coordinates
-        viewport_x = event.x / self.canvas.winfo_width()
-        viewport_y = event.y / self.canvas.winfo_height()
+        # Convert canvas coordinates to coordinates within the clicked viewport
+        index = self.viewport_at(event.x, event.y)
+        self.set_active_viewport(index)
+        x0, y0, x1, y1 = self.viewport_cells()[index]
+        frame = self.workers[index].frame
+        if len(self.workers) > 1 and frame is not None:
+            # Split layouts letterbox each frame inside its cell
+            x0, y0, x1, y1 = letterbox(frame.shape[1], frame.shape[0], (x0, y0, x1, y1))
+            if not (x0 <= event.x < x1 and y0 <= event.y < y1):
+                return
+        viewport_x = (event.x - x0) / max(x1 - x0, 1)
+        viewport_y = (event.y - y0) / max(y1 - y0, 1)
         
         # Send point picking command to visualization process
-        self.render_queue.put({
+        self.send_command({
             'command': 'pick_point',
             'viewport_x': viewport_x,
             'viewport_y': viewport_y
@@ -913,6 +6665,112 @@ class PointCloudViewer:
         # Close button
         ttk.Button(distance_dialog, text="Close", command=distance_dialog.destroy).pack(pady=10)
     
+    def show_alignment_dialog(self):
+        # Reuse the alignment dialog if it is still open
+        if self.alignment_dialog is not None and self.alignment_dialog.winfo_exists():
+            self.alignment_log.delete("1.0", tk.END)
+            self.alignment_matrix_label.config(text="")
+            return
+        
+        self.alignment_dialog = tk.Toplevel(self.root)
+        self.alignment_dialog.title("Cloud Alignment")
+        self.alignment_dialog.geometry("420x360")
+        self.alignment_dialog.transient(self.root)
+        
+        ttk.Label(self.alignment_dialog, text="Pyramid levels", font=("Arial", 12)).pack(pady=(10, 5))
+        self.alignment_log = tk.Text(self.alignment_dialog, height=6, width=50, font=("Courier", 9))
+        self.alignment_log.pack(padx=10, pady=5)
+        
+        ttk.Label(self.alignment_dialog, text="Current transform").pack()
+        self.alignment_matrix_label = ttk.Label(self.alignment_dialog, text="", font=("Courier", 9), justify=tk.LEFT)
+        self.alignment_matrix_label.pack(pady=5)
+        
+        button_frame = ttk.Frame(self.alignment_dialog)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        ttk.Button(button_frame, text="Accept", command=self.accept_alignment).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Revert", command=self.revert_alignment).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Export Matrix...", command=self.export_alignment).pack(side=tk.LEFT, padx=5)
+    
+    def on_align_level(self, result):
+        """Log a finished pyramid level and show its transform"""
+        self.alignment_transform = result['transform']
+        line = (f"L{result['level'] + 1}/{result['levels']}  voxel {result['voxel_size']:.4f}  "
+                f"fit {result['fitness']:.3f}  rmse {result['rmse']:.4f}  {result['elapsed']:.2f}s\n")
+        if self.alignment_dialog is not None and self.alignment_dialog.winfo_exists():
+            self.alignment_log.insert(tk.END, line)
+            self.show_alignment_matrix(result['transform'])
+        self.status_bar.config(text=f"Alignment level {result['level'] + 1}/{result['levels']} "
+                                    f"done in {result['elapsed']:.2f}s")
+    
+    def show_alignment_matrix(self, transform):
+        if self.alignment_dialog is not None and self.alignment_dialog.winfo_exists():
+            text = "\n".join("  ".join(f"{value:9.5f}" for value in row) for row in transform)
+            self.alignment_matrix_label.config(text=text)
+    
+    def accept_alignment(self):
+        self.send_command({'command': 'align_accept'})
+        if self.alignment_dialog is not None:
+            self.alignment_dialog.destroy()
+            self.alignment_dialog = None
+    
+    def revert_alignment(self):
+        self.send_command({'command': 'align_revert'})
+        self.alignment_transform = np.identity(4).tolist()
+        self.show_alignment_matrix(self.alignment_transform)
+    
+    def export_alignment(self):
+        if self.alignment_transform is None:
+            messagebox.showinfo("Export Matrix", "No alignment result to export yet")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Text Files", "*.txt"), ("NumPy Files", "*.npy"), ("All Files", "*.*")]
+        )
+        if file_path:
+            try:
+                matrix = np.array(self.alignment_transform)
+                if file_path.lower().endswith('.npy'):
+                    np.save(file_path, matrix)
+                else:
+                    np.savetxt(file_path, matrix, fmt="%.10f")
+                self.status_bar.config(text=f"Transform exported to {os.path.basename(file_path)}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to export matrix: {str(e)}")
+    
+    def show_compare_dialog(self, stats, counts, edges, elapsed):
+        # Create a dialog with the distance histogram and summary statistics
+        compare_dialog = tk.Toplevel(self.root)
+        compare_dialog.title("Cloud Comparison")
+        compare_dialog.geometry("460x420")
+        compare_dialog.transient(self.root)
+        
+        ttk.Label(compare_dialog, text="Target-to-reference distances", font=("Arial", 12)).pack(pady=(10, 5))
+        
+        # Histogram drawn with the same ramp used to colour the target
+        width, height = 420, 180
+        histogram = tk.Canvas(compare_dialog, width=width, height=height, bg="white")
+        histogram.pack(padx=10, pady=5)
+        
+        peak = max(max(counts), 1)
+        bar_width = width / len(counts)
+        colors = apply_colormap(np.linspace(0.0, 1.0, len(counts)), 0.0, 1.0)
+        for i, count in enumerate(counts):
+            bar_height = (count / peak) * (height - 10)
+            r, g, b = [int(c * 255) for c in colors[i]]
+            histogram.create_rectangle(i * bar_width, height - bar_height, (i + 1) * bar_width, height,
+                                       fill=f"#{r:02x}{g:02x}{b:02x}", outline="")
+        
+        ttk.Label(compare_dialog, text=f"0 – {edges[-1]:.4f} units (99th percentile)", font=("Arial", 8)).pack()
+        
+        info_text = f"Points: {stats['count']}\n"
+        info_text += f"Mean: {stats['mean']:.4f}   Std: {stats['std']:.4f}   RMS: {stats['rms']:.4f}\n"
+        info_text += f"Median: {stats['median']:.4f}   95%: {stats['p95']:.4f}   Max: {stats['max']:.4f}\n"
+        info_text += f"Computed in {elapsed:.1f}s"
+        ttk.Label(compare_dialog, text=info_text, justify=tk.LEFT).pack(pady=10)
+        
+        # Close button
+        ttk.Button(compare_dialog, text="Close", command=compare_dialog.destroy).pack(pady=5)
+    
     
 
     def update_point_size(self, value):
@@ -922,7 +6780,7 @@ class PointCloudViewer:
             self.point_value.config(text=str(size))
             
             # Send command to update point size in visualization
-            self.render_queue.put({
+            self.send_command({
                 'command': 'set_point_size',
                 'size': size
             })
@@ -944,14 +6802,14 @@ class PointCloudViewer:
             
     def change_material_type(self, event):
         material_type = self.type_combo.get()
-        self.render_queue.put({
+        self.send_command({
             'command': 'set_material_type',
             'type': material_type
         })
     
     def change_material(self, event):
         material = self.material_combo.get()
-        self.render_queue.put({
+        self.send_command({
             'command': 'set_material',
             'material': material
         })
@@ -973,7 +6831,7 @@ class PointCloudViewer:
             g = int(self.color_g_entry.get().split(':')[1])
             b = int(self.color_b_entry.get().split(':')[1])
             self.point_color = [r/255, g/255, b/255]
-            self.render_queue.put({
+            self.send_command({
                 'command': 'set_point_color',
                 'color': self.point_color
             })
@@ -981,20 +6839,20 @@ class PointCloudViewer:
             print(f"Error applying point color: {e}")
     
     def set_arcball_mode(self):
-        self.render_queue.put({
+        self.send_camera_command({
             'command': 'set_view_mode',
             'mode': 'arcball'
         })
         
     def set_fly_mode(self):
-        self.render_queue.put({
+        self.send_camera_command({
             'command': 'set_view_mode',
             'mode': 'fly'
         })
         # self.status_bar.config(text="View mode: Fly")
         
     def set_model_mode(self):
-        self.render_queue.put({
+        self.send_camera_command({
             'command': 'set_view_mode',
             'mode': 'model'
         })
@@ -1028,7 +6886,7 @@ class PointCloudViewer:
             self.bg_color = [r, g, b]
             
             # Send to visualization process
-            self.render_queue.put({
+            self.send_command({
                 'command': 'set_bg_color',
                 'color': self.bg_color
             })
@@ -1041,7 +6899,7 @@ class PointCloudViewer:
         profile = self.lighting_combo.get()
         
         # Send to visualization process
-        self.render_queue.put({
+        self.send_command({
             'command': 'set_lighting',
             'profile': profile
         })
@@ -1093,6 +6951,11 @@ class PointCloudViewer:
         max_points_entry.insert(0, "1000000")
         max_points_entry.grid(row=1, column=1, padx=5, pady=5, sticky=tk.EW)
         
+        ttk.Label(performance_frame, text="Memory budget (MB):").grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+        memory_budget_entry = ttk.Entry(performance_frame)
+        memory_budget_entry.insert(0, str((self.memory_limit or default_memory_limit()) // 1024 ** 2))
+        memory_budget_entry.grid(row=2, column=1, padx=5, pady=5, sticky=tk.EW)
+        
         # Controls tab
         controls_frame = ttk.Frame(notebook)
         notebook.add(controls_frame, text="Controls")
@@ -1110,9 +6973,18 @@ class PointCloudViewer:
         button_frame = ttk.Frame(settings_dialog)
         button_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        ttk.Button(button_frame, text="Apply", command=settings_dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        def apply_settings():
+            try:
+                limit = int(float(memory_budget_entry.get()) * 1024 ** 2)
+            except ValueError:
+                messagebox.showerror("Error", "Memory budget must be a number of megabytes", parent=settings_dialog)
+                return
+            self.set_memory_limit(limit)
+            settings_dialog.destroy()
+        
+        ttk.Button(button_frame, text="Apply", command=apply_settings).pack(side=tk.RIGHT, padx=5)
         ttk.Button(button_frame, text="Cancel", command=settings_dialog.destroy).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(button_frame, text="OK", command=settings_dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(button_frame, text="OK", command=apply_settings).pack(side=tk.RIGHT, padx=5)
         
     def show_documentation(self):
         messagebox.showinfo("Documentation", "Documentation is available at: https://pointcloudviewer.docs.example.com")
@@ -1122,28 +6994,43 @@ class PointCloudViewer:
 
     
     
+    def stop_workers(self):
+        # Send quit command to each visualization process and give it time to terminate
+        for worker in self.workers:
+            if not worker.stopping:
+                worker.stop()
+
     def quit_application(self):
-        # Send quit command to visualization process
-        if self.running and self.visualization_process.is_alive():
-            self.render_queue.put({'command': 'quit'})
-            # Give time for the process to terminate 
-            time.sleep(0.5)
+        self.quitting = True
+        if self.automation_server is not None:
+            self.automation_server.stop()
+        self.stop_workers()
         self.running = False
+        shutil.rmtree(self.session_dir, ignore_errors=True)
         self.root.destroy()
         sys.exit()
 
 
 if __name__ == "__main__":
-    # here we check if Open3D is installed
-    try:
-        import open3d as o3d
-    except ImportError:
+    # here we check if Open3D is installed, without importing it in the GUI process
+    if importlib.util.find_spec('open3d') is None:
         print("Error: Open3D is not installed. Please install it using:")
         print("pip install open3d")
         sys.exit(1)
     
+    parser = argparse.ArgumentParser(description="Point Cloud Viewer")
+    parser.add_argument('--automation-port', type=int, default=None,
+                        help="start the local JSON-RPC automation server on this port")
+    parser.add_argument('--automation-output-dir', default=None,
+                        help="directory that automation commands may write files to "
+                             "(default: automation_output in the working directory)")
+    args = parser.parse_args()
+    
     # Start the application
     root = tk.Tk()
     app = PointCloudViewer(root)
+    app.automation_output_dir = args.automation_output_dir
+    if args.automation_port is not None:
+        app.start_automation_server(args.automation_port)
     root.protocol("WM_DELETE_WINDOW", app.quit_application)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from Open3Dvisualizer import detect_ascii_layout, parse_ascii_cloud
+
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines))
+    return str(path)
+
+
+def test_layout_of_plain_xyz(tmp_path):
+    path = write_lines(tmp_path / "cloud.xyz", ["1 2 3", "4 5 6"])
+    assert detect_ascii_layout(path) == (0, 3, False, {'xyz': 0})
+
+
+def test_layout_skips_header_and_point_count(tmp_path):
+    path = write_lines(tmp_path / "cloud.pts", ["x y z intensity", "2", "1,2,3,0.5", "4,5,6,0.25"])
+    offset, columns, comma, layout = detect_ascii_layout(path)
+    assert offset == len("x y z intensity\n2\n")
+    assert (columns, comma, layout) == (4, True, {'xyz': 0, 'intensity': 3})
+
+
+def test_layout_tells_colours_from_normals(tmp_path):
+    colours = write_lines(tmp_path / "rgb.xyz", ["0 0 0 255 128 0", "1 1 1 10 20 30"])
+    normals = write_lines(tmp_path / "normals.xyz", ["0 0 0 0 0 -1", "1 1 1 -0.6 0.8 0"])
+    other = write_lines(tmp_path / "other.xyz", ["0 0 0 -5 300 2", "1 1 1 7 8 9"])
+    assert detect_ascii_layout(colours)[3] == {'xyz': 0, 'rgb': 3}
+    assert detect_ascii_layout(normals)[3] == {'xyz': 0, 'normals': 3}
+    assert detect_ascii_layout(other)[3] == {'xyz': 0}
+
+
+def test_file_without_points_is_rejected(tmp_path):
+    path = write_lines(tmp_path / "empty.pts", ["0"])
+    with pytest.raises(ValueError):
+        detect_ascii_layout(path)
+    (tmp_path / "blank.xyz").write_text("")
+    with pytest.raises(ValueError):
+        detect_ascii_layout(str(tmp_path / "blank.xyz"))
+
+
+def test_parse_round_trip_across_chunks(tmp_path):
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1000, 1000, (200, 3)).round(4)
+    intensity = rng.uniform(0, 1, 200).round(3)
+    rgb = rng.integers(0, 256, (200, 3))
+    lines = [f"{x} {y} {z} {i} {r} {g} {b}" for (x, y, z), i, (r, g, b) in zip(points, intensity, rgb)]
+    path = write_lines(tmp_path / "scan.pts", ["200"] + lines)
+    
+    cache, stats = parse_ascii_cloud(path, str(tmp_path / "cloud"), chunk_bytes=512, processes=1)
+    assert stats['points'] == 200
+    np.testing.assert_array_equal(np.load(cache['points']), points)
+    np.testing.assert_allclose(np.load(cache['scalars']['intensity']), intensity, rtol=1e-6)
+    # RGB above 1 is scaled to 0-1 across every chunk
+    np.testing.assert_allclose(np.load(cache['colors']), rgb / 255.0, rtol=1e-6)
+
+
+def test_parse_keeps_colours_already_in_range(tmp_path):
+    path = write_lines(tmp_path / "cloud.xyz", ["0 0 0 0.5 0.25 1", "1 1 1 0 0 0", "", "2 2 2 1 1 1", ""])
+    cache, stats = parse_ascii_cloud(path, str(tmp_path / "cloud"), processes=1)
+    assert stats['points'] == 3
+    np.testing.assert_allclose(np.load(cache['colors'])[0], [0.5, 0.25, 1.0])
+
+
+def test_parse_rejects_rows_with_missing_columns(tmp_path):
+    path = write_lines(tmp_path / "cloud.xyz", ["0 0 0 1", "1 1 1 1", "2 2 2", "3 3 3 1"])
+    with pytest.raises(ValueError, match="Malformed data"):
+        parse_ascii_cloud(path, str(tmp_path / "cloud"), processes=1)
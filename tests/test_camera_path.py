@@ -0,0 +1,88 @@
+import numpy as np
+
+from Open3Dvisualizer import interpolate_camera_path, turntable_path
+
+
+def make_camera(center, rotation=None, focal=500.0, width=640, height=480):
+    pose = np.identity(4)
+    pose[:3, :3] = np.identity(3) if rotation is None else rotation
+    pose[:3, 3] = center
+    return {
+        'width': width,
+        'height': height,
+        'intrinsic': [[focal, 0.0, width / 2 - 0.5], [0.0, focal, height / 2 - 0.5], [0.0, 0.0, 1.0]],
+        'extrinsic': np.linalg.inv(pose).tolist()
+    }
+
+
+def rotation_z(degrees):
+    angle = np.radians(degrees)
+    return np.array([[np.cos(angle), -np.sin(angle), 0.0],
+                     [np.sin(angle), np.cos(angle), 0.0],
+                     [0.0, 0.0, 1.0]])
+
+
+def pose_of(camera):
+    return np.linalg.inv(np.array(camera['extrinsic']))
+
+
+def test_path_passes_through_keyframes():
+    keyframes = [make_camera([0, 0, 0]),
+                 make_camera([1, 0, 0], rotation_z(90), focal=600.0),
+                 make_camera([2, 1, 0], rotation_z(180), focal=700.0)]
+    path = interpolate_camera_path(keyframes, 9)
+    
+    assert len(path) == 9
+    for camera, keyframe in ((path[0], keyframes[0]), (path[4], keyframes[1]), (path[-1], keyframes[2])):
+        np.testing.assert_allclose(camera['extrinsic'], keyframe['extrinsic'], atol=1e-9)
+        np.testing.assert_allclose(camera['intrinsic'], keyframe['intrinsic'], atol=1e-9)
+
+
+def test_path_blends_between_keyframes():
+    keyframes = [make_camera([0, 0, 0]), make_camera([2, 0, 0], rotation_z(90), focal=700.0)]
+    middle = interpolate_camera_path(keyframes, 3)[1]
+    pose = pose_of(middle)
+    
+    np.testing.assert_allclose(pose[:3, 3], [1, 0, 0], atol=1e-9)
+    np.testing.assert_allclose(pose[:3, :3], rotation_z(45), atol=1e-9)
+    assert np.isclose(middle['intrinsic'][0][0], 600.0)
+    # The rotation stays orthonormal along the whole path
+    for camera in interpolate_camera_path(keyframes, 11):
+        rotation = pose_of(camera)[:3, :3]
+        np.testing.assert_allclose(rotation @ rotation.T, np.identity(3), atol=1e-9)
+
+
+def test_single_frame_path():
+    keyframes = [make_camera([0, 0, 0]), make_camera([1, 0, 0])]
+    path = interpolate_camera_path(keyframes, 1)
+    assert len(path) == 1
+    np.testing.assert_allclose(path[0]['extrinsic'], keyframes[0]['extrinsic'], atol=1e-9)
+
+
+def test_turntable_orbits_around_the_up_axis():
+    # Camera y points down, so this camera's up axis is world -y
+    camera = make_camera([0, 0, 5])
+    center = np.array([0.0, 0.0, 9.0])
+    path = turntable_path(camera, center, 4)
+    
+    assert len(path) == 4
+    np.testing.assert_allclose(path[0]['extrinsic'], camera['extrinsic'], atol=1e-9)
+    centers = np.array([pose_of(c)[:3, 3] for c in path])
+    np.testing.assert_allclose(np.linalg.norm(centers - center, axis=1), 4.0)
+    # The orbit stays in the plane through the centre perpendicular to the up axis
+    np.testing.assert_allclose(centers[:, 1], 0.0, atol=1e-9)
+    np.testing.assert_allclose(centers[2], [0, 0, 13], atol=1e-9)
+    # Each camera keeps looking at the centre
+    for c in path:
+        pose = pose_of(c)
+        direction = (center - pose[:3, 3]) / np.linalg.norm(center - pose[:3, 3])
+        np.testing.assert_allclose(pose[:3, 2], direction, atol=1e-9)
+
+
+def test_partial_turntable():
+    camera = make_camera([3, 0, 0])
+    path = turntable_path(camera, [0, 0, 0], 2, degrees=90.0)
+    assert len(path) == 2
+    np.testing.assert_allclose(pose_of(path[1])[:3, 3] @ pose_of(path[0])[:3, 3], 9 * np.cos(np.radians(45)), atol=1e-9)
+    for c in path:
+        np.testing.assert_allclose(c['intrinsic'], camera['intrinsic'])
@@ -0,0 +1,113 @@
+import numpy as np
+
+from Open3Dvisualizer import EditJournal
+
+
+def make_journal(count=6, **kwargs):
+    points = np.arange(count * 3, dtype=np.float64).reshape(count, 3)
+    colors = np.full((count, 3), 0.5)
+    return EditJournal(points, colors, scalar_fields={'index': np.arange(count)}, **kwargs)
+
+
+def mask(count, *indices):
+    result = np.zeros(count, dtype=bool)
+    result[list(indices)] = True
+    return result
+
+
+def test_unedited_journal_shows_the_base():
+    journal = make_journal()
+    visible = journal.visible()
+    np.testing.assert_array_equal(visible['points'], journal.points)
+    np.testing.assert_array_equal(visible['colors'], journal.colors)
+    assert visible['normals'] is None
+    assert journal.undo() is False and journal.redo() is False
+
+
+def test_undo_and_redo_of_a_removal():
+    journal = make_journal()
+    journal.record("Delete", removed=mask(6, 1, 4))
+    np.testing.assert_array_equal(journal.visible()['scalar_fields']['index'], [0, 2, 3, 5])
+    
+    assert journal.undo()
+    np.testing.assert_array_equal(journal.visible()['scalar_fields']['index'], np.arange(6))
+    assert journal.redo()
+    # Undo after redo returns to the same state as the first undo
+    assert journal.undo()
+    np.testing.assert_array_equal(journal.visible()['scalar_fields']['index'], np.arange(6))
+    assert journal.redo()
+    assert journal.redo() is False
+    journal.visible()
+    report = journal.report()
+    assert (report['undo'], report['redo'], report['points']) == ("Delete", None, 4)
+
+
+def test_recording_after_undo_discards_the_redo_branch():
+    journal = make_journal()
+    journal.record("Delete", removed=mask(6, 0))
+    journal.record("Paint", color=[1, 0, 0])
+    journal.undo()
+    journal.record("Move", transform=np.diag([1.0, 1.0, 1.0, 1.0]) + np.eye(4, k=3))
+    
+    assert [edit['label'] for edit in journal.edits] == ["Delete", "Move"]
+    assert journal.redo() is False
+    visible = journal.visible()
+    np.testing.assert_array_equal(visible['points'], journal.points[1:] + [1, 0, 0])
+    np.testing.assert_array_equal(visible['colors'], journal.colors[1:])
+
+
+def test_selection_masks_follow_earlier_removals():
+    journal = make_journal()
+    journal.record("Delete", removed=mask(6, 0, 1))
+    journal.visible()
+    # Selecting the first visible point selects base point 2
+    selection = journal.base_mask(mask(4, 0))
+    np.testing.assert_array_equal(np.flatnonzero(selection), [2])
+    journal.record("Paint", color=[0, 1, 0], selection=selection)
+    colors = journal.visible()['colors']
+    np.testing.assert_array_equal(colors[0], [0, 1, 0])
+    np.testing.assert_array_equal(colors[1:], np.full((3, 3), 0.5))
+    # The base colours are never written to
+    np.testing.assert_array_equal(journal.colors, np.full((6, 3), 0.5))
+
+
+def test_transforms_rotate_normals():
+    points = np.array([[1.0, 0.0, 0.0]])
+    normals = np.array([[1.0, 0.0, 0.0]])
+    journal = EditJournal(points, normals=normals)
+    rotation = np.identity(4)
+    rotation[:2, :2] = [[0, -1], [1, 0]]
+    journal.record("Rotate", transform=rotation)
+    journal.record("Rotate", transform=rotation)
+    visible = journal.visible()
+    np.testing.assert_allclose(visible['points'], [[-1, 0, 0]], atol=1e-12)
+    np.testing.assert_allclose(visible['normals'], [[-1, 0, 0]], atol=1e-12)
+    assert visible['colors'] is None
+
+
+def test_old_edits_are_folded_into_the_base():
+    journal = make_journal(max_bytes=1)
+    journal.record("Delete", removed=mask(6, 0))
+    journal.record("Paint", color=[1, 0, 0], selection=mask(6, 5))
+    journal.record("Delete", removed=mask(6, 1))
+    
+    assert journal.folded == 2
+    assert len(journal.edits) == 1
+    assert journal.undo()
+    assert journal.undo() is False
+    # Folded edits stay applied after undoing everything still in the journal
+    visible = journal.visible()
+    np.testing.assert_array_equal(visible['scalar_fields']['index'], [1, 2, 3, 4, 5])
+    np.testing.assert_array_equal(visible['colors'][-1], [1, 0, 0])
+    assert journal.report()['folded'] == 2
+
+
+def test_empty_cloud():
+    journal = EditJournal(np.empty((0, 3)), np.empty((0, 3)))
+    assert journal.colors is None
+    journal.record("Paint", color=[1, 1, 1])
+    visible = journal.visible()
+    assert visible['points'].shape == (0, 3)
+    assert visible['colors'].shape == (0, 3)
+    assert journal.undo()
+    assert journal.visible()['colors'] is None
@@ -0,0 +1,100 @@
+import threading
+import zipfile
+
+import numpy as np
+import pytest
+
+from Open3Dvisualizer import export_point_cloud
+
+
+def sample_cloud(count=7):
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-10, 10, (count, 3))
+    colors = rng.uniform(0, 1, (count, 3))
+    normals = rng.normal(size=(count, 3)).astype(np.float32)
+    intensity = rng.uniform(0, 1, count).astype(np.float32)
+    return points, colors, normals, {'intensity': intensity}
+
+
+def read_binary(path, marker, dtype):
+    data = open(path, 'rb').read()
+    body = data.index(marker) + len(marker)
+    return data[:body].decode('ascii'), np.frombuffer(data[body:], dtype=dtype)
+
+
+def test_ply_round_trip(tmp_path):
+    points, colors, normals, fields = sample_cloud()
+    path = str(tmp_path / "cloud.ply")
+    progress = []
+    assert export_point_cloud(path, points, colors, normals, fields, chunk_size=3,
+                              progress_callback=progress.append) == 7
+    
+    header, record = read_binary(path, b"end_header\n", [('xyz', '<f8', 3), ('normal', '<f4', 3),
+                                                          ('rgb', 'u1', 3), ('intensity', '<f4')])
+    assert "element vertex 7" in header
+    np.testing.assert_array_equal(record['xyz'], points)
+    np.testing.assert_array_equal(record['normal'], normals)
+    np.testing.assert_array_equal(record['rgb'], np.rint(colors * 255))
+    np.testing.assert_array_equal(record['intensity'], fields['intensity'])
+    assert progress[-1] == 1.0
+
+
+def test_pcd_round_trip_of_a_selection(tmp_path):
+    points, colors, _, _ = sample_cloud()
+    path = str(tmp_path / "cloud.pcd")
+    # Indices are deduplicated and written in point order
+    assert export_point_cloud(path, points, colors, indices=[5, 1, 5, 3], chunk_size=2) == 3
+    
+    header, record = read_binary(path, b"DATA binary\n", [('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('rgb', '<u4')])
+    assert "POINTS 3" in header
+    np.testing.assert_array_equal(np.stack([record['x'], record['y'], record['z']], axis=1), points[[1, 3, 5]])
+    rgb = np.rint(colors[[1, 3, 5]] * 255).astype(np.uint32)
+    np.testing.assert_array_equal(record['rgb'], (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2])
+
+
+def test_npz_round_trip(tmp_path):
+    points, colors, normals, fields = sample_cloud()
+    path = str(tmp_path / "cloud.npz")
+    export_point_cloud(path, points, colors, normals, fields, chunk_size=4)
+    
+    with np.load(path) as archive:
+        assert sorted(archive.files) == ['colors', 'intensity', 'normals', 'points']
+        np.testing.assert_array_equal(archive['points'], points)
+        np.testing.assert_array_equal(archive['colors'], np.rint(colors * 255))
+        np.testing.assert_array_equal(archive['normals'], normals)
+        np.testing.assert_array_equal(archive['intensity'], fields['intensity'])
+    with zipfile.ZipFile(path) as archive:
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in archive.infolist())
+
+
+@pytest.mark.parametrize("ext", [".ply", ".pcd", ".npz"])
+def test_empty_cloud(tmp_path, ext):
+    path = str(tmp_path / ("empty" + ext))
+    assert export_point_cloud(path, np.empty((0, 3)), np.empty((0, 3))) == 0
+    if ext == ".npz":
+        with np.load(path) as archive:
+            assert archive['points'].shape == (0, 3)
+    else:
+        assert open(path, 'rb').read().endswith(b"end_header\n" if ext == ".ply" else b"DATA binary\n")
+
+
+def test_mismatched_scalar_fields_are_skipped(tmp_path):
+    points, _, _, _ = sample_cloud()
+    path = str(tmp_path / "cloud.npz")
+    export_point_cloud(path, points, scalar_fields={'short': np.zeros(3)})
+    with np.load(path) as archive:
+        assert archive.files == ['points']
+
+
+def test_invalid_exports_leave_no_file(tmp_path):
+    points, _, _, _ = sample_cloud()
+    with pytest.raises(ValueError, match="Unsupported"):
+        export_point_cloud(str(tmp_path / "cloud.las"), points)
+    with pytest.raises(ValueError, match="out of range"):
+        export_point_cloud(str(tmp_path / "cloud.ply"), points, indices=[0, 7])
+    
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(ValueError, match="cancelled"):
+        export_point_cloud(str(tmp_path / "cloud.ply"), points, chunk_size=2, cancel=cancel)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,49 @@
+import numpy as np
+
+from Open3Dvisualizer import eye_dome_lighting
+
+
+def test_empty_view_is_unchanged():
+    pixels = np.full((4, 5, 3), 90, dtype=np.uint8)
+    assert eye_dome_lighting(pixels, np.zeros((4, 5))) is pixels
+
+
+def test_flat_surface_is_not_shaded():
+    pixels = np.full((6, 6, 3), 200, dtype=np.uint8)
+    shaded = eye_dome_lighting(pixels, np.full((6, 6), 3.0))
+    assert shaded.dtype == np.uint8
+    np.testing.assert_array_equal(shaded, pixels)
+
+
+def test_depth_steps_darken_the_far_side():
+    pixels = np.full((6, 8, 3), 200, dtype=np.uint8)
+    depth = np.full((6, 8), 2.0)
+    depth[:, 4:] = 2.02
+    shaded = eye_dome_lighting(pixels, depth)
+    
+    # Only far pixels next to the step are darker than their near neighbours
+    assert (shaded[:, :4] == 200).all()
+    assert (shaded[:, 4] < 200).all()
+    assert (shaded[:, 5:] == 200).all()
+    assert shaded[2, 4, 0] < eye_dome_lighting(pixels, depth, strength=0.1)[2, 4, 0]
+
+
+def test_silhouette_gets_a_dark_outline():
+    pixels = np.full((5, 5, 3), 255, dtype=np.uint8)
+    depth = np.zeros((5, 5))
+    depth[2, 2] = 1.0
+    shaded = eye_dome_lighting(pixels, depth)
+    
+    # Background touching the cloud turns black; the corners of the image stay untouched
+    assert (shaded[1:4, 1:4][np.arange(9).reshape(3, 3) != 4] == 0).all()
+    assert (shaded[0, :] == 255).all() and (shaded[:, 0] == 255).all()
+    assert (shaded[2, 2] == 255).all()
+
+
+def test_wider_radius_reaches_further():
+    pixels = np.full((1, 9, 3), 255, dtype=np.uint8)
+    depth = np.zeros((1, 9))
+    depth[0, 4] = 1.0
+    shaded = eye_dome_lighting(pixels, depth, radius=2)
+    assert (shaded[0, [2, 6]] == 0).all()
+    assert (shaded[0, [3, 5]] == 255).all()
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+import Open3Dvisualizer
+from Open3Dvisualizer import (MemoryBudget, MemoryBudgetError, fit_cache_to_budget, open_cache_array,
+                              read_scalar_fields)
+
+
+def save_cache(tmp_path, count, normals=True):
+    rng = np.random.default_rng(2)
+    cache = {'points': str(tmp_path / "cloud_points.npy"), 'colors': str(tmp_path / "cloud_colors.npy")}
+    np.save(cache['points'], rng.uniform(size=(count, 3)))
+    np.save(cache['colors'], rng.uniform(size=(count, 3)).astype(np.float32))
+    if normals:
+        cache['normals'] = str(tmp_path / "cloud_normals.npy")
+        np.save(cache['normals'], rng.normal(size=(count, 3)).astype(np.float32))
+    cache['scalars'] = {'intensity': str(tmp_path / "cloud_sf_intensity.npy")}
+    np.save(cache['scalars']['intensity'], np.arange(count, dtype=np.float32))
+    return cache
+
+
+def test_cache_that_fits_is_unchanged(tmp_path):
+    cache = save_cache(tmp_path, 100)
+    load_info = {}
+    # Points, colours and normals at 24 bytes each per point
+    assert fit_cache_to_budget(cache, 100 * 72, load_info) is cache
+    assert fit_cache_to_budget(cache, None, load_info) is cache
+    assert load_info == {}
+
+
+def test_normals_are_evicted_first(tmp_path):
+    cache = save_cache(tmp_path, 100)
+    load_info = {}
+    fitted = fit_cache_to_budget(cache, 100 * 48, load_info)
+    assert 'normals' not in fitted and 'normals' in cache
+    assert 'step' not in fitted
+    assert load_info == {'source_points': 100, 'step': 1, 'evicted': ['normals']}
+
+
+def test_points_are_strided_to_fit(tmp_path):
+    cache = save_cache(tmp_path, 100, normals=False)
+    load_info = {}
+    fitted = fit_cache_to_budget(cache, 1000, load_info, min_points=10)
+    assert fitted['step'] == 5
+    assert load_info['evicted'] == []
+    assert len(open_cache_array(fitted['points'])[::fitted['step']]) * 48 <= 1000
+    # Scalar fields follow the same stride as the points
+    np.testing.assert_array_equal(read_scalar_fields(fitted)['intensity'], np.arange(0, 100, 5))
+
+
+def test_budget_too_small_raises(tmp_path):
+    cache = save_cache(tmp_path, 100)
+    with pytest.raises(MemoryBudgetError):
+        fit_cache_to_budget(cache, 100, min_points=10)
+    # A cloud smaller than min_points must fit whole
+    with pytest.raises(MemoryBudgetError):
+        fit_cache_to_budget(cache, 48 * 99, min_points=1000)
+
+
+def test_empty_cloud_always_fits(tmp_path):
+    cache = save_cache(tmp_path, 0)
+    assert fit_cache_to_budget(cache, 0) is cache
+    assert read_scalar_fields(cache)['intensity'].shape == (0,)
+
+
+def test_truncated_cache_is_rejected(tmp_path):
+    cache = save_cache(tmp_path, 100)
+    with open(cache['points'], 'r+b') as f:
+        f.truncate(200)
+    with pytest.raises(ValueError):
+        fit_cache_to_budget(cache, 100 * 72)
+    with open(cache['points'], 'wb') as f:
+        f.write(b"\x93NUMPY")
+    with pytest.raises(ValueError):
+        open_cache_array(cache['points'])
+
+
+def test_budget_accounting():
+    budget = MemoryBudget(limit=1000)
+    assert budget.measure([('geometry', 300), ('derived', 100), ('caches', 50), ('geometry', 50)]) == 500
+    assert budget.usage == {'geometry': 350, 'derived': 100, 'caches': 50}
+    assert budget.available() == 500
+    assert budget.available(replacing=350) == 850
+    budget.measure([('caches', 1500)])
+    assert budget.available() == 0
+    assert budget.report()['used'] == 1500
+
+
+class TestCloudCache:
+    @pytest.fixture(autouse=True)
+    def open3d(self):
+        pytest.importorskip('open3d')
+        return Open3Dvisualizer.load_open3d()
+
+    def test_round_trip(self, tmp_path, open3d):
+        rng = np.random.default_rng(3)
+        cloud = open3d.geometry.PointCloud()
+        cloud.points = open3d.utility.Vector3dVector(rng.uniform(size=(50, 3)))
+        cloud.colors = open3d.utility.Vector3dVector(rng.uniform(size=(50, 3)))
+        intensity = rng.uniform(size=50)
+        cache = Open3Dvisualizer.write_cloud_cache(cloud, str(tmp_path / "cloud"),
+                                                   {'intensity': intensity, 'short': np.zeros(3)})
+        
+        assert sorted(cache) == ['colors', 'points', 'scalars']
+        assert list(cache['scalars']) == ['intensity']
+        restored = Open3Dvisualizer.read_cloud_cache(cache)
+        np.testing.assert_array_equal(np.asarray(restored.points), np.asarray(cloud.points))
+        np.testing.assert_allclose(np.asarray(restored.colors), np.asarray(cloud.colors), rtol=1e-6)
+        assert not restored.has_normals()
+        
+        reduced = Open3Dvisualizer.read_cloud_cache(dict(cache, step=3))
+        np.testing.assert_array_equal(np.asarray(reduced.points), np.asarray(cloud.points)[::3])
+
+    def test_intensity_only_cloud_is_grey(self, tmp_path, open3d):
+        cache = {'points': str(tmp_path / "p.npy"), 'scalars': {'intensity': str(tmp_path / "i.npy")}}
+        np.save(cache['points'], np.zeros((3, 3)))
+        np.save(cache['scalars']['intensity'], np.array([0.0, 5.0, 10.0], dtype=np.float32))
+        colors = np.asarray(Open3Dvisualizer.read_cloud_cache(cache).colors)
+        assert np.all(colors[:, 0] == colors[:, 1])
+        assert colors[0, 0] == 0.0 and colors[2, 0] == 1.0
+
+    def test_empty_cloud(self, tmp_path, open3d):
+        cloud = open3d.geometry.PointCloud()
+        cache = Open3Dvisualizer.write_cloud_cache(cloud, str(tmp_path / "empty"))
+        assert len(Open3Dvisualizer.read_cloud_cache(cache).points) == 0
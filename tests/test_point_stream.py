@@ -0,0 +1,66 @@
+import numpy as np
+
+from Open3Dvisualizer import RollingPointBuffer
+
+
+def packet(start, count):
+    points = np.arange(start, start + count, dtype=np.float32)[:, None].repeat(3, axis=1)
+    colors = np.full((count, 3), start % 256, dtype=np.uint8)
+    return points, colors
+
+
+def test_empty_buffer():
+    buffer = RollingPointBuffer(4)
+    points, colors = buffer.snapshot()
+    assert points.shape == (0, 3)
+    assert colors.shape == (0, 3)
+    assert buffer.version == 0
+
+
+def test_snapshot_before_the_buffer_fills():
+    buffer = RollingPointBuffer(8)
+    buffer.append(*packet(0, 3))
+    points, colors = buffer.snapshot()
+    assert points.dtype == np.float64
+    np.testing.assert_array_equal(points[:, 0], [0, 1, 2])
+    np.testing.assert_allclose(colors, 0.0)
+    assert buffer.count == 3
+    assert buffer.version == 1
+
+
+def test_wraparound_keeps_the_newest_points():
+    buffer = RollingPointBuffer(5)
+    buffer.append(*packet(0, 3))
+    buffer.append(*packet(3, 4))
+    points, _ = buffer.snapshot()
+    
+    assert buffer.count == 5
+    assert buffer.write_index == 2
+    # The ring is returned in slot order; the oldest two points were overwritten
+    np.testing.assert_array_equal(points[:, 0], [5, 6, 2, 3, 4])
+
+
+def test_oversized_packet_keeps_its_tail():
+    buffer = RollingPointBuffer(4)
+    buffer.append(*packet(0, 2))
+    buffer.append(*packet(10, 7))
+    points, colors = buffer.snapshot()
+    assert sorted(points[:, 0]) == [13, 14, 15, 16]
+    np.testing.assert_allclose(colors, 10 / 255.0)
+
+
+def test_points_without_colours_are_grey():
+    buffer = RollingPointBuffer(4)
+    buffer.append(np.zeros((2, 3), dtype=np.float32))
+    _, colors = buffer.snapshot()
+    np.testing.assert_allclose(colors, 200 / 255.0)
+
+
+def test_window_drops_old_points():
+    buffer = RollingPointBuffer(6, window=5.0)
+    buffer.append(*packet(0, 2))
+    buffer.times[:2] -= 10.0
+    buffer.append(*packet(2, 2))
+    points, colors = buffer.snapshot()
+    np.testing.assert_array_equal(points[:, 0], [2, 3])
+    assert len(colors) == 2
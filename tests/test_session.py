@@ -0,0 +1,81 @@
+import json
+import zipfile
+
+import numpy as np
+import pytest
+
+from Open3Dvisualizer import (SESSION_VERSION, open_cache_array, read_scalar_fields, read_session_bundle,
+                              save_session_bundle)
+
+
+def test_bundle_round_trip(tmp_path):
+    rng = np.random.default_rng(4)
+    points = rng.uniform(-1e5, 1e5, (1000, 3))
+    colors = rng.uniform(size=(1000, 3))
+    intensity = rng.uniform(size=1000)
+    path = str(tmp_path / "scene.o3dsession")
+    state = {'camera': {'width': 640}, 'point_size': 2.0}
+    save_session_bundle(path, {
+        'points.npy': (points, np.float64),
+        'colors.npy': (colors, np.float32),
+        'sf_intensity.npy': (intensity, np.float32),
+    }, state)
+    
+    restored, cache = read_session_bundle(path)
+    assert restored['camera'] == state['camera'] and restored['point_size'] == 2.0
+    assert restored['version'] == SESSION_VERSION
+    assert sorted(cache) == ['colors', 'points', 'scalars']
+    # Arrays are mapped in place from the stored members
+    mapped = open_cache_array(cache['points'])
+    assert isinstance(mapped, np.memmap)
+    np.testing.assert_array_equal(mapped, points)
+    np.testing.assert_array_equal(open_cache_array(cache['colors']), colors.astype(np.float32))
+    np.testing.assert_array_equal(read_scalar_fields(cache)['intensity'], intensity.astype(np.float32))
+    
+    # The bundle is also a regular npz archive
+    with np.load(path) as archive:
+        np.testing.assert_array_equal(archive['points'], points)
+    assert not (tmp_path / "scene.o3dsession.partial").exists()
+
+
+def test_empty_cloud_round_trip(tmp_path):
+    path = str(tmp_path / "empty.o3dsession")
+    save_session_bundle(path, {'points.npy': (np.empty((0, 3)), np.float64)}, {})
+    _, cache = read_session_bundle(path)
+    assert open_cache_array(cache['points']).shape == (0, 3)
+
+
+def test_save_replaces_an_existing_session(tmp_path):
+    path = str(tmp_path / "scene.o3dsession")
+    save_session_bundle(path, {'points.npy': (np.zeros((5, 3)), np.float64)}, {})
+    save_session_bundle(path, {'points.npy': (np.ones((2, 3)), np.float64)}, {})
+    _, cache = read_session_bundle(path)
+    np.testing.assert_array_equal(open_cache_array(cache['points']), np.ones((2, 3)))
+
+
+def test_failed_save_keeps_the_old_session(tmp_path):
+    path = str(tmp_path / "scene.o3dsession")
+    save_session_bundle(path, {'points.npy': (np.zeros((5, 3)), np.float64)}, {})
+    with pytest.raises(TypeError):
+        save_session_bundle(path, {'points.npy': (np.zeros((5, 3)), np.float64)}, {'bad': object()})
+    _, cache = read_session_bundle(path)
+    assert open_cache_array(cache['points']).shape == (5, 3)
+    assert not (tmp_path / "scene.o3dsession.partial").exists()
+
+
+def test_newer_sessions_are_rejected(tmp_path):
+    path = str(tmp_path / "future.o3dsession")
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('session.json', json.dumps({'version': SESSION_VERSION + 1, 'arrays': []}))
+    with pytest.raises(ValueError, match="newer version"):
+        read_session_bundle(path)
+
+
+def test_compressed_members_cannot_be_mapped(tmp_path):
+    path = str(tmp_path / "compressed.npz")
+    np.savez_compressed(path, points=np.zeros((5, 3)))
+    with zipfile.ZipFile(path, 'a') as archive:
+        archive.writestr('session.json', json.dumps({'version': SESSION_VERSION, 'arrays': ['points.npy']}))
+    _, cache = read_session_bundle(path)
+    with pytest.raises(ValueError, match="compressed"):
+        open_cache_array(cache['points'])
@@ -0,0 +1,89 @@
+import queue
+
+import numpy as np
+import pytest
+
+from Open3Dvisualizer import ControlChannel, FrameMailbox
+
+
+def frame(value, width=3, height=2):
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def test_mailbox_round_trip():
+    mailbox = FrameMailbox(max_size=(4, 4))
+    assert mailbox.take() is None
+    
+    pixels = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    mailbox.post(pixels)
+    assert mailbox.wait(0)
+    sequence, taken = mailbox.take()
+    assert sequence == 1
+    np.testing.assert_array_equal(taken, pixels)
+    assert mailbox.take(sequence) is None
+
+
+def test_mailbox_keeps_only_the_latest_frame():
+    mailbox = FrameMailbox(max_size=(4, 4))
+    mailbox.post(frame(10))
+    mailbox.post(frame(20, width=4, height=4))
+    sequence, taken = mailbox.take()
+    # The reader sees how many frames it skipped and only the newest one
+    assert sequence == 2
+    assert taken.shape == (4, 4, 3)
+    assert (taken == 20).all()
+
+
+def test_mailbox_rejects_oversized_frames():
+    mailbox = FrameMailbox(max_size=(4, 4))
+    with pytest.raises(ValueError):
+        mailbox.post(frame(1, width=5, height=4))
+    assert mailbox.take() is None
+
+
+def test_taken_frame_is_a_copy():
+    mailbox = FrameMailbox(max_size=(4, 4))
+    mailbox.post(frame(1))
+    _, taken = mailbox.take()
+    mailbox.post(frame(2))
+    assert (taken == 1).all()
+
+
+def test_control_channel_tags_and_acknowledges():
+    results = queue.Queue()
+    channel = ControlChannel(results)
+    channel.begin({'command': 'load_file', 'id': 7})
+    channel.put({'type': 'status', 'message': "Loading"})
+    channel.finish()
+    
+    assert results.get_nowait() == {'type': 'status', 'message': "Loading", 'command_id': 7}
+    assert results.get_nowait() == {'type': 'ack', 'id': 7, 'command': 'load_file', 'ok': True}
+    
+    # Messages outside a command are neither tagged nor acknowledged
+    channel.put({'type': 'status', 'message': "Idle"})
+    channel.finish()
+    assert results.get_nowait() == {'type': 'status', 'message': "Idle"}
+    assert results.empty()
+
+
+def test_control_channel_reports_failure_once_per_command():
+    results = queue.Queue()
+    channel = ControlChannel(results)
+    channel.begin({'command': 'export_cloud', 'id': 1})
+    channel.put({'type': 'error', 'message': "Disk full"})
+    channel.finish()
+    channel.begin({'command': 'export_cloud', 'id': 2})
+    channel.finish()
+    
+    messages = [results.get_nowait() for _ in range(3)]
+    assert [m['ok'] for m in messages if m['type'] == 'ack'] == [False, True]
+
+
+def test_control_channel_without_command_id():
+    results = queue.Queue()
+    channel = ControlChannel(results)
+    channel.begin({'command': 'render'})
+    channel.put({'type': 'status', 'message': "Rendered"})
+    channel.finish()
+    assert results.get_nowait() == {'type': 'status', 'message': "Rendered"}
+    assert results.empty()